@@ -0,0 +1,371 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlsplit
+from datetime import date, datetime, timedelta
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.database.init_db_completo import gerar_turnos, TURNOS_SINTETICOS, nome_equipe
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+# Ordem de execução dos cenários (leituras antes das escritas que mudam o volume)
+CENARIOS = ['listar', 'dashboard', 'criar_planejamento', 'triagem', 'execucao', 'relatorio', 'login']
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))] if ordenados else 0
+
+
+def _classificacao(eficiencia):
+    if eficiencia >= 95:
+        return 'excelente'
+    if eficiencia >= 85:
+        return 'bom'
+    if eficiencia >= 70:
+        return 'regular'
+    return 'ruim'
+
+
+def _planejamento(turno, finalizado, aleatorio):
+    """Converte um turno gerado em colunas de DiarioPlanejamento já triado e executado"""
+    total = turno['protocolos_recebidos']
+    vencidos = aleatorio.randint(0, total // 3)
+    eficiencia = round(turno['protocolos_executados'] / total * 100)
+    percentual_vencidos = vencidos / total * 100
+    return {
+        'data': turno['data'], 'turno': turno['turno'], 'equipe': turno['equipe'],
+        'colaborador1': turno['colaborador1'], 'colaborador2': turno['colaborador2'],
+        'veiculo': turno['veiculo'], 'regiao': turno['regiao'],
+        'protocolos_prazo': total - vencidos, 'protocolos_vencidos': vencidos, 'total_protocolos': total,
+        'protocolos_nao_enviados_prazo': aleatorio.randint(0, 3), 'protocolos_vencem_no_turno': aleatorio.randint(0, 8),
+        'comentario_triagem': turno['dificuldades_encontradas'],
+        'status_triagem': 'critico' if percentual_vencidos > 30 else 'atencao' if percentual_vencidos > 15 else 'normal',
+        'atendido': turno['protocolos_executados'], 'impossibilidade': turno['protocolos_impossibilidade'],
+        'nao_executado': turno['protocolos_pendentes'], 'comentario_execucao': turno['observacoes_campo'],
+        'eficiencia': eficiencia, 'classificacao': _classificacao(eficiencia),
+        'sentimento_supervisao': 'neutro', 'pontos_atencao': False,
+        'status_final': 'finalizado' if finalizado else None,
+        'horario_saida_base': turno['horario_saida_base'],
+        'horario_chegada_base': turno['horario_chegada_base'],
+    }
+
+
+def popular_diario(app, dias, equipes):
+    """Carrega o banco da aplicação com planejamentos, relatórios e logs sintéticos"""
+    from src.models.diario import db, DiarioPlanejamento, RelatoriosDiarios, DashboardAgregado
+    from src.utils.audit import LOG_SISTEMA
+    from sqlalchemy import insert
+
+    aleatorio = random.Random(7)
+    hoje = date.today()
+    linhas = [_planejamento(turno, turno['data'] < hoje - timedelta(days=2), aleatorio)
+              for turno in gerar_turnos(dias, equipes)]
+    with app.app_context():
+        ids = db.session.scalars(
+            insert(DiarioPlanejamento).returning(DiarioPlanejamento.id, sort_by_parameter_order=True), linhas
+        ).all()
+        relatorios = []
+        logs = []
+        for planejamento_id, linha in zip(ids, linhas):
+            dados = json.dumps(linha, default=str)
+            logs.append({'acao': 'criar_planejamento', 'tabela_afetada': 'diario_planejamento',
+                         'registro_id': planejamento_id, 'dados_novos': dados, 'timestamp': datetime.utcnow()})
+            if linha['status_final'] == 'finalizado':
+                relatorios.append({
+                    'data': linha['data'], 'turno': linha['turno'], 'equipe': linha['equipe'],
+                    'relatorio_json': json.dumps({
+                        'cabecalho': {'data': linha['data'].isoformat(), 'turno': linha['turno'], 'equipe': linha['equipe'],
+                                      'colaboradores': [linha['colaborador1'], linha['colaborador2']],
+                                      'veiculo': linha['veiculo'], 'regiao': linha['regiao']},
+                        'protocolos': {'no_prazo': linha['protocolos_prazo'], 'vencidos': linha['protocolos_vencidos'],
+                                       'total': linha['total_protocolos']},
+                        'execucao': {'atendido': linha['atendido'], 'impossibilidade': linha['impossibilidade'],
+                                     'nao_executado': linha['nao_executado']},
+                        'metricas': {'eficiencia': linha['eficiencia'], 'classificacao': linha['classificacao']},
+                    }),
+                    'created_at': datetime.utcnow()
+                })
+        if relatorios:
+            db.session.execute(insert(RelatoriosDiarios), relatorios)
+        db.session.execute(LOG_SISTEMA.insert(), logs)
+        db.session.commit()
+        DashboardAgregado.reconstruir()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+        return {'planejamentos': len(ids), 'relatorios': len(relatorios), 'logs': len(logs)}, list(ids)
+
+
+def popular_completo(uri, dias, equipes):
+    """Carrega o banco completo com protocolos, acompanhamentos e reports dos mesmos turnos.
+
+    O banco da aplicação não tem tabela de protocolos: eles vêm da carga em
+    massa do init_db_completo, com a mesma semente e janela de popular_diario.
+    """
+    from src.models.diario_completo import db
+    from src.database.init_db_completo import semear_cadastros, semear_em_massa, HASH_SEMENTE
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        semear_cadastros(HASH_SEMENTE)
+        return semear_em_massa(dias, equipes)
+
+
+def criar_app_auth(uri, usuarios):
+    """Aplicação só com o blueprint de autenticação (o app principal não inicializa o banco de usuários)"""
+    from src.models.user import User, Profile, db
+    from src.routes.auth import auth_bp
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        perfil = Profile(name='Equipe', description='Benchmark')
+        db.session.add(perfil)
+        db.session.flush()
+        for i in range(usuarios):
+            user = User(username=f'bench{i}', email=f'bench{i}@engie.com', profile_id=perfil.id)
+            user.set_password('senha123')
+            db.session.add(user)
+        db.session.commit()
+    return app
+
+
+class ClienteTeste:
+    """Requisições pelo test client do Flask (um cliente por thread)"""
+
+    def __init__(self, apps):
+        self.clientes = {nome: app.test_client() for nome, app in apps.items()}
+
+    def request(self, destino, metodo, caminho, corpo=None, headers=None):
+        resposta = self.clientes[destino].open(caminho, method=metodo, json=corpo, headers=headers)
+        return resposta.status_code
+
+
+class ClienteHTTP:
+    """Requisições a um servidor em execução, com conexão keep-alive por thread"""
+
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self.conexao = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=60)
+
+    def request(self, destino, metodo, caminho, corpo=None, headers=None):
+        headers = dict(headers or {})
+        dados = None
+        if corpo is not None:
+            dados = json.dumps(corpo)
+            headers['Content-Type'] = 'application/json'
+        self.conexao.request(metodo, caminho, body=dados, headers=headers)
+        resposta = self.conexao.getresponse()
+        resposta.read()
+        return resposta.status
+
+
+def montar_requisicao(cenario, contexto, aleatorio, thread, i):
+    """(destino, método, caminho, corpo, headers) da i-ésima requisição do cenário"""
+    ids = contexto['ids']
+    auth = contexto['auth']
+    if cenario == 'listar':
+        if aleatorio.random() < 0.5:
+            return 'diario', 'GET', '/api/planejamentos?limit=50', None, None
+        equipe = nome_equipe(aleatorio.randrange(contexto['equipes'])).split(' ')[0]
+        return 'diario', 'GET', f'/api/planejamentos?limit=50&equipe={equipe}', None, None
+    if cenario == 'dashboard':
+        return 'diario', 'GET', '/api/dashboard', None, auth
+    if cenario == 'criar_planejamento':
+        # Chave única por execução, thread e requisição
+        return 'diario', 'POST', '/api/planejamento', {
+            'data': contexto['data_nova'], 'turno': aleatorio.choice(TURNOS_SINTETICOS),
+            'equipe': f"Bench {contexto['execucao']}-{thread}-{i}", 'colaborador1': 'Colaborador Bench',
+            'veiculo': 'VAN-999', 'regiao': 'Curitiba Centro'
+        }, auth
+    if cenario == 'triagem':
+        return 'diario', 'PUT', f'/api/triagem/{aleatorio.choice(ids)}', {
+            'horario_saida_base': '07:00:00', 'horario_primeiro_atendimento': '07:40:00',
+            'horario_inicio_intervalo': '12:00:00', 'horario_fim_intervalo': '13:00:00',
+            'horario_ultimo_atendimento': '16:20:00', 'horario_chegada_base': '17:10:00'
+        }, auth
+    if cenario == 'execucao':
+        return 'diario', 'PUT', f'/api/execucao/{aleatorio.choice(ids)}', {
+            'atendido': aleatorio.randint(5, 20), 'impossibilidade': aleatorio.randint(0, 3),
+            'nao_executado': aleatorio.randint(0, 3), 'comentario_execucao': 'Atualizado pelo benchmark'
+        }, None
+    if cenario == 'relatorio':
+        return 'diario', 'POST', f'/api/relatorio/{aleatorio.choice(ids)}', None, None
+    if cenario == 'login':
+        return 'auth', 'POST', '/api/auth/login', {
+            'username': f'bench{aleatorio.randrange(contexto["usuarios"])}', 'password': 'senha123'
+        }, None
+    raise ValueError(f'Cenário desconhecido: {cenario}')
+
+
+def executar_cenario(cenario, fabrica_cliente, contexto, concorrencia, requisicoes, aquecimento):
+    """Roda o cenário em `concorrencia` threads e devolve as estatísticas de latência"""
+    latencias = []
+    status = {}
+    lock = threading.Lock()
+    barreira = threading.Barrier(concorrencia + 1)
+
+    def worker(n):
+        aleatorio = random.Random(f'{cenario}-{n}')
+        cliente = fabrica_cliente()
+        for i in range(aquecimento):
+            cliente.request(*montar_requisicao(cenario, contexto, aleatorio, n, -1 - i))
+        barreira.wait()
+        locais = []
+        codigos = {}
+        for i in range(requisicoes):
+            requisicao = montar_requisicao(cenario, contexto, aleatorio, n, i)
+            inicio = time.perf_counter()
+            codigo = cliente.request(*requisicao)
+            locais.append(time.perf_counter() - inicio)
+            codigos[codigo] = codigos.get(codigo, 0) + 1
+        with lock:
+            latencias.extend(locais)
+            for codigo, quantidade in codigos.items():
+                status[codigo] = status.get(codigo, 0) + quantidade
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concorrencia)]
+    for t in threads:
+        t.start()
+    # Cronômetro só depois do aquecimento de todas as threads
+    barreira.wait()
+    inicio = time.perf_counter()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    return {
+        'requisicoes': len(latencias),
+        'requisicoes_por_segundo': round(len(latencias) / duracao, 1),
+        'p50_ms': round(percentil(latencias, 0.50) * 1000, 2),
+        'p95_ms': round(percentil(latencias, 0.95) * 1000, 2),
+        'p99_ms': round(percentil(latencias, 0.99) * 1000, 2),
+        'media_ms': round(sum(latencias) / len(latencias) * 1000, 2) if latencias else 0,
+        'max_ms': round(max(latencias) * 1000, 2) if latencias else 0,
+        'erros': sum(q for codigo, q in status.items() if codigo >= 500),
+        'status': {str(codigo): q for codigo, q in sorted(status.items())},
+    }
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual, base):
+    """Imprime a variação de latência e vazão em relação a um resultado anterior"""
+    print(f"\nComparação com {base.get('commit')} ({base.get('data')}):")
+    for cenario, resultado in atual['cenarios'].items():
+        anterior = base.get('cenarios', {}).get(cenario)
+        if not anterior:
+            continue
+        variacoes = []
+        for chave in ('p50_ms', 'p99_ms', 'requisicoes_por_segundo'):
+            if anterior[chave]:
+                variacoes.append(f"{chave} {(resultado[chave] / anterior[chave] - 1) * 100:+.1f}%")
+        print(f"  {cenario:<20} {'  '.join(variacoes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark reprodutível dos endpoints da API')
+    parser.add_argument('--dias', type=int, default=90, help='dias de histórico sintético')
+    parser.add_argument('--equipes', type=int, default=20)
+    parser.add_argument('--usuarios', type=int, default=20, help='usuários para o cenário de login')
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--requisicoes', type=int, default=50, help='requisições por thread em cada cenário')
+    parser.add_argument('--aquecimento', type=int, default=3, help='requisições descartadas por thread')
+    parser.add_argument('--cenarios', default=','.join(CENARIOS))
+    parser.add_argument('--url', help='servidor em execução (sem semear dados); padrão: test client')
+    parser.add_argument('--jwt-secret', default='super-secret', help='JWT_SECRET_KEY do servidor (modo --url)')
+    parser.add_argument('--saida', default='bench_api.json', help='arquivo JSON com o resultado')
+    parser.add_argument('--comparar', help='resultado anterior para comparação')
+    args = parser.parse_args()
+
+    cenarios = [c.strip() for c in args.cenarios.split(',') if c.strip()]
+    tmp = tempfile.TemporaryDirectory()
+    contexto = {
+        'equipes': args.equipes, 'usuarios': args.usuarios,
+        'execucao': uuid.uuid4().hex[:8], 'data_nova': (date.today() + timedelta(days=365)).isoformat()
+    }
+
+    if args.url:
+        jwt_app = Flask(__name__)
+        jwt_app.config['JWT_SECRET_KEY'] = args.jwt_secret
+        JWTManager(jwt_app)
+        with jwt_app.app_context():
+            contexto['auth'] = {'Authorization': f"Bearer {create_access_token(identity='bench')}"}
+        contexto['ids'] = list(range(1, args.dias * args.equipes * len(TURNOS_SINTETICOS) + 1))
+        dataset = None
+        fabrica = lambda: ClienteHTTP(args.url)
+    else:
+        # O app principal lê DATABASE_URL e COMPLETO_DATABASE_URL ao ser importado
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+        os.environ['COMPLETO_DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'completo.db')}"
+        from src.main import app
+        inicio = time.perf_counter()
+        dataset, contexto['ids'] = popular_diario(app, args.dias, args.equipes)
+        completo = popular_completo(os.environ['COMPLETO_DATABASE_URL'], args.dias, args.equipes)
+        dataset.update({chave: completo[chave] for chave in ('protocolos', 'acompanhamentos', 'reports')})
+        app_auth = criar_app_auth(f"sqlite:///{os.path.join(tmp.name, 'auth.db')}", args.usuarios)
+        dataset['usuarios'] = args.usuarios
+        dataset['segundos_para_semear'] = round(time.perf_counter() - inicio, 2)
+        with app.app_context():
+            contexto['auth'] = {'Authorization': f"Bearer {create_access_token(identity='bench')}"}
+        apps = {'diario': app, 'auth': app_auth}
+        fabrica = lambda: ClienteTeste(apps)
+
+    resultado = {
+        'commit': _commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {'python': platform.python_version(), 'plataforma': platform.platform(), 'cpus': os.cpu_count()},
+        'parametros': {'dias': args.dias, 'equipes': args.equipes, 'concorrencia': args.concorrencia,
+                       'requisicoes': args.requisicoes, 'aquecimento': args.aquecimento,
+                       'modo': args.url or 'test_client'},
+        'dataset': dataset,
+        'cenarios': {}
+    }
+    for cenario in cenarios:
+        estatisticas = executar_cenario(cenario, fabrica, contexto, args.concorrencia, args.requisicoes, args.aquecimento)
+        resultado['cenarios'][cenario] = estatisticas
+        print(f"{cenario:<20} {estatisticas['requisicoes_por_segundo']:>8} req/s  p50 {estatisticas['p50_ms']:>8} ms  "
+              f"p99 {estatisticas['p99_ms']:>8} ms  erros {estatisticas['erros']}")
+
+    with open(args.saida, 'w') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f'\nResultado salvo em {args.saida}')
+
+    if args.comparar:
+        with open(args.comparar) as arquivo:
+            comparar(resultado, json.load(arquivo))
+
+    if not args.url:
+        from src.utils.audit import audit_log
+        audit_log.shutdown()
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
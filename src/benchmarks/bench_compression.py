@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import tempfile
+from datetime import date, datetime, timedelta
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.utils import compression
+from src.utils.compression import CompressedJSONText, comprimir, descomprimir, treinar_dicionario
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer, Text, text
+
+TURNOS = ['M1', 'T2', 'N1', 'A']
+CLASSIFICACOES = ['excelente', 'bom', 'regular', 'ruim']
+
+
+def gerar_planejamento(i):
+    """Snapshot de planejamento no formato gravado pelo log de auditoria"""
+    atendido = random.randint(5, 40)
+    total = atendido + random.randint(0, 10)
+    return {
+        'id': i, 'data': (date(2024, 1, 1) + timedelta(days=i // 20)).isoformat(),
+        'turno': random.choice(TURNOS), 'equipe': f'Man-IP-{i % 20:02d} | ENGIE',
+        'colaborador1': f'Colaborador {random.randint(1, 80)}', 'colaborador2': f'Colaborador {random.randint(1, 80)}',
+        'veiculo': f'VEI-{random.randint(100, 999)}', 'regiao': random.choice(['Norte', 'Sul', 'Leste', 'Oeste']),
+        'protocolos_prazo': total - 3, 'protocolos_vencidos': 3, 'total_protocolos': total,
+        'comentario_triagem': None, 'status_triagem': 'normal',
+        'protocolos_nao_enviados_prazo': random.randint(0, 3), 'protocolos_vencem_no_turno': random.randint(0, 8),
+        'atendido': atendido, 'impossibilidade': total - atendido, 'nao_executado': 0,
+        'comentario_execucao': random.choice([None, 'Chuva forte na região', 'Veículo em manutenção']),
+        'eficiencia': round(atendido / total * 100), 'classificacao': random.choice(CLASSIFICACOES),
+        'comentario_supervisor': None, 'sentimento_supervisao': 'neutro', 'pontos_atencao': False,
+        'status_final': random.choice(['pendente', 'supervisionado', 'finalizado']),
+        'horario_saida_base': '07:10:00', 'horario_primeiro_atendimento': '07:45:00',
+        'horario_inicio_intervalo': '12:00:00', 'horario_fim_intervalo': '13:00:00',
+        'horario_ultimo_atendimento': '16:30:00', 'horario_chegada_base': '17:05:00',
+        'created_at': datetime(2024, 1, 1, 7).isoformat(), 'updated_at': datetime(2024, 1, 1, 17).isoformat()
+    }
+
+
+def gerar_relatorio(p):
+    """Corpo de relatório no formato de gerar_relatorio"""
+    return {
+        'cabecalho': {'data': p['data'], 'turno': p['turno'], 'equipe': p['equipe'],
+                      'colaboradores': [p['colaborador1'], p['colaborador2']],
+                      'veiculo': p['veiculo'], 'regiao': p['regiao']},
+        'protocolos': {'no_prazo': p['protocolos_prazo'], 'vencidos': p['protocolos_vencidos'], 'total': p['total_protocolos']},
+        'execucao': {'atendido': p['atendido'], 'impossibilidade': p['impossibilidade'], 'nao_executado': 0},
+        'comentarios': {'triagem': None, 'execucao': p['comentario_execucao'], 'supervisor': None},
+        'metricas': {'eficiencia': p['eficiencia'], 'classificacao': p['classificacao'], 'status_triagem': 'normal'},
+        'timestamp': datetime(2024, 1, 1, 17, random.randint(0, 59)).isoformat()
+    }
+
+
+def medir(amostras, dicionario_id):
+    """Tamanho total comprimido e custo médio (µs) de compressão/descompressão"""
+    inicio = time.perf_counter()
+    comprimidos = [comprimir(amostra, dicionario_id) for amostra in amostras]
+    codificacao = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for valor in comprimidos:
+        descomprimir(valor)
+    decodificacao = time.perf_counter() - inicio
+    tamanho = sum(len(v) if isinstance(v, bytes) else len(v.encode()) for v in comprimidos)
+    return tamanho, codificacao / len(amostras) * 1e6, decodificacao / len(amostras) * 1e6
+
+
+def tamanho_banco(amostras, tipo):
+    """Tamanho do arquivo SQLite com as amostras gravadas na coluna do tipo informado"""
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'bench.db')
+        engine = create_engine(f'sqlite:///{caminho}')
+        tabela = Table('amostras', MetaData(), Column('id', Integer, primary_key=True), Column('valor', tipo))
+        tabela.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(tabela.insert(), [{'valor': amostra} for amostra in amostras])
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text('VACUUM'))
+        engine.dispose()
+        return os.path.getsize(caminho)
+
+
+def executar(quantidade):
+    random.seed(42)
+    planejamentos = [gerar_planejamento(i) for i in range(quantidade)]
+    conjuntos = {
+        'relatorio_json': [json.dumps(gerar_relatorio(p)) for p in planejamentos],
+        'log_sistema.dados_novos': [json.dumps(p) for p in planejamentos],
+    }
+
+    # Dicionário treinado com metade das amostras e avaliado na outra metade
+    treino = [a for amostras in conjuntos.values() for a in amostras[::2]]
+    compression.DICIONARIOS[255] = treinar_dicionario(treino)
+    compression.DICIONARIOS[0] = b''
+
+    for nome, amostras in conjuntos.items():
+        avaliacao = amostras[1::2]
+        bruto = sum(len(a.encode()) for a in avaliacao)
+        print(f'\n{nome}: {len(avaliacao)} linhas, {bruto / 1024:.1f} KiB em texto')
+        print(f'{"variante":<22}{"KiB":>9}{"razão":>8}{"comprimir µs":>15}{"descomprimir µs":>17}')
+        for rotulo, dicionario_id in [('zlib sem dicionário', 0), ('zlib + dicionário 1', 1), ('zlib + treinado', 255)]:
+            tamanho, enc, dec = medir(avaliacao, dicionario_id)
+            print(f'{rotulo:<22}{tamanho / 1024:>9.1f}{bruto / tamanho:>8.2f}{enc:>15.1f}{dec:>17.1f}')
+        inicio = time.perf_counter()
+        for amostra in avaliacao:
+            json.loads(amostra)
+        print(f'(json.loads de referência: {(time.perf_counter() - inicio) / len(avaliacao) * 1e6:.1f} µs)')
+
+        texto = tamanho_banco(amostras, Text)
+        comprimido = tamanho_banco(amostras, CompressedJSONText)
+        print(f'arquivo SQLite: TEXT {texto / 1024:.0f} KiB, CompressedJSONText {comprimido / 1024:.0f} KiB')
+
+    # Só o dicionário 1 é gravado em produção
+    del compression.DICIONARIOS[255], compression.DICIONARIOS[0]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tamanho e custo da compressão das colunas JSON')
+    parser.add_argument('--linhas', type=int, default=5000)
+    args = parser.parse_args()
+    executar(args.linhas)
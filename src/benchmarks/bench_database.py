@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.diario import db, DiarioPlanejamento, DashboardAgregado
+from src.routes.diario import diario_bp
+from src.database.config import engine_options, apply_sqlite_pragmas, SQLITE_PRAGMAS
+from flask import Flask
+from sqlalchemy import inspect
+from flask_jwt_extended import JWTManager, create_access_token
+from datetime import date, timedelta
+
+TURNOS = ['M1', 'T2', 'N1', 'A']
+
+
+def criar_app(uri, pragmas, destruir=False):
+    """Aplicação isolada com o blueprint do diário sobre o banco informado.
+
+    O benchmark apaga e recria as tabelas: um banco que já tem tabelas só é
+    usado com `destruir` (--destruir), para não apagar dados por engano.
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['JWT_SECRET_KEY'] = 'bench-database-local-secret-key-000'
+    JWTManager(app)
+    app.register_blueprint(diario_bp, url_prefix='/api')
+    db.init_app(app)
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, pragmas)
+        existentes = inspect(db.engine).get_table_names()
+        if existentes and not destruir:
+            raise RuntimeError(f'O banco {db.engine.url!r} já tem tabelas ({", ".join(sorted(existentes)[:5])}...); '
+                               'use um banco vazio ou --destruir para apagá-las')
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def popular(app, dias, equipes):
+    """Cria dias x turnos x equipes planejamentos com protocolos já triados"""
+    with app.app_context():
+        inicio = date.today() - timedelta(days=dias)
+        for d in range(dias):
+            for turno in TURNOS:
+                for e in range(equipes):
+                    db.session.add(DiarioPlanejamento(
+                        data=inicio + timedelta(days=d), turno=turno, equipe=f'Equipe {e:02d}',
+                        colaborador1='Colaborador', total_protocolos=20
+                    ))
+        db.session.commit()
+        DashboardAgregado.reconstruir()
+        return [p.id for p in db.session.query(DiarioPlanejamento.id)]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))] if ordenados else 0
+
+
+def executar(nome, uri, pragmas, concorrencia, operacoes, proporcao_escrita, destruir=False):
+    """Executa a carga mista de leituras e escritas em paralelo"""
+    app = criar_app(uri, pragmas, destruir)
+    ids = popular(app, dias=30, equipes=10)
+    with app.app_context():
+        headers = {'Authorization': f"Bearer {create_access_token(identity='bench')}"}
+
+    latencias = {'leitura': [], 'escrita': []}
+    erros = []
+    lock = threading.Lock()
+    barreira = threading.Barrier(concorrencia)
+
+    def worker(semente):
+        aleatorio = random.Random(semente)
+        client = app.test_client()
+        barreira.wait()
+        for _ in range(operacoes):
+            escrita = aleatorio.random() < proporcao_escrita
+            inicio = time.perf_counter()
+            if escrita:
+                resposta = client.put(f'/api/execucao/{aleatorio.choice(ids)}', json={'atendido': aleatorio.randint(0, 20)})
+            else:
+                resposta = client.get('/api/planejamentos?limit=50', headers=headers)
+            duracao = time.perf_counter() - inicio
+            with lock:
+                latencias['escrita' if escrita else 'leitura'].append(duracao)
+                if resposta.status_code >= 500:
+                    erros.append(resposta.get_json().get('error'))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concorrencia)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao_total = time.perf_counter() - inicio
+
+    with app.app_context():
+        db.engine.dispose()
+
+    total = sum(len(v) for v in latencias.values())
+    return {
+        'configuracao': nome,
+        'operacoes_por_segundo': round(total / duracao_total, 1),
+        'leitura_p50_ms': round(percentil(latencias['leitura'], 0.50) * 1000, 2),
+        'leitura_p99_ms': round(percentil(latencias['leitura'], 0.99) * 1000, 2),
+        'escrita_p50_ms': round(percentil(latencias['escrita'], 0.50) * 1000, 2),
+        'escrita_p99_ms': round(percentil(latencias['escrita'], 0.99) * 1000, 2),
+        'erros': len(erros),
+        'exemplo_erro': erros[0] if erros else None
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara configurações de banco sob escrita concorrente')
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--operacoes', type=int, default=50, help='operações por thread')
+    parser.add_argument('--escrita', type=float, default=0.5, help='proporção de escritas (0-1)')
+    parser.add_argument('--servidor', default=os.environ.get('BENCH_DATABASE_URL'),
+                        help='URI de um banco servidor (vazio) para incluir na comparação')
+    parser.add_argument('--destruir', action='store_true',
+                        help='permite apagar as tabelas de um --servidor que já tenha dados')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configuracoes = [
+            ('sqlite rollback journal', f"sqlite:///{os.path.join(tmp, 'padrao.db')}",
+             {'journal_mode': 'DELETE', 'synchronous': 'FULL'}),
+            ('sqlite WAL + busy_timeout', f"sqlite:///{os.path.join(tmp, 'wal.db')}", SQLITE_PRAGMAS),
+        ]
+        if args.servidor:
+            configuracoes.append(('servidor com pool', args.servidor, None))
+
+        for nome, uri, pragmas in configuracoes:
+            try:
+                resultado = executar(nome, uri, pragmas, args.concorrencia, args.operacoes, args.escrita, args.destruir)
+            except RuntimeError as e:
+                print(f"❌ {nome}: {e}")
+                continue
+            print(resultado.pop('configuracao'))
+            for chave, valor in resultado.items():
+                print(f"  {chave}: {valor}")
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.user import User, Profile, db
+from src.routes.auth import auth_bp
+from src.utils.hashing import hasher
+from flask import Flask
+
+
+def criar_app(db_path):
+    """Aplicação isolada apenas com o blueprint de autenticação"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    db.init_app(app)
+    return app
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def benchmark(total_usuarios, concorrencia, logins_por_thread):
+    """Dispara logins simultâneos e mede vazão e latência"""
+    with tempfile.TemporaryDirectory() as tmp:
+        app = criar_app(os.path.join(tmp, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            perfil = Profile(name='Equipe', description='Benchmark')
+            db.session.add(perfil)
+            db.session.commit()
+            for i in range(total_usuarios):
+                user = User(username=f'bench{i}', email=f'bench{i}@engie.com', profile_id=perfil.id)
+                user.set_password('senha123')
+                db.session.add(user)
+            db.session.commit()
+
+        latencias = []
+        status = {}
+        lock = threading.Lock()
+        barreira = threading.Barrier(concorrencia)
+
+        def worker(n):
+            client = app.test_client()
+            barreira.wait()
+            for i in range(logins_por_thread):
+                username = f'bench{(n * logins_por_thread + i) % total_usuarios}'
+                inicio = time.perf_counter()
+                resposta = client.post('/api/auth/login', json={'username': username, 'password': 'senha123'})
+                duracao = time.perf_counter() - inicio
+                with lock:
+                    latencias.append(duracao)
+                    status[resposta.status_code] = status.get(resposta.status_code, 0) + 1
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(concorrencia)]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao_total = time.perf_counter() - inicio
+
+    return {
+        'concorrencia': concorrencia,
+        'logins': len(latencias),
+        'logins_por_segundo': round(len(latencias) / duracao_total, 2),
+        'p50_ms': round(percentil(latencias, 0.50) * 1000, 2),
+        'p99_ms': round(percentil(latencias, 0.99) * 1000, 2),
+        'status': status,
+        'hashing': hasher.stats()
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de logins simultâneos em /api/auth/login')
+    parser.add_argument('--usuarios', type=int, default=20)
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=10, help='logins por thread')
+    args = parser.parse_args()
+
+    resultado = benchmark(args.usuarios, args.concorrencia, args.logins)
+    print(f"Workers de hashing: {hasher.max_workers} | fila máxima: {hasher.max_queue} | método: {hasher.method}")
+    for chave, valor in resultado.items():
+        print(f"  {chave}: {valor}")
@@ -0,0 +1,194 @@
+import os
+import sys
+import re
+import tempfile
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.diario import db, DiarioPlanejamento, RelatoriosDiarios, DashboardAgregado
+from src.routes.diario import diario_bp
+from src.routes.analytics import analytics_bp
+from src.routes.search import search_bp, ORIGENS
+from src.routes.eventos import eventos_bp
+from src.routes.exportacao import exportacao_bp
+from src.database import export_bi
+from src.database.indexes import ensure_indexes
+from src.database.search import ensure_search_index
+from flask import Flask, has_request_context, request
+from flask_jwt_extended import JWTManager, create_access_token
+from sqlalchemy import event
+from datetime import date, timedelta
+import json
+
+# Todo SCAN de tabela, com ou sem "USING [COVERING] INDEX", percorre a tabela ou o
+# índice inteiro; só SEARCH limita a leitura às linhas do filtro. "SCAN n CONSTANT
+# ROWS" (lista do IN) e "SCAN CONSTANT ROW" não leem tabelas
+SCAN = re.compile(r'^SCAN (?!\d+ CONSTANT ROWS$|CONSTANT ROW$)(\S+)')
+
+# Leituras completas intencionais: (rota, tabela) -> motivo
+SCANS_PERMITIDOS = {
+    ('GET /api/planejamentos', 'diario_planejamento'):
+        'primeira página percorre o índice de data em ordem e para no LIMIT; '
+        'equipe é busca por substring; format=ndjson exporta a tabela inteira',
+    ('GET /api/relatorios', 'relatorios_diarios'):
+        'primeira página percorre o índice de data em ordem e para no LIMIT; equipe é busca por substring',
+    ('GET /api/dashboard', 'dashboard_agregado'):
+        'totais pré-calculados: uma linha por dia e status',
+    ('GET /api/dashboard', 'diario_planejamento'):
+        'planejamentos recentes: percorre o índice de created_at e para no LIMIT',
+    ('GET /api/search', 'busca_texto'):
+        'tabela virtual FTS5: o MATCH é resolvido pelo índice invertido',
+    ('POST /api/export', 'sqlite_master'):
+        'catálogo do banco, lido para saber quais tabelas existem',
+}
+
+TURNOS = ['M1', 'T2', 'N1', 'A']
+EQUIPES = ['Man-IP-01 | ENGIE', 'Man-IP-02 | ENGIE', 'Man-IP-03 | ENGIE', 'Equipe 18', 'Equipe 19']
+
+
+def criar_app(db_path):
+    """Monta uma aplicação isolada com os blueprints que consultam o banco da aplicação"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['JWT_SECRET_KEY'] = 'audit-query-plans-local-secret-key'
+    JWTManager(app)
+    app.register_blueprint(diario_bp, url_prefix='/api')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    app.register_blueprint(search_bp, url_prefix='/api')
+    app.register_blueprint(eventos_bp, url_prefix='/api')
+    app.register_blueprint(exportacao_bp, url_prefix='/api')
+    db.init_app(app)
+    return app
+
+
+def popular_banco(dias=60):
+    """Gera planejamentos e relatórios suficientes para o otimizador usar os índices"""
+    inicio = date.today() - timedelta(days=dias)
+    for d in range(dias):
+        for turno in TURNOS:
+            for equipe in EQUIPES:
+                db.session.add(DiarioPlanejamento(
+                    data=inicio + timedelta(days=d),
+                    turno=turno,
+                    equipe=equipe,
+                    colaborador1='Colaborador',
+                    total_protocolos=10,
+                    atendido=8,
+                    eficiencia=80,
+                    status_final='finalizado' if d % 2 else None
+                ))
+                db.session.add(RelatoriosDiarios(
+                    data=inicio + timedelta(days=d),
+                    turno=turno,
+                    equipe=equipe,
+                    relatorio_json=json.dumps({'eficiencia': 80})
+                ))
+    db.session.commit()
+    DashboardAgregado.reconstruir()
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+
+
+def exercitar_rotas(client, headers):
+    """Chama cada rota dos blueprints auditados com as combinações de filtros usadas"""
+    hoje = date.today().isoformat()
+    resposta = client.post('/api/planejamento', headers=headers, json={
+        'data': hoje, 'turno': 'T1', 'equipe': 'Equipe Auditoria', 'colaborador1': 'Auditor'
+    })
+    planejamento_id = resposta.get_json()['id']
+    client.post('/api/planejamentos/lote', headers=headers, json=[
+        {'data': hoje, 'turno': turno, 'equipe': 'Equipe Auditoria', 'colaborador1': 'Auditor'}
+        for turno in TURNOS
+    ])
+    # Primeira consulta carrega a janela inteira; a seguinte relê só os dias alterados
+    client.get('/api/analytics/eficiencia?dimensao=equipe', headers=headers)
+
+    client.put(f'/api/triagem/{planejamento_id}', headers=headers, json={'horario_saida_base': '07:00:00'})
+    client.put(f'/api/execucao/{planejamento_id}', headers=headers, json={'atendido': 5})
+    client.put(f'/api/supervisao/{planejamento_id}', headers=headers, json={'comentario_supervisor': 'ok'})
+    client.post(f'/api/relatorio/{planejamento_id}', headers=headers)
+    client.get(f'/api/planejamento/{planejamento_id}', headers=headers)
+
+    listagem = client.get('/api/planejamentos?limit=20', headers=headers).get_json()
+    client.get(f"/api/planejamentos?limit=20&cursor={listagem['next_cursor']}", headers=headers)
+    client.get(f'/api/planejamentos?data_inicio={hoje}&data_fim={hoje}', headers=headers)
+    client.get('/api/planejamentos?turno=M1', headers=headers)
+    client.get('/api/planejamentos?equipe=Man-IP', headers=headers)
+    client.get('/api/planejamentos?format=ndjson', headers=headers).get_data()
+
+    client.get('/api/relatorios', headers=headers)
+    client.get(f'/api/relatorios?data_inicio={hoje}&data_fim={hoje}', headers=headers)
+    client.get('/api/relatorios?equipe=Equipe', headers=headers)
+    client.get('/api/relatorios?include=relatorio', headers=headers)
+    client.get('/api/relatorios/1', headers=headers)
+
+    client.get('/api/dashboard', headers=headers)
+    client.get('/api/analytics/eficiencia?dimensao=regiao&janela=30', headers=headers)
+    client.get('/api/analytics/eficiencia/serie?dimensao=equipe&grupo=Equipe%20Auditoria', headers=headers)
+
+    cursor = client.get('/api/sync', headers=headers).get_json()['cursor']
+    client.get(f'/api/sync?since={int(cursor) - 5}', headers=headers)
+    atual = client.get(f'/api/planejamento/{planejamento_id}', headers=headers).get_json()
+    client.get(f"/api/sync?since={atual['created_at']}", headers=headers)
+    client.post('/api/sync', headers=headers, json={'edicoes': [
+        {'id': planejamento_id, 'base': atual['updated_at'], 'campos': {'comentario_execucao': 'offline'}}
+    ]})
+
+    client.get('/api/search?q=offline', headers=headers)
+    client.get('/api/search?q=ok&origem=diario_planejamento&equipe=Equipe%20Auditoria', headers=headers)
+    client.get('/api/eventos?espera=0', headers=headers)
+    client.post('/api/export', headers=headers, json={})
+    client.post('/api/export', headers=headers, json={'tabelas': ['diario_planejamento']})
+    client.get('/api/export', headers=headers)
+
+    client.delete(f'/api/planejamento/{planejamento_id}', headers=headers)
+
+
+def auditar():
+    """Executa EXPLAIN QUERY PLAN para cada SELECT emitido pelas rotas auditadas"""
+    with tempfile.TemporaryDirectory() as tmp:
+        app = criar_app(os.path.join(tmp, 'audit.db'))
+        # A exportação grava as partes na pasta temporária, não em src/database/exportacao
+        export_bi.EXPORT_DIR = os.path.join(tmp, 'exportacao')
+
+        with app.app_context():
+            db.create_all()
+            ensure_indexes(db)
+            ensure_search_index(db.engine, ORIGENS)
+            popular_banco()
+
+            consultas = {}
+
+            def capturar(conn, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().upper().startswith('SELECT'):
+                    rota = f'{request.method} {request.url_rule}' if has_request_context() and request.url_rule else None
+                    consultas.setdefault(statement, (parameters, rota))
+
+            event.listen(db.engine, 'before_cursor_execute', capturar)
+            token = create_access_token(identity='audit')
+            exercitar_rotas(app.test_client(), {'Authorization': f'Bearer {token}'})
+            event.remove(db.engine, 'before_cursor_execute', capturar)
+
+            violacoes = []
+            with db.engine.connect() as conn:
+                for statement, (parameters, rota) in consultas.items():
+                    plano = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+                    detalhes = [linha[-1] for linha in plano]
+                    alvos = {d: SCAN.match(d).group(1) for d in detalhes if SCAN.match(d)}
+                    scans = [d for d, alvo in alvos.items() if (rota, alvo) not in SCANS_PERMITIDOS]
+
+                    print('✅' if not scans else '❌', rota or '-', ' '.join(statement.split())[:160])
+                    for detalhe in detalhes:
+                        motivo = SCANS_PERMITIDOS.get((rota, alvos.get(detalhe)))
+                        print(f"     {detalhe}" + (f"  (permitido: {motivo})" if motivo else ''))
+                    if scans:
+                        violacoes.append((statement, scans))
+
+        print(f"\n{len(consultas)} consultas auditadas, {len(violacoes)} com leitura completa de tabela")
+        return violacoes
+
+
+if __name__ == '__main__':
+    sys.exit(1 if auditar() else 0)
@@ -0,0 +1,56 @@
+import os
+from sqlalchemy import event
+
+# PRAGMAs aplicados em cada conexão SQLite nova (vazio desativa o PRAGMA)
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'busy_timeout': os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+}
+
+
+def database_uri(default_uri):
+    """URI do banco: DATABASE_URL quando definida, senão o SQLite local"""
+    uri = os.environ.get('DATABASE_URL', default_uri)
+    # Provedores que ainda exportam o esquema antigo do PostgreSQL
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(uri):
+    """Opções do create_engine para SQLALCHEMY_ENGINE_OPTIONS.
+
+    Bancos servidor (PostgreSQL, MySQL...) recebem pool dimensionado por
+    variáveis de ambiente; o SQLite usa o pool padrão do SQLAlchemy e é
+    ajustado por PRAGMAs em apply_sqlite_pragmas.
+    """
+    if uri.startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') != '0',
+    }
+
+
+def apply_sqlite_pragmas(engine, pragmas=None):
+    """Registra os PRAGMAs a serem executados em cada conexão SQLite aberta.
+
+    WAL permite leituras simultâneas a uma escrita, busy_timeout faz o
+    escritor esperar o lock em vez de falhar com "database is locked" e
+    synchronous=NORMAL (seguro com WAL) evita um fsync por commit.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nome, valor in pragmas.items():
+            if valor:
+                cursor.execute(f'PRAGMA {nome}={valor}')
+        cursor.close()
@@ -0,0 +1,289 @@
+import os
+import sys
+import json
+import zipfile
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.diario import DiarioPlanejamento, SyncAlteracao
+from src.models.diario_completo import (
+    DiarioPlanejamentoExecucao, ProtocoloExecucao, DiarioAcompanhamento, ReportFalhasOperacionais
+)
+from src.database.config import database_uri, engine_options, apply_sqlite_pragmas
+from src.utils.serialization import dumps
+from sqlalchemy import create_engine, inspect, select, tuple_
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional; sem ele as partes são gravadas no formato .colz
+    pyarrow = pq = None
+
+# Pasta da exportação: <EXPORT_DIR>/<tabela>/mes=<AAAA-MM>/parte-<carimbo>-<n>.parquet|.colz
+EXPORT_DIR = os.environ.get('EXPORT_DIR', os.path.join(os.path.dirname(__file__), 'exportacao'))
+WATERMARKS = '_watermarks.json'
+
+# Linhas lidas por consulta (cada lote vira no máximo uma parte por mês)
+LOTE = int(os.environ.get('EXPORT_BATCH_ROWS', 5000))
+
+# Alterações mais recentes que isso ficam para a próxima exportação: uma transação
+# ainda aberta pode gravar um updated_at anterior ao último já exportado
+ATRASO = timedelta(seconds=int(os.environ.get('EXPORT_LAG_SECONDS', 60)))
+
+# Tabelas exportadas e a coluna de data usada na partição mensal
+TABELAS = {
+    'diario_planejamento': (DiarioPlanejamento.__table__, 'data'),
+    'protocolo_execucao': (ProtocoloExecucao.__table__, 'data'),
+    'diario_acompanhamento': (DiarioAcompanhamento.__table__, 'data'),
+    'report_falhas_operacionais': (ReportFalhasOperacionais.__table__, 'data_ocorrencia'),
+}
+
+# Tabelas com remoções exportadas como tombstones (de sync_alteracao.removido), em
+# <tabela>/remocoes/. As demais não registram remoções: só saem numa exportação completa
+REMOCOES = {'diario_planejamento': SyncAlteracao.__table__}
+
+_lock = threading.Lock()
+
+
+def _fonte(nome):
+    """Consulta base, colunas da watermark (alteração, id) e tabelas necessárias no banco"""
+    tabela, _ = TABELAS[nome]
+    if nome == 'protocolo_execucao':
+        # Protocolos não têm data nem updated_at: vêm do diário, e são exportados
+        # de novo sempre que o diário muda. Editar só o protocolo não altera o
+        # diário e não é exportado; para reenviar tudo, apague a watermark
+        # protocolo_execucao de _watermarks.json
+        diario = DiarioPlanejamentoExecucao.__table__
+        consulta = select(tabela, diario.c.data.label('data'), diario.c.updated_at.label('updated_at')) \
+            .select_from(tabela.join(diario, tabela.c.diario_id == diario.c.id))
+        return consulta, diario.c.updated_at, tabela.c.id, (tabela.name, diario.name)
+    return select(tabela), tabela.c.updated_at, tabela.c.id, (tabela.name,)
+
+
+def ler_watermarks(pasta=None):
+    """{tabela: {'updated_at', 'id', 'linhas', 'exportado_em'}} da última exportação"""
+    try:
+        with open(os.path.join(pasta or EXPORT_DIR, WATERMARKS), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {}
+
+
+def _salvar_watermarks(pasta, marcas):
+    caminho = os.path.join(pasta, WATERMARKS)
+    with open(caminho + '.tmp', 'wb') as arquivo:
+        arquivo.write(dumps(marcas))
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(caminho + '.tmp', caminho)
+
+
+def _gravar_parte(caminho, nome, colunas, tipos, valores):
+    """Grava as colunas de um lote; o nome final só aparece com o arquivo completo"""
+    temporario = caminho + '.tmp'
+    if pq is not None:
+        pq.write_table(pyarrow.table(valores), temporario, compression='zstd')
+    else:
+        # Formato .colz: zip com o esquema e um array JSON por coluna, comprimido
+        # separadamente (valores parecidos ficam juntos e comprimem melhor)
+        with zipfile.ZipFile(temporario, 'w', zipfile.ZIP_DEFLATED) as arquivo:
+            arquivo.writestr('_schema.json', dumps({
+                'tabela': nome,
+                'linhas': len(valores[colunas[0]]),
+                'colunas': [{'nome': coluna, 'tipo': tipos[coluna]} for coluna in colunas],
+            }))
+            for coluna in colunas:
+                arquivo.writestr(f'{coluna}.json', dumps(valores[coluna]))
+    os.replace(temporario, caminho)
+
+
+def ler_parte(caminho):
+    """Colunas de uma parte exportada: {coluna: [valores]}"""
+    if caminho.endswith('.parquet'):
+        if pq is None:
+            raise RuntimeError('pyarrow é necessário para ler arquivos .parquet')
+        return pq.read_table(caminho).to_pydict()
+    with zipfile.ZipFile(caminho) as arquivo:
+        esquema = json.loads(arquivo.read('_schema.json'))
+        return {coluna['nome']: json.loads(arquivo.read(f"{coluna['nome']}.json")) for coluna in esquema['colunas']}
+
+
+def exportar_tabela(engine, nome, pasta, marcas, agora):
+    """Exporta em lotes as linhas alteradas desde a watermark da tabela.
+
+    A watermark (updated_at, id) avança e é gravada a cada lote, depois das
+    partes; uma falha no meio só pode repetir linhas na próxima exportação.
+    Linhas alteradas de novo reaparecem em partes posteriores: vale a versão
+    da parte mais recente para cada id.
+    """
+    consulta, alterado, chave, _ = _fonte(nome)
+    _, particao = TABELAS[nome]
+    extensao = 'parquet' if pq is not None else 'colz'
+    carimbo = agora.strftime('%Y%m%dT%H%M%S%f')
+    consulta = consulta.where(alterado <= agora - ATRASO).order_by(alterado, chave).limit(LOTE)
+    tipos = {coluna.name: str(coluna.type) for coluna in consulta.selected_columns}
+    colunas = list(tipos)
+
+    marca = marcas.get(nome)
+    anteriores = (marca or {}).get('linhas', 0)
+    total = partes = 0
+    while True:
+        lote = consulta
+        if marca:
+            lote = lote.where(tuple_(alterado, chave) > tuple_(datetime.fromisoformat(marca['updated_at']), marca['id']))
+        with engine.connect() as conn:
+            linhas = conn.execute(lote).all()
+        if not linhas:
+            break
+
+        por_mes = {}
+        indice_particao = colunas.index(particao)
+        for linha in linhas:
+            por_mes.setdefault(linha[indice_particao].strftime('%Y-%m'), []).append(linha)
+        for mes, grupo in por_mes.items():
+            diretorio = os.path.join(pasta, nome, f'mes={mes}')
+            os.makedirs(diretorio, exist_ok=True)
+            # Transpõe o lote: uma lista de valores por coluna
+            valores = dict(zip(colunas, (list(coluna) for coluna in zip(*grupo))))
+            _gravar_parte(os.path.join(diretorio, f'parte-{carimbo}-{partes:04d}.{extensao}'), nome, colunas, tipos, valores)
+            partes += 1
+
+        ultima = linhas[-1]._mapping
+        total += len(linhas)
+        marca = {
+            'updated_at': ultima['updated_at'].isoformat(),
+            'id': ultima['id'],
+            'linhas': anteriores + total,
+            'exportado_em': agora.isoformat(),
+        }
+        marcas[nome] = marca
+        _salvar_watermarks(pasta, marcas)
+    return total
+
+
+def exportar_remocoes(engine, nome, pasta, marcas, agora):
+    """Exporta as remoções da tabela (id, removido_em) desde a watermark de remoções.
+
+    Tombstones saem de sync_alteracao, que a retenção expurga: a exportação
+    precisa rodar com frequência maior que RETENTION_SYNC_DAYS. Quem aplica
+    as partes fica, para cada id, com o evento mais recente entre updated_at
+    da linha exportada e removido_em da remoção.
+    """
+    alteracoes = REMOCOES[nome]
+    chave = f'{nome}/remocoes'
+    extensao = 'parquet' if pq is not None else 'colz'
+    carimbo = agora.strftime('%Y%m%dT%H%M%S%f')
+    consulta = select(alteracoes.c.id, alteracoes.c.registro_id.label('id'), alteracoes.c.alterado_em.label('removido_em')) \
+        .where(alteracoes.c.removido.is_(True), alteracoes.c.alterado_em <= agora - ATRASO) \
+        .order_by(alteracoes.c.id).limit(LOTE)
+    colunas = ['id', 'removido_em']
+    tipos = {'id': 'INTEGER', 'removido_em': 'DATETIME'}
+    diretorio = os.path.join(pasta, nome, 'remocoes')
+
+    marca = marcas.get(chave)
+    anteriores = (marca or {}).get('linhas', 0)
+    total = partes = 0
+    while True:
+        # Sempre pela faixa de id (mesmo sem watermark), para ler sync_alteracao pela chave primária
+        lote = consulta.where(alteracoes.c.id > (marca or {}).get('alteracao_id', 0))
+        with engine.connect() as conn:
+            linhas = conn.execute(lote).all()
+        if not linhas:
+            break
+
+        os.makedirs(diretorio, exist_ok=True)
+        valores = {'id': [linha[1] for linha in linhas], 'removido_em': [linha[2] for linha in linhas]}
+        _gravar_parte(os.path.join(diretorio, f'parte-{carimbo}-{partes:04d}.{extensao}'), chave, colunas, tipos, valores)
+        partes += 1
+
+        total += len(linhas)
+        marca = {
+            'alteracao_id': linhas[-1][0],
+            'linhas': anteriores + total,
+            'exportado_em': agora.isoformat(),
+        }
+        marcas[chave] = marca
+        _salvar_watermarks(pasta, marcas)
+    return total
+
+
+def exportar(engines, tabelas=None, pasta=None):
+    """Exportação incremental; cada tabela sai do primeiro banco que a contém.
+
+    Retorna {tabela: linhas exportadas}, com None para tabelas que não estão
+    em nenhum dos bancos informados, e {tabela/remocoes: tombstones} para as
+    tabelas de REMOCOES.
+    """
+    pasta = pasta or EXPORT_DIR
+    with _lock:
+        os.makedirs(pasta, exist_ok=True)
+        marcas = ler_watermarks(pasta)
+        agora = datetime.utcnow()
+        existentes = [(engine, set(inspect(engine).get_table_names())) for engine in engines]
+        exportadas = {}
+        for nome in tabelas or TABELAS:
+            _, _, _, necessarias = _fonte(nome)
+            engine = next((engine for engine, nomes in existentes if nomes.issuperset(necessarias)), None)
+            exportadas[nome] = None if engine is None else exportar_tabela(engine, nome, pasta, marcas, agora)
+            if engine is not None and nome in REMOCOES:
+                exportadas[f'{nome}/remocoes'] = exportar_remocoes(engine, nome, pasta, marcas, agora)
+        return exportadas
+
+
+def listar_partes(pasta=None, tabela=None):
+    """Partes exportadas (caminho relativo à pasta, tamanho, se são remoções), em ordem de gravação por tabela"""
+    pasta = pasta or EXPORT_DIR
+    partes = []
+    for nome in [tabela] if tabela else TABELAS:
+        raiz = os.path.join(pasta, nome)
+        for diretorio, _, arquivos in os.walk(raiz):
+            for arquivo in arquivos:
+                if arquivo.startswith('parte-') and not arquivo.endswith('.tmp'):
+                    caminho = os.path.join(diretorio, arquivo)
+                    partes.append({
+                        'tabela': nome,
+                        'caminho': os.path.relpath(caminho, pasta).replace(os.sep, '/'),
+                        'bytes': os.path.getsize(caminho),
+                        'remocoes': os.path.basename(diretorio) == 'remocoes',
+                    })
+    # O carimbo no nome ordena as partes pela exportação que as gerou
+    partes.sort(key=lambda parte: (parte['tabela'], os.path.basename(parte['caminho'])))
+    return partes
+
+
+def criar_engine(uri):
+    engine = create_engine(uri, **engine_options(uri))
+    apply_sqlite_pragmas(engine)
+    return engine
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exportação colunar incremental dos diários para BI')
+    parser.add_argument('--pasta', help='pasta da exportação (padrão: EXPORT_DIR ou src/database/exportacao)')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    exp = comandos.add_parser('exportar', help='exporta as linhas alteradas desde a última watermark')
+    exp.add_argument('--database', help='URI do banco (padrão: DATABASE_URL ou app.db)')
+    exp.add_argument('--database-completo', help='URI do banco completo (padrão: app_completo.db)')
+    exp.add_argument('--tabela', action='append', choices=sorted(TABELAS), help='restringe a exportação (repetível)')
+
+    ler = comandos.add_parser('ler', help='lista as linhas de uma parte em NDJSON')
+    ler.add_argument('arquivo')
+
+    args = parser.parse_args()
+    if args.comando == 'exportar':
+        pasta_banco = os.path.dirname(__file__)
+        engines = [
+            criar_engine(args.database or database_uri(f"sqlite:///{os.path.join(pasta_banco, 'app.db')}")),
+            criar_engine(args.database_completo or f"sqlite:///{os.path.join(pasta_banco, 'app_completo.db')}"),
+        ]
+        for tabela, linhas in exportar(engines, args.tabela, args.pasta).items():
+            print(f'{tabela}: ' + ('tabela não encontrada' if linhas is None else f'{linhas} linhas exportadas'))
+    else:
+        colunas = ler_parte(args.arquivo)
+        for linha in zip(*colunas.values()):
+            sys.stdout.write(dumps(dict(zip(colunas, linha))).decode() + '\n')
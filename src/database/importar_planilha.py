@@ -0,0 +1,432 @@
+import os
+import re
+import sys
+import csv
+import json
+import zipfile
+import argparse
+import posixpath
+import unicodedata
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, time, timedelta
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.diario_completo import (
+    User, DiarioPlanejamentoExecucao, ProtocoloExecucao, DiarioAcompanhamento, ControleCCO
+)
+from src.database.config import engine_options, apply_sqlite_pragmas
+from sqlalchemy import create_engine, insert, select, func, tuple_, Date, Time, Integer, Float, String
+
+# Linhas gravadas por transação (e por atualização do checkpoint)
+LOTE = int(os.environ.get('IMPORT_BATCH_ROWS', 1000))
+
+# Abas do formulário FR-CWB-GL-0001-00: tabela e colunas que identificam um registro já importado
+ABAS = {
+    'execucao': (DiarioPlanejamentoExecucao.__table__, ('data', 'turno', 'equipe')),
+    'protocolos': (ProtocoloExecucao.__table__, ('diario_id', 'numero_protocolo')),
+    'acompanhamento': (DiarioAcompanhamento.__table__, ('data', 'turno', 'supervisor')),
+    'cco': (ControleCCO.__table__, ('data_controle', 'turno', 'equipe')),
+}
+
+# Protocolos apontam para o diário pelo id ou pela chave data/turno/equipe da aba de execução
+CHAVE_DIARIO = ('data', 'turno', 'equipe')
+
+# Rótulos usuais da planilha que não batem com o nome da coluna mesmo normalizados
+APELIDOS = {
+    'protocolo': 'numero_protocolo',
+    'nprotocolo': 'numero_protocolo',
+    'noprotocolo': 'numero_protocolo',  # 'Nº Protocolo' ('º' normaliza para 'o')
+    'os': 'numero_os',
+    'nos': 'numero_os',
+    'noos': 'numero_os',
+    'responsavelcco': 'cco_responsavel',
+}
+
+# Colunas preenchidas pelo importador, nunca lidas da planilha
+AUTOMATICAS = {'id', 'created_by', 'created_at', 'updated_at'}
+
+# Datas do Excel são dias desde 30/12/1899 (sistema 1900); 2958465 é 31/12/9999
+EPOCA_EXCEL = date(1899, 12, 30)
+MAX_SERIAL_EXCEL = 2958465
+FORMATOS_DATA = ('%Y-%m-%d', '%d/%m/%Y', '%d/%m/%y', '%d-%m-%Y')
+# Datas só com dígitos (20261003, 03102026): oito dígitos nunca são um serial do Excel
+FORMATOS_DATA_COMPACTA = ('%Y%m%d', '%d%m%Y')
+# %H aceita hora com um ou dois dígitos ('8:00' e '08:00')
+FORMATOS_HORA = ('%H:%M', '%H:%M:%S', '%H:%M:%S.%f')
+_NUMERO = re.compile(r'\d+(\.\d+)?')
+
+_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PACOTE = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def _normalizar(texto):
+    """'Horário Saída Base' -> 'horariosaidabase' (sem acentos, espaços e pontuação)"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return re.sub(r'[^a-z0-9]', '', ''.join(c for c in texto if not unicodedata.combining(c)).lower())
+
+
+# Leitura das planilhas: geradores de (número da linha, [valores em texto ou None])
+
+def _ler_csv(caminho, encoding):
+    with open(caminho, newline='', encoding=encoding) as arquivo:
+        # Excel em português exporta CSV separado por ';'
+        cabecalho = arquivo.readline()
+        delimitador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+        arquivo.seek(0)
+        for numero, valores in enumerate(csv.reader(arquivo, delimiter=delimitador), 1):
+            yield numero, valores
+
+
+def _textos_compartilhados(pacote):
+    """Tabela de textos do XLSX (as células de texto guardam só o índice)"""
+    if 'xl/sharedStrings.xml' not in pacote.namelist():
+        return []
+    textos = []
+    with pacote.open('xl/sharedStrings.xml') as arquivo:
+        for _, elem in ET.iterparse(arquivo):
+            if elem.tag == _NS + 'si':
+                # Texto simples (<t>) ou formatado (<r><t>); a transcrição fonética (<rPh>) fica de fora
+                textos.append(''.join(t.text or '' for filho in elem if filho.tag in (_NS + 't', _NS + 'r')
+                                      for t in filho.iter(_NS + 't')))
+                elem.clear()
+    return textos
+
+
+def _membro_planilha(pacote, planilha):
+    """Caminho no zip da aba pelo nome (sem nome, a primeira)"""
+    abas = ET.fromstring(pacote.read('xl/workbook.xml')).find(_NS + 'sheets')
+    relacoes = {rel.get('Id'): rel.get('Target')
+                for rel in ET.fromstring(pacote.read('xl/_rels/workbook.xml.rels')).iter(_NS_PACOTE + 'Relationship')}
+    nomes = [aba.get('name') for aba in abas]
+    if planilha is not None and planilha not in nomes:
+        raise ValueError(f"Aba '{planilha}' não encontrada (abas: {', '.join(nomes)})")
+    aba = abas[nomes.index(planilha) if planilha is not None else 0]
+    alvo = relacoes[aba.get(_NS_REL + 'id')]
+    return alvo.lstrip('/') if alvo.startswith('/') else posixpath.normpath(posixpath.join('xl', alvo))
+
+
+def _indice_coluna(referencia):
+    """'AB12' -> 27"""
+    indice = 0
+    for letra in referencia:
+        if not letra.isalpha():
+            break
+        indice = indice * 26 + ord(letra.upper()) - 64
+    return indice - 1
+
+
+def _valor_celula(celula, textos):
+    tipo = celula.get('t')
+    if tipo == 'inlineStr':
+        return ''.join(t.text or '' for t in celula.iter(_NS + 't'))
+    valor = celula.find(_NS + 'v')
+    if valor is None or valor.text is None:
+        return None
+    if tipo == 's':
+        return textos[int(valor.text)]
+    return valor.text
+
+
+def _ler_xlsx(caminho, planilha):
+    with zipfile.ZipFile(caminho) as pacote:
+        textos = _textos_compartilhados(pacote)
+        with pacote.open(_membro_planilha(pacote, planilha)) as arquivo:
+            dados = None
+            numero = 0
+            for evento, elem in ET.iterparse(arquivo, events=('start', 'end')):
+                if evento == 'start':
+                    if elem.tag == _NS + 'sheetData':
+                        dados = elem
+                    continue
+                if elem.tag != _NS + 'row':
+                    continue
+                numero = int(elem.get('r') or numero + 1)
+                valores = []
+                for celula in elem.iter(_NS + 'c'):
+                    if celula.get('r'):
+                        valores.extend([None] * (_indice_coluna(celula.get('r')) - len(valores)))
+                    valores.append(_valor_celula(celula, textos))
+                yield numero, valores
+                # Descarta as linhas já lidas: a memória não cresce com o tamanho da aba
+                dados.clear()
+
+
+def ler_planilha(caminho, planilha=None, encoding='utf-8-sig'):
+    """Linhas de um .csv ou .xlsx, uma por vez"""
+    if caminho.lower().endswith(('.xlsx', '.xlsm')):
+        return _ler_xlsx(caminho, planilha)
+    return _ler_csv(caminho, encoding)
+
+
+# Conversão dos valores para os tipos das colunas
+
+def _converter(valor, coluna):
+    texto = valor.strip() if isinstance(valor, str) else valor
+    if texto is None or texto == '':
+        return None
+    tipo = coluna.type
+    if isinstance(tipo, Date):
+        if len(texto) == 8 and texto.isdigit():
+            formatos = FORMATOS_DATA_COMPACTA
+        elif _NUMERO.fullmatch(texto):
+            if float(texto) > MAX_SERIAL_EXCEL:
+                raise ValueError(f'data inválida: {texto}')
+            return EPOCA_EXCEL + timedelta(days=int(float(texto)))
+        else:
+            formatos = FORMATOS_DATA
+        for formato in formatos:
+            try:
+                return datetime.strptime(texto[:10], formato).date()
+            except ValueError:
+                pass
+        raise ValueError(f'data inválida: {texto}')
+    if isinstance(tipo, Time):
+        if _NUMERO.fullmatch(texto):
+            # Horário do Excel é a fração do dia
+            segundos = round(float(texto) % 1 * 86400) % 86400
+            return time(segundos // 3600, segundos // 60 % 60, segundos % 60)
+        # Aceita também data e hora ('2024-01-31 08:00:00'): vale só o horário
+        horario = texto.replace('T', ' ').split(' ')[-1]
+        for formato in FORMATOS_HORA:
+            try:
+                return datetime.strptime(horario, formato).time()
+            except ValueError:
+                pass
+        raise ValueError(f'horário inválido: {texto}')
+    if isinstance(tipo, (Integer, Float)):
+        # Aceita vírgula decimal e ponto de milhar (1.234,5)
+        numero = texto.replace('.', '').replace(',', '.') if ',' in texto else texto
+        try:
+            numero = float(numero)
+        except ValueError:
+            raise ValueError(f'número inválido: {texto}')
+        if isinstance(tipo, Integer):
+            if not numero.is_integer():
+                raise ValueError(f'esperado número inteiro: {texto}')
+            return int(numero)
+        return numero
+    if isinstance(tipo, String) and tipo.length and len(texto) > tipo.length:
+        raise ValueError(f'mais de {tipo.length} caracteres')
+    return texto
+
+
+def _obrigatoria(coluna):
+    return not coluna.nullable and coluna.default is None and coluna.name not in AUTOMATICAS
+
+
+def mapear_colunas(cabecalho, aba, mapeamento=None):
+    """{índice na planilha: coluna} pelo cabeçalho; retorna também os cabeçalhos ignorados"""
+    tabela, _ = ABAS[aba]
+    colunas = {coluna.name: coluna for coluna in tabela.columns if coluna.name not in AUTOMATICAS}
+    if aba == 'protocolos':
+        colunas.update({nome: DiarioPlanejamentoExecucao.__table__.c[nome] for nome in CHAVE_DIARIO})
+    por_nome = {_normalizar(nome): nome for nome in colunas}
+    por_nome.update({apelido: nome for apelido, nome in APELIDOS.items() if nome in colunas})
+    por_nome.update({_normalizar(cabecalho): nome for cabecalho, nome in (mapeamento or {}).items()})
+
+    indices, ignorados = {}, []
+    for indice, titulo in enumerate(cabecalho):
+        nome = por_nome.get(_normalizar(titulo))
+        if nome is None or nome in indices.values():
+            if titulo and titulo.strip():
+                ignorados.append(titulo)
+            continue
+        indices[indice] = nome
+
+    faltando = [nome for nome, coluna in colunas.items() if _obrigatoria(coluna) and nome not in indices.values()
+                and nome != 'diario_id']
+    if aba == 'protocolos' and 'diario_id' not in indices.values():
+        faltando += [nome for nome in CHAVE_DIARIO if nome not in indices.values()]
+    if faltando:
+        raise ValueError(f'Colunas obrigatórias ausentes no cabeçalho: {", ".join(faltando)}')
+    return {indice: colunas[nome] for indice, nome in indices.items()}, ignorados
+
+
+def _resolver_diarios(conn, registros, erros):
+    """Preenche diario_id dos protocolos pela chave data/turno/equipe (uma consulta por lote)"""
+    diario = DiarioPlanejamentoExecucao.__table__
+    chaves = {tuple(registro[nome] for nome in CHAVE_DIARIO)
+              for _, registro in registros if registro.get('diario_id') is None}
+    ids = {}
+    if chaves:
+        ids = {tuple(linha[1:]): linha[0] for linha in conn.execute(
+            select(func.min(diario.c.id), *[diario.c[nome] for nome in CHAVE_DIARIO])
+            .where(tuple_(*[diario.c[nome] for nome in CHAVE_DIARIO]).in_(list(chaves)))
+            .group_by(*[diario.c[nome] for nome in CHAVE_DIARIO])
+        )}
+    resolvidos = []
+    for numero, registro in registros:
+        chave = tuple(registro.pop(nome, None) for nome in CHAVE_DIARIO)
+        if registro.get('diario_id') is None:
+            registro['diario_id'] = ids.get(chave)
+            if registro['diario_id'] is None:
+                erros.append((numero, 'diario_id', f'diário não encontrado para {"/".join(map(str, chave))}'))
+                continue
+        resolvidos.append((numero, registro))
+    return resolvidos
+
+
+def _descartar_existentes(conn, aba, registros, erros):
+    """Tira do lote os registros cuja chave já está no banco ou repete no próprio lote"""
+    tabela, chave = ABAS[aba]
+    colunas = [tabela.c[nome] for nome in chave]
+    chaves = {tuple(registro[nome] for nome in chave) for _, registro in registros}
+    existentes = set()
+    if chaves:
+        existentes = {tuple(linha) for linha in conn.execute(select(*colunas).where(tuple_(*colunas).in_(list(chaves))))}
+    novos = []
+    for numero, registro in registros:
+        valor = tuple(registro[nome] for nome in chave)
+        if valor in existentes:
+            erros.append((numero, ', '.join(chave), 'registro já importado'))
+            continue
+        existentes.add(valor)
+        novos.append((numero, registro))
+    return novos
+
+
+def _importar_lote(engine, aba, colunas, linhas, created_by):
+    """Converte, valida e grava um lote em uma transação; retorna (gravadas, erros)"""
+    tabela, _ = ABAS[aba]
+    # Nos protocolos, a falta do diário é apontada na resolução pela chave
+    opcionais = ('diario_id', *CHAVE_DIARIO) if aba == 'protocolos' else ()
+    obrigatorias = [coluna.name for coluna in colunas.values() if _obrigatoria(coluna) and coluna.name not in opcionais]
+    registros, erros = [], []
+    for numero, valores in linhas:
+        registro, falhas = {}, []
+        for indice, coluna in colunas.items():
+            try:
+                registro[coluna.name] = _converter(valores[indice] if indice < len(valores) else None, coluna)
+            except (ValueError, OverflowError) as e:
+                falhas.append((numero, coluna.name, str(e)))
+        falhas += [(numero, nome, 'valor obrigatório') for nome in obrigatorias
+                   if nome in registro and registro[nome] is None]
+        if falhas:
+            erros += falhas
+            continue
+        if 'created_by' in tabela.c:
+            registro['created_by'] = created_by
+        registros.append((numero, registro))
+
+    with engine.begin() as conn:
+        if aba == 'protocolos':
+            registros = _resolver_diarios(conn, registros, erros)
+        registros = _descartar_existentes(conn, aba, registros, erros)
+        if registros:
+            conn.execute(insert(tabela), [registro for _, registro in registros])
+    return len(registros), sorted(erros)
+
+
+def _salvar_checkpoint(caminho, estado):
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as arquivo:
+        json.dump(estado, arquivo)
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(caminho + '.tmp', caminho)
+
+
+def importar(engine, caminho, aba, planilha=None, created_by=None, lote=LOTE, mapeamento=None,
+             reiniciar=False, encoding='utf-8-sig'):
+    """Importa uma planilha em lotes, retomando do último lote gravado.
+
+    O checkpoint (<arquivo>.checkpoint.json) guarda a última linha de cada lote
+    confirmado; se o processo cair, a próxima execução continua dali. As linhas
+    recusadas vão para <arquivo>.erros.csv (linha, campo, erro). Registros com
+    chave já existente no banco são recusados, o que também cobre um lote
+    gravado pouco antes de uma queda, sem checkpoint.
+    """
+    checkpoint, relatorio = caminho + '.checkpoint.json', caminho + '.erros.csv'
+    assinatura = {'aba': aba, 'planilha': planilha, 'bytes': os.path.getsize(caminho),
+                  'modificado_em': os.path.getmtime(caminho)}
+    if reiniciar:
+        for arquivo in (checkpoint, relatorio):
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+
+    estado = {**assinatura, 'linha': 0, 'importadas': 0, 'erros': 0}
+    if os.path.exists(checkpoint):
+        with open(checkpoint, encoding='utf-8') as arquivo:
+            salvo = json.load(arquivo)
+        if any(salvo.get(campo) != valor for campo, valor in assinatura.items()):
+            raise ValueError('O checkpoint é de outra versão do arquivo ou de outra aba; use --reiniciar')
+        estado = salvo
+
+    linhas = ler_planilha(caminho, planilha, encoding)
+    _, cabecalho = next(linhas, (0, []))
+    colunas, ignorados = mapear_colunas(cabecalho, aba, mapeamento)
+
+    def gravar(pendentes):
+        gravadas, erros = _importar_lote(engine, aba, colunas, pendentes, created_by)
+        if erros:
+            with open(relatorio, 'a', newline='', encoding='utf-8') as arquivo:
+                escritor = csv.writer(arquivo)
+                if arquivo.tell() == 0:
+                    escritor.writerow(['linha', 'campo', 'erro'])
+                escritor.writerows(erros)
+        estado['linha'] = pendentes[-1][0]
+        estado['importadas'] += gravadas
+        estado['erros'] += len({numero for numero, _, _ in erros})
+        _salvar_checkpoint(checkpoint, estado)
+
+    pendentes = []
+    for numero, valores in linhas:
+        if numero <= estado['linha'] or not any(valor and str(valor).strip() for valor in valores):
+            continue
+        pendentes.append((numero, valores))
+        if len(pendentes) >= lote:
+            gravar(pendentes)
+            pendentes = []
+    if pendentes:
+        gravar(pendentes)
+    return {**estado, 'ignorados': ignorados, 'relatorio': relatorio if estado['erros'] else None}
+
+
+def criar_engine(uri):
+    engine = create_engine(uri, **engine_options(uri))
+    apply_sqlite_pragmas(engine)
+    return engine
+
+
+def _usuario(engine, username):
+    with engine.connect() as conn:
+        usuario_id = conn.execute(select(User.__table__.c.id).where(User.__table__.c.username == username)).scalar()
+    if usuario_id is None:
+        raise ValueError(f"Usuário '{username}' não encontrado")
+    return usuario_id
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importa planilhas CSV/XLSX do formulário FR-CWB-GL-0001-00')
+    parser.add_argument('arquivo', help='planilha .csv ou .xlsx')
+    parser.add_argument('aba', choices=sorted(ABAS), help='tipo de registro da planilha')
+    parser.add_argument('--database', help='URI do banco (padrão: app_completo.db)')
+    parser.add_argument('--planilha', help='nome da aba no .xlsx (padrão: a primeira)')
+    parser.add_argument('--usuario', default='admin', help='usuário gravado em created_by (padrão: admin)')
+    parser.add_argument('--lote', type=int, default=LOTE, help=f'linhas por transação (padrão: {LOTE})')
+    parser.add_argument('--coluna', action='append', default=[], metavar='CABECALHO=campo',
+                        help='mapeia um cabeçalho da planilha para uma coluna (repetível)')
+    parser.add_argument('--encoding', default='utf-8-sig', help='codificação do CSV (ex.: cp1252)')
+    parser.add_argument('--reiniciar', action='store_true', help='descarta o checkpoint e o relatório de erros')
+    args = parser.parse_args()
+
+    invalidas = [item for item in args.coluna if '=' not in item]
+    if invalidas:
+        parser.error(f"--coluna deve ter a forma CABECALHO=campo: {', '.join(invalidas)}")
+
+    engine = criar_engine(args.database or f"sqlite:///{os.path.join(os.path.dirname(__file__), 'app_completo.db')}")
+    try:
+        resultado = importar(
+            engine, args.arquivo, args.aba, args.planilha, _usuario(engine, args.usuario), args.lote,
+            dict(item.split('=', 1) for item in args.coluna), args.reiniciar, args.encoding
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if resultado['ignorados']:
+        print(f"⚠️  Colunas ignoradas: {', '.join(resultado['ignorados'])}")
+    print(f"✅ {resultado['importadas']} registros importados até a linha {resultado['linha']}")
+    if resultado['erros']:
+        print(f"❌ {resultado['erros']} linhas recusadas (ver {resultado['relatorio']})")
@@ -0,0 +1,19 @@
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+
+def ensure_indexes(db):
+    """Cria no banco os índices declarados nos modelos que ainda não existem.
+
+    O db.create_all() só cria índices junto com tabelas novas; bancos já
+    existentes recebem os índices por aqui. Retorna a lista de índices que
+    não puderam ser criados (ex.: duplicidades que violam um índice único).
+    """
+    falhas = []
+    for tabela in db.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            try:
+                indice.create(bind=db.engine, checkfirst=True)
+            except (IntegrityError, OperationalError) as e:
+                falhas.append(indice.name)
+                print(f"⚠️  Não foi possível criar o índice {indice.name}: {e.orig}")
+    return falhas
@@ -8,285 +8,507 @@ from src.models.diario_completo import (
     User, Profile, Team, DiarioPlanejamentoExecucao, ProtocoloExecucao,
     DiarioAcompanhamento, ReportFalhasOperacionais, ControleCCO, LogSistema, db
 )
+from src.database.config import SQLITE_PRAGMAS, apply_sqlite_pragmas
+from src.database.indexes import ensure_indexes
+from src.database.search import ensure_search_index, remover_triggers_busca
+from src.utils.hashing import hasher
 from flask import Flask
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import joinedload
+from werkzeug.security import generate_password_hash
+from time import perf_counter
+import argparse
 import json
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timedelta
+import random
+
+# Valores usados na geração de dados sintéticos (benchmarks e bancos de teste)
+TURNOS_SINTETICOS = ['M1', 'T2', 'N1', 'A']
+COLABORADORES = ['Carlos Silva', 'Ana Santos', 'João Pereira', 'Marina Costa', 'Rafael Souza',
+                 'Juliana Lima', 'Pedro Alves', 'Fernanda Rocha', 'Lucas Martins', 'Beatriz Gomes']
+REGIOES = ['Curitiba Centro', 'Batel', 'Água Verde', 'Portão', 'Boqueirão', 'Santa Felicidade', 'CIC', 'Cajuru']
+OBSERVACOES = ['Dia produtivo, boa colaboração da equipe', 'Chuva forte atrasou os atendimentos da tarde',
+               'Veículo apresentou falha no início do turno', 'Clientes ausentes em vários endereços',
+               'Rota reorganizada por bloqueio de via', None]
+DIFICULDADES = ['Trânsito intenso na região central', 'Falta de material no almoxarifado',
+                'Acesso bloqueado em condomínio', 'Poste sem condições de escalada', None]
+
+def nome_equipe(indice):
+    return f'Man-IP-{indice + 1:02d} | ENGIE'
+
+def gerar_turnos(dias, equipes, inicio=None, semente=42):
+    """Gera dias x turnos x equipes registros de turno realistas (dicts com valores de coluna)"""
+    aleatorio = random.Random(semente)
+    inicio = inicio or date.today() - timedelta(days=dias)
+    for d in range(dias):
+        data = inicio + timedelta(days=d)
+        for turno in TURNOS_SINTETICOS:
+            for e in range(equipes):
+                recebidos = aleatorio.randint(8, 30)
+                executados = aleatorio.randint(recebidos // 2, recebidos)
+                impossibilidade = aleatorio.randint(0, recebidos - executados)
+                saida = aleatorio.randint(6 * 60, 8 * 60)
+                yield {
+                    'data': data,
+                    'turno': turno,
+                    'equipe': nome_equipe(e),
+                    'colaborador1': aleatorio.choice(COLABORADORES),
+                    'colaborador2': aleatorio.choice(COLABORADORES),
+                    'veiculo': f'VAN-{e + 1:03d}',
+                    'regiao': aleatorio.choice(REGIOES),
+                    'horario_saida_base': time(saida // 60, saida % 60),
+                    'horario_primeiro_atendimento': time(saida // 60 + 1, saida % 60),
+                    'horario_inicio_intervalo': time(12, 0),
+                    'horario_fim_intervalo': time(13, 0),
+                    'horario_ultimo_atendimento': time(16, aleatorio.randint(0, 59)),
+                    'horario_chegada_base': time(17, aleatorio.randint(0, 59)),
+                    'protocolos_recebidos': recebidos,
+                    'protocolos_executados': executados,
+                    'protocolos_pendentes': recebidos - executados - impossibilidade,
+                    'protocolos_impossibilidade': impossibilidade,
+                    'observacoes_campo': aleatorio.choice(OBSERVACOES),
+                    'dificuldades_encontradas': aleatorio.choice(DIFICULDADES),
+                }
+
+PERFIS = [
+    {
+        'name': 'Funcionário Campo',
+        'description': 'Funcionário que executa serviços em campo',
+        'permissions': json.dumps(['criar_diario_execucao', 'editar_diario_execucao', 'visualizar_protocolos'])
+    },
+    {
+        'name': 'Supervisor',
+        'description': 'Supervisor de equipes operacionais',
+        'permissions': json.dumps(['criar_diario_acompanhamento', 'criar_report_falhas', 'aprovar_diarios', 'visualizar_todos_diarios'])
+    },
+    {
+        'name': 'CCO',
+        'description': 'Centro de Controle Operacional',
+        'permissions': json.dumps(['controle_cco', 'visualizar_dashboards', 'gerar_relatorios'])
+    },
+    {
+        'name': 'Administrador',
+        'description': 'Administrador do sistema',
+        'permissions': json.dumps(['admin_total', 'gerenciar_usuarios', 'configurar_sistema'])
+    }
+]
+
+EQUIPES = [
+    {'name': 'Man-IP-01 | ENGIE', 'description': 'Equipe de Manutenção IP 01'},
+    {'name': 'Man-IP-02 | ENGIE', 'description': 'Equipe de Manutenção IP 02'},
+    {'name': 'Man-IP-03 | ENGIE', 'description': 'Equipe de Manutenção IP 03'},
+    {'name': 'Man-IP-04 | ENGIE', 'description': 'Equipe de Manutenção IP 04'},
+    {'name': 'Man-IP-05 | ENGIE', 'description': 'Equipe de Manutenção IP 05'},
+    {'name': 'Equipe 18', 'description': 'Equipe Operacional 18'},
+    {'name': 'Equipe 19', 'description': 'Equipe Operacional 19'},
+    {'name': 'Equipe 20', 'description': 'Equipe Operacional 20'}
+]
+
+# Perfil e equipe são referenciados pelo nome
+USUARIOS = [
+    # Administrador
+    {'username': 'admin', 'email': 'admin@engie.com', 'password': 'admin123', 'perfil': 'Administrador'},
+    # Supervisores
+    {'username': 'debora.supervisor', 'email': 'debora@engie.com', 'password': 'super123', 'perfil': 'Supervisor'},
+    {'username': 'adriano.supervisor', 'email': 'adriano@engie.com', 'password': 'super123', 'perfil': 'Supervisor'},
+    {'username': 'joao.supervisor', 'email': 'joao.henrique@engie.com', 'password': 'super123', 'perfil': 'Supervisor'},
+    # Funcionários de campo
+    {'username': 'carlos.campo', 'email': 'carlos.campo@engie.com', 'password': 'campo123',
+     'perfil': 'Funcionário Campo', 'equipe': 'Man-IP-01 | ENGIE'},
+    {'username': 'maria.campo', 'email': 'maria.campo@engie.com', 'password': 'campo123',
+     'perfil': 'Funcionário Campo', 'equipe': 'Man-IP-02 | ENGIE'},
+    {'username': 'jose.campo', 'email': 'jose.campo@engie.com', 'password': 'campo123',
+     'perfil': 'Funcionário Campo', 'equipe': 'Equipe 18'},
+    # CCO
+    {'username': 'cco.operador', 'email': 'cco@engie.com', 'password': 'cco123', 'perfil': 'CCO'}
+]
+
+# Hash barato para bancos de teste/homologação no modo em massa. O hasher da
+# aplicação refaz o hash com o método de produção no primeiro login (needs_rehash)
+HASH_SEMENTE = os.environ.get('SEED_HASH_METHOD', 'pbkdf2:sha256:1000')
+
+SUPERVISORES = ['Débora Santos', 'Adriano Oliveira', 'João Henrique']
+TIPOS_SERVICO = ['Instalação', 'Manutenção', 'Reparo', 'Inspeção', 'Substituição de lâmpada']
+LOGRADOUROS = ['Rua das Flores', 'Av. Brasil', 'Rua XV de Novembro', 'Av. Sete de Setembro',
+               'Rua Marechal Deodoro', 'Av. República Argentina', 'Rua Chile', 'Rua Itupava']
+CLIENTES = ['João da Silva', 'Maria Oliveira', 'Condomínio Solar', 'Prefeitura Municipal',
+            'Escola Estadual Centro', 'Mercado Bom Preço', None]
+MOTIVOS_IMPOSSIBILIDADE = ['Cliente ausente', 'Endereço não localizado', 'Chuva forte',
+                           'Acesso negado pelo morador', 'Necessita caminhão cesto']
+# (tipo, categoria, descrição, causa raiz, impacto, ação imediata)
+FALHAS = [
+    ('Operacional', 'Equipamento', 'Atraso no início das atividades devido a problema no veículo',
+     'Falha na manutenção preventiva do veículo', 'Atraso de 30 minutos no cronograma', 'Substituição do veículo'),
+    ('Técnica', 'Equipamento', 'Escada danificada durante o atendimento',
+     'Desgaste natural sem inspeção periódica', 'Dois protocolos reagendados', 'Retirada da escada de uso'),
+    ('Comunicação', 'Processo', 'Protocolos enviados para a equipe errada',
+     'Erro na distribuição pelo CCO', 'Deslocamento desnecessário entre regiões', 'Redistribuição dos protocolos'),
+    ('Operacional', 'Pessoal', 'Equipe incompleta no início do turno',
+     'Falta não comunicada com antecedência', 'Redução da produtividade do turno', 'Remanejamento de colaborador'),
+    ('Operacional', 'Material', 'Falta de reatores no almoxarifado',
+     'Pedido de compra atrasado', 'Protocolos de substituição pendentes', 'Empréstimo de material de outra base'),
+]
+
+def _hash_senha(senha, metodo=None):
+    """Hash com o método informado ou, sem método, com o hasher da aplicação"""
+    if metodo:
+        return generate_password_hash(senha, metodo)
+    return hasher.hash(senha)
+
+def _faltantes(modelo, coluna, linhas):
+    """Linhas cuja chave ainda não existe no banco (uma única consulta IN)"""
+    campo = getattr(modelo, coluna)
+    existentes = set(db.session.scalars(select(campo).where(campo.in_([linha[coluna] for linha in linhas]))))
+    return [linha for linha in linhas if linha[coluna] not in existentes]
+
+def _ids(modelo, coluna, valores):
+    """{valor: id} para os valores informados"""
+    campo = getattr(modelo, coluna)
+    return dict(db.session.execute(select(campo, modelo.id).where(campo.in_(list(valores)))).all())
+
+def semear_cadastros(hash_metodo=None):
+    """Cria perfis, equipes e usuários que ainda não existem, em inserções únicas por tabela"""
+    print("1. Criando perfis de usuário...")
+    novos = _faltantes(Profile, 'name', PERFIS)
+    if novos:
+        db.session.execute(insert(Profile), novos)
+    for perfil in novos:
+        print(f"✅ Perfil '{perfil['name']}' criado!")
+
+    print("\n2. Criando equipes...")
+    novas = _faltantes(Team, 'name', EQUIPES)
+    if novas:
+        db.session.execute(insert(Team), novas)
+    for equipe in novas:
+        print(f"✅ Equipe '{equipe['name']}' criada!")
+
+    print("\n3. Criando usuários...")
+    novos = _faltantes(User, 'username', USUARIOS)
+    perfis = _ids(Profile, 'name', {usuario['perfil'] for usuario in novos})
+    equipes = _ids(Team, 'name', {usuario['equipe'] for usuario in novos if usuario.get('equipe')})
+    # Uma senha repetida é hasheada uma vez só
+    hashes = {}
+    linhas = []
+    for usuario in novos:
+        senha = usuario['password']
+        if senha not in hashes:
+            hashes[senha] = _hash_senha(senha, hash_metodo)
+        linhas.append({
+            'username': usuario['username'],
+            'email': usuario['email'],
+            'password_hash': hashes[senha],
+            'profile_id': perfis.get(usuario['perfil']),
+            'team_id': equipes.get(usuario.get('equipe')),
+        })
+    if linhas:
+        db.session.execute(insert(User), linhas)
+    for usuario in novos:
+        print(f"✅ Usuário '{usuario['username']}' criado!")
+
+    db.session.commit()
+
+def _protocolos(aleatorio, diario_id, turno):
+    """Protocolos de um turno coerentes com os totais do diário"""
+    recebidos = turno['protocolos_recebidos']
+    executados = turno['protocolos_executados']
+    impossibilidade = turno['protocolos_impossibilidade']
+    for n in range(recebidos):
+        linha = {
+            'diario_id': diario_id,
+            'numero_protocolo': f"PROT-{turno['data']:%Y%m%d}-{diario_id:06d}-{n + 1:02d}",
+            'numero_os': f'OS-{diario_id * 100 + n + 1}',
+            'tipo_servico': aleatorio.choice(TIPOS_SERVICO),
+            'endereco': f"{aleatorio.choice(LOGRADOUROS)}, {aleatorio.randint(1, 2500)} - {turno['regiao']}",
+            'cliente': aleatorio.choice(CLIENTES),
+            'status': 'pendente',
+            'horario_inicio': None,
+            'horario_fim': None,
+            'motivo_impossibilidade': None,
+        }
+        if n < executados:
+            inicio = 8 * 60 + n * 420 // recebidos
+            fim = inicio + aleatorio.randint(10, 45)
+            linha.update(status='executado', horario_inicio=time(inicio // 60, inicio % 60),
+                         horario_fim=time(fim // 60, fim % 60))
+        elif n < executados + impossibilidade:
+            linha.update(status='impossibilidade', motivo_impossibilidade=aleatorio.choice(MOTIVOS_IMPOSSIBILIDADE))
+        yield linha
+
+def semear_em_massa(dias, equipes, semente=42):
+    """Gera dias x equipes turnos com protocolos, acompanhamentos e reports de falha.
+
+    Turnos que já existem (mesma data, turno e equipe) são mantidos. Tudo é
+    gravado com inserções em lote numa única transação; os triggers da busca
+    textual são suspensos durante a carga e o índice é refeito de uma vez no fim.
+    """
+    aleatorio = random.Random(semente)
+    inicio = date.today() - timedelta(days=dias)
+    fim = inicio + timedelta(days=dias)
+
+    novas = _faltantes(Team, 'name', [
+        {'name': nome_equipe(e), 'description': f'Equipe de Manutenção IP {e + 1:02d}'} for e in range(equipes)
+    ])
+    if novas:
+        db.session.execute(insert(Team), novas)
+
+    # Autores dos registros: funcionários de campo e supervisores cadastrados
+    usuarios = _ids(User, 'username', [usuario['username'] for usuario in USUARIOS])
+    campo = [usuarios[u['username']] for u in USUARIOS if u['perfil'] == 'Funcionário Campo' and u['username'] in usuarios]
+    supervisores = [usuarios[u['username']] for u in USUARIOS if u['perfil'] == 'Supervisor' and u['username'] in usuarios]
+    if not campo or not supervisores:
+        raise RuntimeError('Usuários de campo e supervisores precisam existir antes da carga em massa')
+
+    existentes = {tuple(chave) for chave in db.session.execute(
+        select(DiarioPlanejamentoExecucao.data, DiarioPlanejamentoExecucao.turno, DiarioPlanejamentoExecucao.equipe)
+        .where(DiarioPlanejamentoExecucao.data >= inicio, DiarioPlanejamentoExecucao.data < fim)
+    )}
+    turnos = [turno for turno in gerar_turnos(dias, equipes, inicio, semente)
+              if (turno['data'], turno['turno'], turno['equipe']) not in existentes]
+    for turno in turnos:
+        turno.update(status='finalizado', materiais_utilizados='Cabos, conectores, ferramentas básicas',
+                     created_by=aleatorio.choice(campo))
+
+    remover_triggers_busca(db.session.connection(), ['diario_planejamento_execucao', 'diario_acompanhamento',
+                                                      'report_falhas_operacionais'])
+    ids = []
+    if turnos:
+        ids = db.session.execute(
+            insert(DiarioPlanejamentoExecucao).returning(DiarioPlanejamentoExecucao.id, sort_by_parameter_order=True),
+            turnos
+        ).scalars().all()
+
+    protocolos = [linha for diario_id, turno in zip(ids, turnos) for linha in _protocolos(aleatorio, diario_id, turno)]
+    if protocolos:
+        db.session.execute(insert(ProtocoloExecucao), protocolos)
+
+    # Um acompanhamento do supervisor por data e turno, com os totais das equipes
+    por_turno = {}
+    for diario_id, turno in zip(ids, turnos):
+        por_turno.setdefault((turno['data'], turno['turno']), []).append((diario_id, turno))
+    acompanhados = {tuple(chave) for chave in db.session.execute(
+        select(DiarioAcompanhamento.data, DiarioAcompanhamento.turno)
+        .where(DiarioAcompanhamento.data >= inicio, DiarioAcompanhamento.data < fim)
+    )}
+    acompanhamentos = []
+    for (data, sigla), grupo in por_turno.items():
+        if (data, sigla) in acompanhados:
+            continue
+        total = sum(turno['protocolos_recebidos'] for _, turno in grupo)
+        executados = sum(turno['protocolos_executados'] for _, turno in grupo)
+        eficiencia = round(executados / total * 100, 1) if total else 0.0
+        acompanhamentos.append({
+            'data': data,
+            'turno': sigla,
+            'supervisor': aleatorio.choice(SUPERVISORES),
+            'diario_execucao_id': grupo[0][0],
+            'analise_geral': 'Conforme' if eficiencia >= 75 else 'Não conforme',
+            'pontos_atencao': aleatorio.choice(DIFICULDADES),
+            'observacoes_supervisor': aleatorio.choice(OBSERVACOES),
+            'total_equipes_ativas': len(grupo),
+            'total_protocolos_dia': total,
+            'total_executados': executados,
+            'total_pendentes': sum(turno['protocolos_pendentes'] for _, turno in grupo),
+            'total_impossibilidades': sum(turno['protocolos_impossibilidade'] for _, turno in grupo),
+            'percentual_eficiencia': eficiencia,
+            'qualidade_execucao': 'Excelente' if eficiencia >= 90 else 'Boa' if eficiencia >= 75 else 'Regular',
+            'status': 'aprovado',
+            'created_by': aleatorio.choice(supervisores),
+        })
+    if acompanhamentos:
+        db.session.execute(insert(DiarioAcompanhamento), acompanhamentos)
+
+    # Falhas em cerca de 5% dos turnos
+    reports = []
+    for turno in turnos:
+        if aleatorio.random() >= 0.05:
+            continue
+        tipo, categoria, descricao, causa, impacto, acao = aleatorio.choice(FALHAS)
+        reports.append({
+            'data_ocorrencia': turno['data'],
+            'turno': turno['turno'],
+            'equipe_envolvida': turno['equipe'],
+            'responsavel_report': aleatorio.choice(SUPERVISORES),
+            'tipo_falha': tipo,
+            'severidade': aleatorio.choices(['Baixa', 'Média', 'Alta', 'Crítica'], [40, 35, 20, 5])[0],
+            'categoria': categoria,
+            'descricao_falha': descricao,
+            'causa_raiz': causa,
+            'impacto_operacional': impacto,
+            'acao_imediata': acao,
+            'prazo_conclusao': turno['data'] + timedelta(days=30),
+            'status': aleatorio.choice(['aberto', 'em_andamento', 'concluido']),
+            'created_by': aleatorio.choice(supervisores),
+        })
+    if reports:
+        db.session.execute(insert(ReportFalhasOperacionais), reports)
+
+    db.session.commit()
+    ensure_search_index(db.engine)
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+    return {'turnos': len(turnos), 'protocolos': len(protocolos),
+            'acompanhamentos': len(acompanhamentos), 'reports': len(reports)}
+
+def init_database_completo(caminho=None, massa=False, dias=30, equipes=5, hash_metodo=None):
+    """Inicializa o banco de dados com os modelos refinados baseados nas sheets do Excel.
+
+    Com `massa`, os dados de exemplo dão lugar a dias x equipes turnos sintéticos
+    e as senhas usam o hash barato HASH_SEMENTE (ou `hash_metodo`).
+    """
+    caminho = caminho or os.path.join(os.path.dirname(__file__), 'app_completo.db')
+    if massa:
+        hash_metodo = hash_metodo or HASH_SEMENTE
 
-def init_database_completo():
-    """Inicializa o banco de dados com os modelos refinados baseados nas sheets do Excel"""
-    
     # Configurar Flask app
     app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'app_completo.db')}"
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{caminho}"
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    
+
     # Inicializar banco
     db.init_app(app)
-    
+
     with app.app_context():
+        if massa:
+            # Banco descartável: sem fsync a cada commit durante a carga
+            apply_sqlite_pragmas(db.engine, {**SQLITE_PRAGMAS, 'synchronous': 'OFF'})
+
         # Criar todas as tabelas
         db.create_all()
+        ensure_indexes(db)
+        ensure_search_index(db.engine)
         
         print("=== INICIALIZAÇÃO DO BANCO DE DADOS COMPLETO ===")
         print("Baseado na análise das sheets do Excel FR-CWB-GL-0001-00")
         print()
         
-        # 1. Criar perfis
-        print("1. Criando perfis de usuário...")
-        profiles_data = [
-            {
-                'name': 'Funcionário Campo',
-                'description': 'Funcionário que executa serviços em campo',
-                'permissions': json.dumps(['criar_diario_execucao', 'editar_diario_execucao', 'visualizar_protocolos'])
-            },
-            {
-                'name': 'Supervisor',
-                'description': 'Supervisor de equipes operacionais',
-                'permissions': json.dumps(['criar_diario_acompanhamento', 'criar_report_falhas', 'aprovar_diarios', 'visualizar_todos_diarios'])
-            },
-            {
-                'name': 'CCO',
-                'description': 'Centro de Controle Operacional',
-                'permissions': json.dumps(['controle_cco', 'visualizar_dashboards', 'gerar_relatorios'])
-            },
-            {
-                'name': 'Administrador',
-                'description': 'Administrador do sistema',
-                'permissions': json.dumps(['admin_total', 'gerenciar_usuarios', 'configurar_sistema'])
-            }
-        ]
-        
-        for profile_data in profiles_data:
-            if not Profile.query.filter_by(name=profile_data['name']).first():
-                profile = Profile(**profile_data)
-                db.session.add(profile)
-                print(f"✅ Perfil '{profile_data['name']}' criado!")
-        
-        db.session.commit()
-        
-        # 2. Criar equipes
-        print("\n2. Criando equipes...")
-        teams_data = [
-            {'name': 'Man-IP-01 | ENGIE', 'description': 'Equipe de Manutenção IP 01'},
-            {'name': 'Man-IP-02 | ENGIE', 'description': 'Equipe de Manutenção IP 02'},
-            {'name': 'Man-IP-03 | ENGIE', 'description': 'Equipe de Manutenção IP 03'},
-            {'name': 'Man-IP-04 | ENGIE', 'description': 'Equipe de Manutenção IP 04'},
-            {'name': 'Man-IP-05 | ENGIE', 'description': 'Equipe de Manutenção IP 05'},
-            {'name': 'Equipe 18', 'description': 'Equipe Operacional 18'},
-            {'name': 'Equipe 19', 'description': 'Equipe Operacional 19'},
-            {'name': 'Equipe 20', 'description': 'Equipe Operacional 20'}
-        ]
-        
-        for team_data in teams_data:
-            if not Team.query.filter_by(name=team_data['name']).first():
-                team = Team(**team_data)
-                db.session.add(team)
-                print(f"✅ Equipe '{team_data['name']}' criada!")
-        
-        db.session.commit()
-        
-        # 3. Criar usuários
-        print("\n3. Criando usuários...")
+        # 1-3. Perfis, equipes e usuários
+        semear_cadastros(hash_metodo)
         
-        # Buscar perfis e equipes
-        admin_profile = Profile.query.filter_by(name='Administrador').first()
-        supervisor_profile = Profile.query.filter_by(name='Supervisor').first()
-        campo_profile = Profile.query.filter_by(name='Funcionário Campo').first()
-        cco_profile = Profile.query.filter_by(name='CCO').first()
+        # 4. Dados de exemplo ou carga em massa
+        if massa:
+            print(f"\n4. Gerando {dias} dias x {equipes} equipes de turnos sintéticos...")
+            inicio_carga = perf_counter()
+            totais = semear_em_massa(dias, equipes)
+            print(f"✅ {totais['turnos']} turnos, {totais['protocolos']} protocolos, "
+                  f"{totais['acompanhamentos']} acompanhamentos e {totais['reports']} reports "
+                  f"em {perf_counter() - inicio_carga:.1f}s")
+        else:
+            print("\n4. Criando dados de exemplo...")
         
-        equipe_01 = Team.query.filter_by(name='Man-IP-01 | ENGIE').first()
-        equipe_02 = Team.query.filter_by(name='Man-IP-02 | ENGIE').first()
-        equipe_18 = Team.query.filter_by(name='Equipe 18').first()
+            # Buscar usuários para exemplos
+            carlos = User.query.filter_by(username='carlos.campo').first()
+            debora = User.query.filter_by(username='debora.supervisor').first()
         
-        users_data = [
-            # Administrador
-            {
-                'username': 'admin',
-                'email': 'admin@engie.com',
-                'password': 'admin123',
-                'profile_id': admin_profile.id if admin_profile else None
-            },
-            # Supervisores
-            {
-                'username': 'debora.supervisor',
-                'email': 'debora@engie.com',
-                'password': 'super123',
-                'profile_id': supervisor_profile.id if supervisor_profile else None
-            },
-            {
-                'username': 'adriano.supervisor',
-                'email': 'adriano@engie.com',
-                'password': 'super123',
-                'profile_id': supervisor_profile.id if supervisor_profile else None
-            },
-            {
-                'username': 'joao.supervisor',
-                'email': 'joao.henrique@engie.com',
-                'password': 'super123',
-                'profile_id': supervisor_profile.id if supervisor_profile else None
-            },
-            # Funcionários de campo
-            {
-                'username': 'carlos.campo',
-                'email': 'carlos.campo@engie.com',
-                'password': 'campo123',
-                'profile_id': campo_profile.id if campo_profile else None,
-                'team_id': equipe_01.id if equipe_01 else None
-            },
-            {
-                'username': 'maria.campo',
-                'email': 'maria.campo@engie.com',
-                'password': 'campo123',
-                'profile_id': campo_profile.id if campo_profile else None,
-                'team_id': equipe_02.id if equipe_02 else None
-            },
-            {
-                'username': 'jose.campo',
-                'email': 'jose.campo@engie.com',
-                'password': 'campo123',
-                'profile_id': campo_profile.id if campo_profile else None,
-                'team_id': equipe_18.id if equipe_18 else None
-            },
-            # CCO
-            {
-                'username': 'cco.operador',
-                'email': 'cco@engie.com',
-                'password': 'cco123',
-                'profile_id': cco_profile.id if cco_profile else None
-            }
-        ]
-        
-        for user_data in users_data:
-            existing_user = User.query.filter_by(username=user_data['username']).first()
-            if not existing_user:
-                new_user = User(
-                    username=user_data['username'],
-                    email=user_data['email'],
-                    profile_id=user_data['profile_id'],
-                    team_id=user_data.get('team_id')
+            if carlos:
+                # Exemplo de Diário de Planejamento e Execução
+                diario_execucao = DiarioPlanejamentoExecucao(
+                    data=date.today(),
+                    turno='M1',
+                    equipe='Man-IP-01 | ENGIE',
+                    colaborador1='Carlos Silva',
+                    colaborador2='Ana Santos',
+                    veiculo='VAN-001',
+                    regiao='Curitiba Centro',
+                    horario_saida_base=time(7, 0),
+                    horario_primeiro_atendimento=time(8, 30),
+                    horario_inicio_intervalo=time(12, 0),
+                    horario_fim_intervalo=time(13, 0),
+                    horario_ultimo_atendimento=time(16, 30),
+                    horario_chegada_base=time(17, 30),
+                    protocolos_recebidos=15,
+                    protocolos_executados=12,
+                    protocolos_pendentes=2,
+                    protocolos_impossibilidade=1,
+                    observacoes_campo='Dia produtivo, boa colaboração da equipe',
+                    dificuldades_encontradas='Trânsito intenso na região central',
+                    materiais_utilizados='Cabos, conectores, ferramentas básicas',
+                    status='finalizado',
+                    created_by=carlos.id
                 )
-                new_user.set_password(user_data['password'])
-                db.session.add(new_user)
-                print(f"✅ Usuário '{user_data['username']}' criado!")
-        
-        db.session.commit()
-        
-        # 4. Criar dados de exemplo
-        print("\n4. Criando dados de exemplo...")
-        
-        # Buscar usuários para exemplos
-        carlos = User.query.filter_by(username='carlos.campo').first()
-        debora = User.query.filter_by(username='debora.supervisor').first()
-        
-        if carlos:
-            # Exemplo de Diário de Planejamento e Execução
-            diario_execucao = DiarioPlanejamentoExecucao(
-                data=date.today(),
-                turno='M1',
-                equipe='Man-IP-01 | ENGIE',
-                colaborador1='Carlos Silva',
-                colaborador2='Ana Santos',
-                veiculo='VAN-001',
-                regiao='Curitiba Centro',
-                horario_saida_base=time(7, 0),
-                horario_primeiro_atendimento=time(8, 30),
-                horario_inicio_intervalo=time(12, 0),
-                horario_fim_intervalo=time(13, 0),
-                horario_ultimo_atendimento=time(16, 30),
-                horario_chegada_base=time(17, 30),
-                protocolos_recebidos=15,
-                protocolos_executados=12,
-                protocolos_pendentes=2,
-                protocolos_impossibilidade=1,
-                observacoes_campo='Dia produtivo, boa colaboração da equipe',
-                dificuldades_encontradas='Trânsito intenso na região central',
-                materiais_utilizados='Cabos, conectores, ferramentas básicas',
-                status='finalizado',
-                created_by=carlos.id
-            )
-            db.session.add(diario_execucao)
-            db.session.commit()
+                db.session.add(diario_execucao)
+                db.session.commit()
             
-            # Protocolos de exemplo
-            protocolos_exemplo = [
-                {
-                    'numero_protocolo': 'PROT-2024-001',
-                    'numero_os': 'OS-12345',
-                    'tipo_servico': 'Instalação',
-                    'endereco': 'Rua das Flores, 123 - Centro',
-                    'cliente': 'João da Silva',
-                    'status': 'executado',
-                    'horario_inicio': time(8, 30),
-                    'horario_fim': time(9, 15),
-                    'observacoes': 'Instalação realizada com sucesso'
-                },
-                {
-                    'numero_protocolo': 'PROT-2024-002',
-                    'numero_os': 'OS-12346',
-                    'tipo_servico': 'Manutenção',
-                    'endereco': 'Av. Brasil, 456 - Batel',
-                    'cliente': 'Maria Oliveira',
-                    'status': 'impossibilidade',
-                    'motivo_impossibilidade': 'Cliente ausente'
-                }
-            ]
+                # Protocolos de exemplo
+                protocolos_exemplo = [
+                    {
+                        'numero_protocolo': 'PROT-2024-001',
+                        'numero_os': 'OS-12345',
+                        'tipo_servico': 'Instalação',
+                        'endereco': 'Rua das Flores, 123 - Centro',
+                        'cliente': 'João da Silva',
+                        'status': 'executado',
+                        'horario_inicio': time(8, 30),
+                        'horario_fim': time(9, 15),
+                        'observacoes': 'Instalação realizada com sucesso'
+                    },
+                    {
+                        'numero_protocolo': 'PROT-2024-002',
+                        'numero_os': 'OS-12346',
+                        'tipo_servico': 'Manutenção',
+                        'endereco': 'Av. Brasil, 456 - Batel',
+                        'cliente': 'Maria Oliveira',
+                        'status': 'impossibilidade',
+                        'motivo_impossibilidade': 'Cliente ausente'
+                    }
+                ]
             
-            for prot_data in protocolos_exemplo:
-                protocolo = ProtocoloExecucao(
-                    diario_id=diario_execucao.id,
-                    **prot_data
-                )
-                db.session.add(protocolo)
+                for prot_data in protocolos_exemplo:
+                    protocolo = ProtocoloExecucao(
+                        diario_id=diario_execucao.id,
+                        **prot_data
+                    )
+                    db.session.add(protocolo)
             
-            print("✅ Diário de execução de exemplo criado!")
+                print("✅ Diário de execução de exemplo criado!")
         
-        if debora and carlos:
-            # Exemplo de Diário de Acompanhamento
-            diario_acompanhamento = DiarioAcompanhamento(
-                data=date.today(),
-                turno='M1',
-                supervisor='Débora Santos',
-                diario_execucao_id=diario_execucao.id if 'diario_execucao' in locals() else None,
-                analise_geral='Conforme',
-                pontos_atencao='Atenção ao tempo de deslocamento',
-                observacoes_supervisor='Equipe demonstrou boa performance',
-                total_equipes_ativas=3,
-                total_protocolos_dia=45,
-                total_executados=38,
-                total_pendentes=5,
-                total_impossibilidades=2,
-                percentual_eficiencia=84.4,
-                qualidade_execucao='Boa',
-                status='aprovado',
-                created_by=debora.id
-            )
-            db.session.add(diario_acompanhamento)
+            if debora and carlos:
+                # Exemplo de Diário de Acompanhamento
+                diario_acompanhamento = DiarioAcompanhamento(
+                    data=date.today(),
+                    turno='M1',
+                    supervisor='Débora Santos',
+                    diario_execucao_id=diario_execucao.id if 'diario_execucao' in locals() else None,
+                    analise_geral='Conforme',
+                    pontos_atencao='Atenção ao tempo de deslocamento',
+                    observacoes_supervisor='Equipe demonstrou boa performance',
+                    total_equipes_ativas=3,
+                    total_protocolos_dia=45,
+                    total_executados=38,
+                    total_pendentes=5,
+                    total_impossibilidades=2,
+                    percentual_eficiencia=84.4,
+                    qualidade_execucao='Boa',
+                    status='aprovado',
+                    created_by=debora.id
+                )
+                db.session.add(diario_acompanhamento)
             
-            # Exemplo de Report de Falhas
-            report_falha = ReportFalhasOperacionais(
-                data_ocorrencia=date.today(),
-                turno='M1',
-                equipe_envolvida='Man-IP-01 | ENGIE',
-                responsavel_report='Débora Santos',
-                tipo_falha='Operacional',
-                severidade='Média',
-                categoria='Processo',
-                descricao_falha='Atraso no início das atividades devido a problema no veículo',
-                causa_raiz='Falha na manutenção preventiva do veículo',
-                impacto_operacional='Atraso de 30 minutos no cronograma',
-                acao_imediata='Substituição do veículo',
-                acao_corretiva='Revisão do plano de manutenção preventiva',
-                acao_preventiva='Implementar checklist diário de veículos',
-                responsavel_acao='Supervisor de Frota',
-                prazo_conclusao=date(2024, 12, 31),
-                status='em_andamento',
-                created_by=debora.id
-            )
-            db.session.add(report_falha)
+                # Exemplo de Report de Falhas
+                report_falha = ReportFalhasOperacionais(
+                    data_ocorrencia=date.today(),
+                    turno='M1',
+                    equipe_envolvida='Man-IP-01 | ENGIE',
+                    responsavel_report='Débora Santos',
+                    tipo_falha='Operacional',
+                    severidade='Média',
+                    categoria='Processo',
+                    descricao_falha='Atraso no início das atividades devido a problema no veículo',
+                    causa_raiz='Falha na manutenção preventiva do veículo',
+                    impacto_operacional='Atraso de 30 minutos no cronograma',
+                    acao_imediata='Substituição do veículo',
+                    acao_corretiva='Revisão do plano de manutenção preventiva',
+                    acao_preventiva='Implementar checklist diário de veículos',
+                    responsavel_acao='Supervisor de Frota',
+                    prazo_conclusao=date(2024, 12, 31),
+                    status='em_andamento',
+                    created_by=debora.id
+                )
+                db.session.add(report_falha)
             
-            print("✅ Diário de acompanhamento e report de falhas de exemplo criados!")
+                print("✅ Diário de acompanhamento e report de falhas de exemplo criados!")
         
-        db.session.commit()
+            db.session.commit()
         
         # 5. Estatísticas finais
         print("\n=== ESTATÍSTICAS DO BANCO ===")
@@ -299,7 +521,7 @@ def init_database_completo():
         print(f"🔧 Protocolos: {ProtocoloExecucao.query.count()}")
         
         print("\n=== USUÁRIOS CRIADOS ===")
-        all_users = User.query.all()
+        all_users = User.query.options(joinedload(User.profile), joinedload(User.team)).all()
         for user in all_users:
             profile_name = user.profile.name if user.profile else 'Sem perfil'
             team_name = user.team.name if user.team else 'Sem equipe'
@@ -313,8 +535,15 @@ def init_database_completo():
         print("🔑 CCO: cco.operador / cco123")
         
         print("\n✅ Banco de dados inicializado com sucesso!")
-        print(f"📁 Arquivo: {os.path.join(os.path.dirname(__file__), 'app_completo.db')}")
+        print(f"📁 Arquivo: {caminho}")
 
 if __name__ == '__main__':
-    init_database_completo()
+    parser = argparse.ArgumentParser(description='Inicializa o banco de dados completo')
+    parser.add_argument('--banco', help='Arquivo SQLite (padrão: src/database/app_completo.db)')
+    parser.add_argument('--massa', action='store_true', help='Carga em massa de turnos sintéticos no lugar dos exemplos')
+    parser.add_argument('--dias', type=int, default=30, help='Dias gerados no modo --massa')
+    parser.add_argument('--equipes', type=int, default=5, help='Equipes por turno no modo --massa')
+    parser.add_argument('--hash-metodo', help=f'Método de hash das senhas (padrão em --massa: {HASH_SEMENTE})')
+    args = parser.parse_args()
+    init_database_completo(args.banco, args.massa, args.dias, args.equipes, args.hash_metodo)
 
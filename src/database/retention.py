@@ -0,0 +1,162 @@
+import os
+import sys
+import gzip
+import json
+import argparse
+from datetime import date, datetime, timedelta
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.diario import RelatoriosDiarios, SyncAlteracao
+from src.utils.audit import LOG_SISTEMA
+from src.database.config import database_uri, engine_options, apply_sqlite_pragmas
+from src.utils.serialization import dumps
+from sqlalchemy import create_engine, select, delete, func, text, DateTime
+
+# Pasta dos arquivos mensais: <ARQUIVO_DIR>/<tabela>/<AAAA-MM>.ndjson.gz
+ARQUIVO_DIR = os.environ.get('RETENTION_DIR', os.path.join(os.path.dirname(__file__), 'arquivo'))
+
+# Tabelas arquivadas: coluna de tempo e dias mantidos na tabela ativa
+TABELAS = {
+    'log_sistema': (LOG_SISTEMA, 'timestamp', int(os.environ.get('RETENTION_LOG_DAYS', 90))),
+    'relatorios_diarios': (RelatoriosDiarios.__table__, 'data', int(os.environ.get('RETENTION_RELATORIOS_DAYS', 365))),
+    # Clientes com cursor mais antigo que isso recebem reset no /api/sync
+    'sync_alteracao': (SyncAlteracao.__table__, 'alterado_em', int(os.environ.get('RETENTION_SYNC_DAYS', 30))),
+}
+
+# Tabelas que sempre mantêm a linha mais recente: o maior id de sync_alteracao é a
+# posição atual dos cursores do /api/sync, e o min(alterado_em) o início do diário retido
+MANTER_ULTIMA = {'sync_alteracao'}
+
+# Linhas lidas, gravadas no arquivo e apagadas por transação
+LOTE = 1000
+
+
+def _caminho(tabela, mes):
+    return os.path.join(ARQUIVO_DIR, tabela, f'{mes}.ndjson.gz')
+
+
+def _gravar(tabela, mes, linhas):
+    """Acrescenta as linhas ao arquivo do mês (cada chamada vira um membro gzip)"""
+    caminho = _caminho(tabela, mes)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, 'ab') as arquivo:
+        with gzip.GzipFile(fileobj=arquivo, mode='wb') as gz:
+            for linha in linhas:
+                gz.write(dumps(linha) + b'\n')
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+
+
+def arquivar_tabela(engine, tabela, dias=None, hoje=None):
+    """Move para os arquivos mensais as linhas mais antigas que o horizonte.
+
+    Cada lote é gravado (com fsync) antes de ser apagado do banco; uma falha
+    entre as duas etapas só pode repetir linhas no arquivo, que a consulta
+    descarta como linhas idênticas.
+    """
+    table, coluna_nome, padrao = TABELAS[tabela]
+    coluna = table.c[coluna_nome]
+    dias = padrao if dias is None else dias
+    limite = (hoje or date.today()) - timedelta(days=dias)
+    if isinstance(coluna.type, DateTime):
+        limite = datetime.combine(limite, datetime.min.time())
+
+    filtro = coluna < limite
+    if tabela in MANTER_ULTIMA:
+        with engine.connect() as conn:
+            ultimo = conn.execute(select(func.max(table.c.id))).scalar()
+        filtro = filtro & (table.c.id < (ultimo or 0))
+
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            linhas = conn.execute(
+                select(table).where(filtro).order_by(coluna, table.c.id).limit(LOTE)
+            ).mappings().all()
+            if not linhas:
+                break
+            por_mes = {}
+            for linha in linhas:
+                por_mes.setdefault(linha[coluna_nome].strftime('%Y-%m'), []).append(dict(linha))
+            for mes, registros in por_mes.items():
+                _gravar(tabela, mes, registros)
+            conn.execute(delete(table).where(table.c.id.in_([linha['id'] for linha in linhas])))
+        total += len(linhas)
+    return total
+
+
+def arquivar(engine, dias=None, vacuum=False):
+    """Arquiva todas as tabelas configuradas; retorna {tabela: linhas movidas}"""
+    movidas = {tabela: arquivar_tabela(engine, tabela, (dias or {}).get(tabela)) for tabela in TABELAS}
+    if vacuum and engine.dialect.name == 'sqlite' and any(movidas.values()):
+        # Devolve as páginas liberadas para o arquivo encolher
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text('VACUUM'))
+    return movidas
+
+
+def _meses(inicio, fim):
+    ano, mes = inicio.year, inicio.month
+    while (ano, mes) <= (fim.year, fim.month):
+        yield f'{ano:04d}-{mes:02d}'
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+
+
+def consultar(tabela, inicio, fim):
+    """Linhas arquivadas com a coluna de tempo entre inicio e fim (datas inclusivas)"""
+    _, coluna_nome, _ = TABELAS[tabela]
+    de, ate = inicio.isoformat(), (fim + timedelta(days=1)).isoformat()
+    for mes in _meses(inicio, fim):
+        caminho = _caminho(tabela, mes)
+        if not os.path.exists(caminho):
+            continue
+        # Repetições de um lote regravado são idênticas e caem no mesmo mês. O id
+        # sozinho não basta: sem AUTOINCREMENT, o SQLite reaproveita ids de uma
+        # tabela esvaziada pelo arquivamento e linhas diferentes repetem o id
+        vistos = set()
+        with gzip.open(caminho, 'rt', encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                if linha in vistos:
+                    continue
+                vistos.add(linha)
+                registro = json.loads(linha)
+                # Datas e timestamps ISO 8601 comparam corretamente como texto
+                if de <= registro[coluna_nome] < ate:
+                    yield registro
+
+
+def criar_engine(uri=None):
+    uri = uri or database_uri(f"sqlite:///{os.path.join(os.path.dirname(__file__), 'app.db')}")
+    engine = create_engine(uri, **engine_options(uri))
+    apply_sqlite_pragmas(engine)
+    return engine
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Retenção e arquivamento de logs e relatórios')
+    parser.add_argument('--database', help='URI do banco (padrão: DATABASE_URL ou app.db)')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    arq = comandos.add_parser('arquivar', help='move linhas antigas para os arquivos mensais')
+    arq.add_argument('--dias-log', type=int, help='dias de log_sistema mantidos no banco')
+    arq.add_argument('--dias-relatorios', type=int, help='dias de relatorios_diarios mantidos no banco')
+    arq.add_argument('--vacuum', action='store_true', help='compacta o SQLite depois de arquivar')
+
+    con = comandos.add_parser('consultar', help='lista linhas arquivadas em NDJSON')
+    con.add_argument('tabela', choices=sorted(TABELAS))
+    con.add_argument('inicio', type=date.fromisoformat)
+    con.add_argument('fim', type=date.fromisoformat)
+
+    args = parser.parse_args()
+    if args.comando == 'arquivar':
+        movidas = arquivar(criar_engine(args.database), {
+            'log_sistema': args.dias_log,
+            'relatorios_diarios': args.dias_relatorios
+        }, vacuum=args.vacuum)
+        for tabela, quantidade in movidas.items():
+            print(f'{tabela}: {quantidade} linhas arquivadas')
+    else:
+        for registro in consultar(args.tabela, args.inicio, args.fim):
+            sys.stdout.write(json.dumps(registro, ensure_ascii=False) + '\n')
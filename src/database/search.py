@@ -0,0 +1,161 @@
+import html
+from sqlalchemy import text
+
+# Índice FTS5 único para o texto livre de todas as fontes
+TABELA_BUSCA = 'busca_texto'
+
+# Fontes indexadas: código (compõe o rowid), colunas de texto, coluna de data e de equipe.
+# O rowid do índice é id * 8 + código, então cada trigger localiza a sua linha
+# diretamente, sem varrer o índice. Os códigos não podem mudar depois de criados.
+# Cada banco indexa só as fontes que contém: diario_planejamento no da aplicação,
+# as demais no app_completo.db (bind 'completo' do app e init_db_completo).
+FONTES = {
+    'diario_planejamento': (1, ['comentario_triagem', 'comentario_execucao', 'comentario_supervisor'], 'data', 'equipe'),
+    'diario_planejamento_execucao': (2, ['observacoes_campo', 'dificuldades_encontradas', 'materiais_utilizados'], 'data', 'equipe'),
+    'diario_acompanhamento': (3, ['pontos_atencao', 'observacoes_supervisor', 'acoes_corretivas'], 'data', 'supervisor'),
+    'report_falhas_operacionais': (4, ['descricao_falha', 'causa_raiz', 'impacto_operacional', 'acao_imediata',
+                                       'acao_corretiva', 'acao_preventiva'], 'data_ocorrencia', 'equipe_envolvida'),
+    'observacao_seguranca': (5, ['situacao', 'causa', 'acao_imediata', 'acao_corretiva'], 'data', 'equipe'),
+}
+
+
+def _valores(origem, prefixo):
+    codigo, colunas, data, equipe = FONTES[origem]
+    texto = " || ' ' || ".join(f"coalesce({prefixo}{coluna}, '')" for coluna in colunas)
+    return (f"{prefixo}id * 8 + {codigo}, trim({texto}), '{origem}', {prefixo}id, "
+            f"{prefixo}{data}, {prefixo}{equipe}, {prefixo}turno")
+
+
+def _ddl_triggers(origem):
+    codigo = FONTES[origem][0]
+    colunas = f'{TABELA_BUSCA}(rowid, texto, origem, registro_id, data, equipe, turno)'
+    return [
+        f"""CREATE TRIGGER {TABELA_BUSCA}_{origem}_ai AFTER INSERT ON {origem} BEGIN
+            INSERT INTO {colunas} VALUES ({_valores(origem, 'new.')});
+        END""",
+        f"""CREATE TRIGGER {TABELA_BUSCA}_{origem}_au AFTER UPDATE ON {origem} BEGIN
+            DELETE FROM {TABELA_BUSCA} WHERE rowid = old.id * 8 + {codigo};
+            INSERT INTO {colunas} VALUES ({_valores(origem, 'new.')});
+        END""",
+        f"""CREATE TRIGGER {TABELA_BUSCA}_{origem}_ad AFTER DELETE ON {origem} BEGIN
+            DELETE FROM {TABELA_BUSCA} WHERE rowid = old.id * 8 + {codigo};
+        END""",
+    ]
+
+
+def busca_disponivel(engine):
+    return engine.dialect.name == 'sqlite'
+
+
+def ensure_search_index(engine, origens=None):
+    """Cria o índice FTS5 e os triggers das fontes existentes no banco.
+
+    `origens` restringe as fontes indexadas (padrão: todas as de FONTES). Uma fonte sem triggers (banco novo ou tabela criada depois) tem as linhas
+    já gravadas indexadas na mesma transação em que os triggers são criados.
+    Retorna as fontes indexadas nesta chamada.
+    """
+    if not busca_disponivel(engine):
+        print(f'Aviso: busca textual requer SQLite com FTS5 (banco atual: {engine.dialect.name})')
+        return []
+
+    indexadas = []
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_BUSCA} USING fts5("
+            f"texto, origem UNINDEXED, registro_id UNINDEXED, data UNINDEXED, equipe UNINDEXED, turno UNINDEXED, "
+            f"tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+        existentes = {nome for nome, in conn.execute(text("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"))}
+        for origem in origens or FONTES:
+            if origem not in existentes or f'{TABELA_BUSCA}_{origem}_ai' in existentes:
+                continue
+            for ddl in _ddl_triggers(origem):
+                conn.execute(text(ddl))
+            # Tabela recriada: descartar o que restou da versão anterior
+            conn.execute(text(f"DELETE FROM {TABELA_BUSCA} WHERE origem = :origem"), {'origem': origem})
+            conn.execute(text(
+                f"INSERT INTO {TABELA_BUSCA}(rowid, texto, origem, registro_id, data, equipe, turno) "
+                f"SELECT {_valores(origem, '')} FROM {origem}"
+            ))
+            indexadas.append(origem)
+    return indexadas
+
+
+def remover_triggers_busca(conn, origens):
+    """Remove os triggers das fontes para uma carga em massa (na transação de `conn`).
+
+    O próximo ensure_search_index recria os triggers e reindexa essas fontes
+    com um único INSERT ... SELECT em vez de um trigger por linha inserida.
+    """
+    if not busca_disponivel(conn):
+        return
+    for origem in origens:
+        for sufixo in ('ai', 'au', 'ad'):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {TABELA_BUSCA}_{origem}_{sufixo}"))
+
+
+# Delimitadores do trecho encontrado no snippet: caracteres de controle que não
+# aparecem no texto digitado, trocados por <mark> depois do escape do texto
+INICIO_DESTAQUE, FIM_DESTAQUE = '\x02', '\x03'
+
+
+def _destacar(trecho):
+    """Trecho do snippet como HTML seguro: texto escapado e só os <mark> do destaque"""
+    if trecho is None:
+        return None
+    trecho = html.escape(trecho)
+    return trecho.replace(INICIO_DESTAQUE, '<mark>').replace(FIM_DESTAQUE, '</mark>')
+
+
+def montar_consulta(termos):
+    """Texto digitado -> expressão MATCH do FTS5 (todos os termos, o último como prefixo)"""
+    palavras = [palavra.replace('"', '') for palavra in termos.split()]
+    palavras = [palavra for palavra in palavras if palavra]
+    if not palavras:
+        return None
+    expressao = ' '.join(f'"{palavra}"' for palavra in palavras)
+    return expressao + '*'
+
+
+def buscar(conn, termos, origem=None, equipe=None, limit=20, offset=0):
+    """Resultados ordenados por relevância (bm25) com o trecho encontrado destacado.
+
+    `trecho` é HTML: o texto gravado vem escapado e os termos encontrados
+    entre <mark></mark>, pronto para ser exibido sem nova sanitização.
+    """
+    consulta = montar_consulta(termos)
+    if consulta is None:
+        return []
+    filtros = ''
+    params = {'consulta': consulta, 'limit': limit, 'offset': offset,
+              'inicio': INICIO_DESTAQUE, 'fim': FIM_DESTAQUE}
+    if origem:
+        filtros += ' AND origem = :origem'
+        params['origem'] = origem
+    if equipe:
+        filtros += ' AND equipe = :equipe'
+        params['equipe'] = equipe
+    linhas = conn.execute(text(
+        f"SELECT origem, registro_id, data, equipe, turno, "
+        f"snippet({TABELA_BUSCA}, 0, :inicio, :fim, '…', 16) AS trecho, bm25({TABELA_BUSCA}) AS relevancia "
+        f"FROM {TABELA_BUSCA} WHERE {TABELA_BUSCA} MATCH :consulta{filtros} "
+        f"ORDER BY relevancia LIMIT :limit OFFSET :offset"
+    ), params).mappings().all()
+    return [{**linha, 'trecho': _destacar(linha['trecho'])} for linha in linhas]
+
+
+def buscar_em_bancos(bancos, termos, origem=None, equipe=None, limit=20, offset=0):
+    """Busca em cada banco [(engine, origens)] e intercala os resultados pela relevância.
+
+    Cada banco devolve as suas limit + offset primeiras linhas, o suficiente
+    para montar a página depois da intercalação. O bm25 de índices diferentes
+    é comparável só aproximadamente (estatísticas de termos de cada banco).
+    """
+    resultados = []
+    for engine, origens in bancos:
+        if origem and origem not in origens or not busca_disponivel(engine):
+            continue
+        with engine.connect() as conn:
+            resultados += buscar(conn, termos, origem=origem, equipe=equipe, limit=limit + offset)
+    resultados.sort(key=lambda resultado: resultado['relevancia'])
+    return resultados[offset:offset + limit]
@@ -3,18 +3,37 @@ import sys
 # NÃO MUDAR 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
-from src.models.diario import db
+from src.models.diario import db, DiarioPlanejamento, DashboardAgregado
+from src.models.diario_completo import ObservacaoSeguranca
+from src.database.indexes import ensure_indexes
+from src.database.search import ensure_search_index
+from src.utils.audit import audit_log
+from src.utils.events import eventos
+from src.utils.analytics import analytics
+from src.utils.query_guard import init_query_guard
+from src.utils.sql_instrumentation import init_sql_instrumentation
+from src.utils.metrics import metrics, init_metrics
+from src.utils.hashing import hasher
+from src.utils.static_assets import StaticManifest
+from src.database.config import database_uri, engine_options, apply_sqlite_pragmas
 from src.routes.user import user_bp
-from src.routes.diario import diario_bp
-from src.routes.auth import auth_bp
+from src.routes.diario import diario_bp, relatorio_cache
+from src.routes.auth import auth_bp, user_cache
+from src.routes.search import search_bp, ORIGENS, ORIGENS_COMPLETO
+from src.routes.eventos import eventos_bp
+from src.routes.analytics import analytics_bp
+from src.routes.exportacao import exportacao_bp
 from flask_jwt_extended import JWTManager
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 app.config['JWT_SECRET_KEY'] = 'super-secret' # Mude para uma chave segura
 jwt = JWTManager(app)
+init_sql_instrumentation(app)
+init_query_guard(app)
+init_metrics(app)
 
 # Habilitar CORS para as rotas
 CORS(app)
@@ -22,30 +41,79 @@ CORS(app)
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(diario_bp, url_prefix='/api')
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
+app.register_blueprint(search_bp, url_prefix='/api')
+app.register_blueprint(eventos_bp, url_prefix='/api')
+app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+app.register_blueprint(exportacao_bp, url_prefix='/api')
 
-# Configuração do banco de dados
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# Configuração do banco de dados (DATABASE_URL ou SQLite local)
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}")
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+# Banco completo (execução, acompanhamento, reports, observações): só a busca textual lê dele
+completo_uri = os.environ.get('COMPLETO_DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app_completo.db')}")
+app.config['SQLALCHEMY_BINDS'] = {'completo': {'url': completo_uri, **engine_options(completo_uri)}}
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 with app.app_context():
+    apply_sqlite_pragmas(db.engine)
+    apply_sqlite_pragmas(db.engines['completo'])
     db.create_all()
+    ensure_indexes(db)
+    ensure_search_index(db.engine, ORIGENS)
+    # As demais tabelas são criadas pelo init_db_completo; são indexadas quando existirem
+    ObservacaoSeguranca.__table__.create(db.engines['completo'], checkfirst=True)
+    ensure_search_index(db.engines['completo'], ORIGENS_COMPLETO)
+    # Bancos anteriores aos totais do dashboard: preencher a partir do histórico
+    if DashboardAgregado.query.first() is None and DiarioPlanejamento.query.first() is not None:
+        DashboardAgregado.reconstruir()
+audit_log.init_app(app, db)
+
+# Métricas lidas na coleta de /metrics
+metrics.register_cache('relatorio', relatorio_cache)
+metrics.register_cache('auth_user', user_cache)
+with app.app_context():
+    metrics.register_pool('diario', db.engine)
+metrics.describe('login_hash_in_flight', 'gauge', 'Hashes de senha em execução')
+metrics.describe('login_hash_queue_depth', 'gauge', 'Hashes de senha aguardando worker')
+metrics.describe('login_hash_completed_total', 'counter', 'Hashes de senha concluídos')
+metrics.describe('login_hash_rejected_total', 'counter', 'Logins recusados com a fila de hashing cheia')
+metrics.describe('login_hash_avg_wait_ms', 'gauge', 'Espera média na fila de hashing (ms)', modo='max')
+metrics.register_stats('login_hash', hasher.stats, ('in_flight', 'queue_depth', 'completed', 'rejected', 'avg_wait_ms'))
+metrics.describe('audit_queue_depth', 'gauge', 'Entradas de auditoria aguardando gravação')
+metrics.describe('audit_written_total', 'counter', 'Entradas de auditoria gravadas')
+metrics.describe('audit_sync_writes_total', 'counter', 'Entradas gravadas na hora por fila cheia')
+metrics.describe('audit_failures_total', 'counter', 'Entradas de auditoria que falharam ao gravar')
+metrics.register_stats('audit', audit_log.stats, ('queue_depth', 'written', 'sync_writes', 'failures'))
+metrics.describe('eventos_clientes', 'gauge', 'Clientes conectados ao feed ao vivo')
+metrics.describe('eventos_publicados_total', 'counter', 'Eventos publicados no feed ao vivo')
+metrics.describe('eventos_rejeitados_total', 'counter', 'Conexões recusadas com o feed lotado')
+metrics.describe('eventos_resets_total', 'counter', 'Clientes que não puderam retomar do token e recarregaram')
+metrics.register_stats('eventos', eventos.stats, ('clientes', 'publicados', 'rejeitados', 'resets'))
+metrics.describe('analytics_recargas_total', 'counter', 'Recargas completas da janela de analytics')
+metrics.describe('analytics_dias_relidos_total', 'counter', 'Dias relidos do banco pelo analytics')
+metrics.register_stats('analytics', analytics.stats, ('recargas', 'dias_relidos'))
+
+# Arquivos estáticos indexados na inicialização (sem acesso ao disco por requisição)
+static_manifest = StaticManifest(app.static_folder) if app.static_folder else None
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+    if static_manifest is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
-
+    if app.debug:
+        static_manifest.atualizar()
+    asset = static_manifest.get(path)
+    if asset is not None:
+        return static_manifest.resposta(asset)
+    # Arquivo ou rota da API inexistente: 404 em vez da página inicial
+    if path.startswith('api/') or os.path.splitext(path)[1]:
+        return "Not found", 404
+    index = static_manifest.get('index.html')
+    if index is None:
+        return "index.html not found", 404
+    return static_manifest.resposta(index)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
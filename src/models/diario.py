@@ -1,11 +1,30 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 import json
+from src.utils.compression import CompressedJSONText
 
 db = SQLAlchemy()
 
 class DiarioPlanejamento(db.Model):
     __tablename__ = 'diario_planejamento'
+    __table_args__ = (
+        # Um registro por data/turno/equipe (checagem de duplicidade em criar_planejamento)
+        db.Index('uq_diario_planejamento_data_turno_equipe', 'data', 'turno', 'equipe', unique=True),
+        # Listagem ordenada por (data, id) e filtros por turno/equipe
+        db.Index('ix_diario_planejamento_data', 'data'),
+        db.Index('ix_diario_planejamento_turno_data', 'turno', 'data'),
+        db.Index('ix_diario_planejamento_equipe_data', 'equipe', 'data'),
+        # Dashboard
+        db.Index('ix_diario_planejamento_status_final', 'status_final'),
+        db.Index('ix_diario_planejamento_eficiencia', 'eficiencia'),
+        db.Index('ix_diario_planejamento_created_at', 'created_at'),
+        # Exportação incremental para BI (watermark por updated_at, id)
+        db.Index('ix_diario_planejamento_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     data = db.Column(db.Date, nullable=False)
@@ -94,16 +113,185 @@ class DiarioPlanejamento(db.Model):
             'total_protocolos': self.total_protocolos,
         }
 
+class SyncAlteracao(db.Model):
+    """Diário de alterações dos planejamentos, lido pela sincronização incremental (/api/sync).
+
+    Cada inclusão, alteração ou remoção grava uma linha na mesma transação da
+    mudança; o id é o cursor entregue aos clientes. `campos` lista as colunas
+    alteradas (NULL = registro inteiro, na inclusão) e `removido` marca a
+    remoção, que fica como tombstone depois que o planejamento deixa de existir.
+    """
+    __tablename__ = 'sync_alteracao'
+    __table_args__ = (
+        db.Index('ix_sync_alteracao_alterado_em', 'alterado_em'),
+        db.Index('ix_sync_alteracao_registro_id_alterado_em', 'registro_id', 'alterado_em'),
+        # O id é o cursor dos clientes: não pode ser reutilizado depois de um expurgo
+        {'sqlite_autoincrement': True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    registro_id = db.Column(db.Integer, nullable=False)
+    campos = db.Column(db.Text)
+    removido = db.Column(db.Boolean, nullable=False, default=False)
+    alterado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @classmethod
+    def registrar(cls, connection, registro_id, campos=None, removido=False, alterado_em=None):
+        connection.execute(cls.__table__.insert(), {
+            'registro_id': registro_id,
+            'campos': ','.join(campos) if campos is not None else None,
+            'removido': removido,
+            'alterado_em': alterado_em or datetime.utcnow(),
+        })
+
+@event.listens_for(DiarioPlanejamento, 'after_insert')
+def _sync_inclusao(mapper, connection, planejamento):
+    SyncAlteracao.registrar(connection, planejamento.id, alterado_em=planejamento.updated_at)
+
+@event.listens_for(DiarioPlanejamento, 'after_update')
+def _sync_alteracao(mapper, connection, planejamento):
+    campos = [atributo.key for atributo in sa_inspect(planejamento).attrs
+              if atributo.key != 'updated_at' and atributo.history.has_changes()]
+    if campos:
+        # updated_at já tem o valor gravado: é a base das edições offline (ver /api/sync)
+        SyncAlteracao.registrar(connection, planejamento.id, campos, alterado_em=planejamento.updated_at)
+
+@event.listens_for(DiarioPlanejamento, 'after_delete')
+def _sync_remocao(mapper, connection, planejamento):
+    SyncAlteracao.registrar(connection, planejamento.id, removido=True)
+
+# INSERT ... ON CONFLICT DO UPDATE por dialeto (os demais usam UPDATE + SAVEPOINT)
+_UPSERT = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+class DashboardAgregado(db.Model):
+    """Totais do dashboard mantidos incrementalmente por dia e status final"""
+    __tablename__ = 'dashboard_agregado'
+    __table_args__ = (
+        db.Index('uq_dashboard_agregado_data_status', 'data', 'status', unique=True),
+        db.Index('ix_dashboard_agregado_status_data', 'status', 'data'),
+    )
+
+    # Planejamentos sem status final são agrupados sob este valor
+    STATUS_PENDENTE = 'pendente'
+    CAMPOS = ('total_planejamentos', 'soma_eficiencia', 'qtd_eficiencia',
+              'soma_nao_enviados', 'soma_vencem_no_turno')
+
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    total_planejamentos = db.Column(db.Integer, nullable=False, default=0)
+    soma_eficiencia = db.Column(db.Integer, nullable=False, default=0)
+    qtd_eficiencia = db.Column(db.Integer, nullable=False, default=0)
+    soma_nao_enviados = db.Column(db.Integer, nullable=False, default=0)
+    soma_vencem_no_turno = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def contribuicao(cls, planejamento):
+        """Retorna a chave (data, status) e os valores com que um planejamento entra nos totais"""
+        return (planejamento.data, planejamento.status_final or cls.STATUS_PENDENTE), {
+            'total_planejamentos': 1,
+            'soma_eficiencia': planejamento.eficiencia or 0,
+            'qtd_eficiencia': 1 if planejamento.eficiencia is not None else 0,
+            'soma_nao_enviados': planejamento.protocolos_nao_enviados_prazo or 0,
+            'soma_vencem_no_turno': planejamento.protocolos_vencem_no_turno or 0,
+        }
+
+    @classmethod
+    def registrar_alteracao(cls, antes, depois):
+        """Aplica na sessão atual a diferença entre duas contribuições.
+
+        Deve ser chamado antes do commit da rota, para que o agregado e o
+        planejamento sejam gravados na mesma transação. Use None em `antes`
+        para registros novos.
+        """
+        cls._aplicar_deltas(((antes, -1), (depois, 1)))
+
+    @classmethod
+    def registrar_inclusoes(cls, contribuicoes):
+        """Soma aos totais as contribuições de vários planejamentos novos de uma vez"""
+        cls._aplicar_deltas((contribuicao, 1) for contribuicao in contribuicoes)
+
+    @classmethod
+    def _aplicar_deltas(cls, contribuicoes_com_sinal):
+        """Agrupa as contribuições por (data, status) e aplica um upsert por chave"""
+        deltas = {}
+        for contribuicao, sinal in contribuicoes_com_sinal:
+            if contribuicao is None:
+                continue
+            chave, valores = contribuicao
+            acumulado = deltas.setdefault(chave, dict.fromkeys(cls.CAMPOS, 0))
+            for campo, valor in valores.items():
+                acumulado[campo] += sinal * valor
+
+        upsert = _UPSERT.get(db.session.get_bind().dialect.name)
+        for (data, status), delta in deltas.items():
+            if not any(delta.values()):
+                continue
+            if upsert is None:
+                cls._atualizar_ou_inserir(data, status, delta)
+                continue
+            # INSERT ... ON CONFLICT com incremento em SQL: atômico mesmo quando duas
+            # transações criam a mesma (data, status) ao mesmo tempo
+            consulta = upsert(cls.__table__).values(data=data, status=status, **delta)
+            db.session.execute(consulta.on_conflict_do_update(
+                index_elements=['data', 'status'],
+                set_={campo: cls.__table__.c[campo] + consulta.excluded[campo] for campo in delta}
+            ))
+
+    @classmethod
+    def _atualizar_ou_inserir(cls, data, status, delta):
+        """UPDATE com incremento ou INSERT num SAVEPOINT, para bancos sem ON CONFLICT"""
+        incremento = {getattr(cls, campo): getattr(cls, campo) + valor for campo, valor in delta.items()}
+        for _ in range(2):
+            if cls.query.filter_by(data=data, status=status).update(incremento, synchronize_session=False):
+                return
+            try:
+                with db.session.begin_nested():
+                    db.session.add(cls(data=data, status=status, **delta))
+                return
+            except IntegrityError:
+                # Outra transação criou a chave entre o UPDATE e o INSERT: o UPDATE agora a encontra
+                continue
+        raise RuntimeError(f'Não foi possível atualizar dashboard_agregado para {data} / {status}')
+
+    @classmethod
+    def reconstruir(cls):
+        """Recalcula todos os totais a partir de diario_planejamento"""
+        status = db.func.coalesce(DiarioPlanejamento.status_final, cls.STATUS_PENDENTE)
+        linhas = db.session.query(
+            DiarioPlanejamento.data,
+            status,
+            db.func.count(DiarioPlanejamento.id),
+            db.func.coalesce(db.func.sum(DiarioPlanejamento.eficiencia), 0),
+            db.func.count(DiarioPlanejamento.eficiencia),
+            db.func.coalesce(db.func.sum(DiarioPlanejamento.protocolos_nao_enviados_prazo), 0),
+            db.func.coalesce(db.func.sum(DiarioPlanejamento.protocolos_vencem_no_turno), 0)
+        ).group_by(DiarioPlanejamento.data, status).all()
+
+        cls.query.delete()
+        for data, status_final, *valores in linhas:
+            db.session.add(cls(data=data, status=status_final, **dict(zip(cls.CAMPOS, valores))))
+        db.session.commit()
+
 class RelatoriosDiarios(db.Model):
     __tablename__ = 'relatorios_diarios'
+    __table_args__ = (
+        db.Index('ix_relatorios_diarios_data_turno_equipe', 'data', 'turno', 'equipe'),
+        db.Index('ix_relatorios_diarios_equipe_data', 'equipe', 'data'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     data = db.Column(db.Date, nullable=False)
     turno = db.Column(db.String(10), nullable=False)
     equipe = db.Column(db.String(50), nullable=False)
-    relatorio_json = db.Column(db.Text, nullable=False)  # JSON string
+    relatorio_json = db.Column(CompressedJSONText, nullable=False)  # JSON string
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    serialize_exclude = ('relatorio_json',)
+    serialize_extra = {
+        'relatorio': lambda r: json.loads(r.relatorio_json) if r.relatorio_json else None,
+    }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -114,27 +302,29 @@ class RelatoriosDiarios(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
     
-    def set_relatorio(self, relatorio_dict):
-        self.relatorio_json = json.dumps(relatorio_dict)
-    
-    def get_relatorio(self):
-        return json.loads(self.relatorio_json) if self.relatorio_json else None
-
-
-    def to_dict(self):
+    def to_summary_dict(self):
+        """Colunas de resumo, sem o corpo do relatório"""
         return {
             'id': self.id,
-            'responsavel_observacao': self.responsavel_observacao,
             'data': self.data.isoformat() if self.data else None,
-            'hora': self.hora.isoformat() if self.hora else None,
             'turno': self.turno,
             'equipe': self.equipe,
-            'situacao': self.situacao,
-            'causa': self.causa,
-            'acao_imediata': self.acao_imediata,
-            'acao_corretiva': self.acao_corretiva,
-            'responsavel_acao_corretiva': self.responsavel_acao_corretiva,
-            'prazo_acao_corretiva': self.prazo_acao_corretiva.isoformat() if self.prazo_acao_corretiva else None,
-            'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+    
+    def to_json_text(self):
+        """Resumo + corpo em texto JSON, reaproveitando o relatorio_json gravado sem decodificá-lo"""
+        resumo = json.dumps(self.to_summary_dict())
+        return f'{resumo[:-1]}, "relatorio": {self.relatorio_json or "null"}}}'
+    
+    @property
+    def etag(self):
+        """Relatórios não são alterados depois de gerados: id + criação identificam o conteúdo"""
+        criado = self.created_at.timestamp() if self.created_at else 0
+        return f'relatorio-{self.id}-{criado:.6f}'
+    
+    def set_relatorio(self, relatorio_dict):
+        self.relatorio_json = json.dumps(relatorio_dict)
+    
+    def get_relatorio(self):
+        return json.loads(self.relatorio_json) if self.relatorio_json else None
@@ -1,13 +1,18 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, time
 import json
-from werkzeug.security import generate_password_hash, check_password_hash
+from src.utils.compression import CompressedJSONText
+from src.utils.hashing import hasher
 
 db = SQLAlchemy()
 
 # Modelo base para usuários
 class User(db.Model):
     __tablename__ = 'user'
+    __table_args__ = (
+        db.Index('ix_user_profile_id', 'profile_id'),
+        db.Index('ix_user_team_id', 'team_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -27,11 +32,23 @@ class User(db.Model):
     profile = db.relationship('Profile', backref='users')
     team = db.relationship('Team', foreign_keys=[team_id], backref='members')
     
+    # Serialização compartilhada (ver src/utils/serialization.py)
+    serialize_exclude = ('password_hash', 'profile_id', 'team_id', 'updated_at')
+    serialize_eager = ('profile', 'team')
+    serialize_extra = {
+        'profile': lambda user: user.profile.name if user.profile else None,
+        'team': lambda user: user.team.name if user.team else None,
+    }
+    
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        if not hasher.verify(self.password_hash, password):
+            return False
+        if hasher.needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
     
     def to_dict(self):
         return {
@@ -50,7 +67,11 @@ class Profile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
     description = db.Column(db.Text)
-    permissions = db.Column(db.Text)  # JSON string com permissões
+    permissions = db.Column(CompressedJSONText)  # JSON string com permissões
+    
+    serialize_extra = {
+        'permissions': lambda p: json.loads(p.permissions) if p.permissions else [],
+    }
     
     def to_dict(self):
         return {
@@ -83,6 +104,13 @@ class Team(db.Model):
 class DiarioPlanejamentoExecucao(db.Model):
     """Modelo baseado na sheet 'Planejamento e Execução' - Para funcionários em campo"""
     __tablename__ = 'diario_planejamento_execucao'
+    __table_args__ = (
+        db.Index('ix_diario_planejamento_execucao_data_turno_equipe', 'data', 'turno', 'equipe'),
+        db.Index('ix_diario_planejamento_execucao_equipe_data', 'equipe', 'data'),
+        db.Index('ix_diario_planejamento_execucao_status', 'status'),
+        db.Index('ix_diario_planejamento_execucao_created_by', 'created_by'),
+        db.Index('ix_diario_planejamento_execucao_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -158,6 +186,10 @@ class DiarioPlanejamentoExecucao(db.Model):
 class ProtocoloExecucao(db.Model):
     """Protocolos individuais para o diário de execução"""
     __tablename__ = 'protocolo_execucao'
+    __table_args__ = (
+        db.Index('ix_protocolo_execucao_diario_id', 'diario_id'),
+        db.Index('ix_protocolo_execucao_numero_protocolo', 'numero_protocolo'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     numero_protocolo = db.Column(db.String(50), nullable=False)
@@ -196,6 +228,11 @@ class ProtocoloExecucao(db.Model):
 class DiarioAcompanhamento(db.Model):
     """Modelo baseado na sheet 'Acompanhamento' - Para supervisores"""
     __tablename__ = 'diario_acompanhamento'
+    __table_args__ = (
+        db.Index('ix_diario_acompanhamento_data_turno', 'data', 'turno'),
+        db.Index('ix_diario_acompanhamento_diario_execucao_id', 'diario_execucao_id'),
+        db.Index('ix_diario_acompanhamento_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -270,6 +307,11 @@ class DiarioAcompanhamento(db.Model):
 class ReportFalhasOperacionais(db.Model):
     """Modelo baseado na sheet 'Report' - Para acompanhamento de falhas operacionais"""
     __tablename__ = 'report_falhas_operacionais'
+    __table_args__ = (
+        db.Index('ix_report_falhas_data_turno_equipe', 'data_ocorrencia', 'turno', 'equipe_envolvida'),
+        db.Index('ix_report_falhas_status', 'status'),
+        db.Index('ix_report_falhas_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -308,9 +350,13 @@ class ReportFalhasOperacionais(db.Model):
     custo_real = db.Column(db.Float)
     
     # Anexos e evidências
-    evidencias = db.Column(db.Text)  # JSON com paths dos arquivos
+    evidencias = db.Column(CompressedJSONText)  # JSON com paths dos arquivos
     fotos_anexadas = db.Column(db.Boolean, default=False)
     
+    serialize_extra = {
+        'evidencias': lambda r: json.loads(r.evidencias) if r.evidencias else [],
+    }
+    
     # Controle
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     approved_by = db.Column(db.Integer, db.ForeignKey('user.id'))
@@ -358,6 +404,9 @@ class ReportFalhasOperacionais(db.Model):
 class ControleCCO(db.Model):
     """Modelo baseado na sheet 'auxiliar' - Para controle do CCO"""
     __tablename__ = 'controle_cco'
+    __table_args__ = (
+        db.Index('ix_controle_cco_data_turno_equipe', 'data_controle', 'turno', 'equipe'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -405,18 +454,65 @@ class ControleCCO(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+# Modelo para Observação de Segurança
+class ObservacaoSeguranca(db.Model):
+    """Modelo para observações de segurança"""
+    __tablename__ = 'observacao_seguranca'
+    __table_args__ = (
+        db.Index('ix_observacao_seguranca_data_turno_equipe', 'data', 'turno', 'equipe'),
+        db.Index('ix_observacao_seguranca_status', 'status'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    responsavel_observacao = db.Column(db.String(100), nullable=False)
+    data = db.Column(db.Date, nullable=False)
+    hora = db.Column(db.Time, nullable=False)
+    turno = db.Column(db.String(10), nullable=False)
+    equipe = db.Column(db.String(50), nullable=False)
+    situacao = db.Column(db.Text, nullable=False)
+    causa = db.Column(db.Text)
+    acao_imediata = db.Column(db.Text)
+    acao_corretiva = db.Column(db.Text)
+    responsavel_acao_corretiva = db.Column(db.String(100))
+    prazo_acao_corretiva = db.Column(db.Date)
+    status = db.Column(db.String(20), default='aberta')  # aberta, em_andamento, concluida
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'responsavel_observacao': self.responsavel_observacao,
+            'data': self.data.isoformat() if self.data else None,
+            'hora': self.hora.isoformat() if self.hora else None,
+            'turno': self.turno,
+            'equipe': self.equipe,
+            'situacao': self.situacao,
+            'causa': self.causa,
+            'acao_imediata': self.acao_imediata,
+            'acao_corretiva': self.acao_corretiva,
+            'responsavel_acao_corretiva': self.responsavel_acao_corretiva,
+            'prazo_acao_corretiva': self.prazo_acao_corretiva.isoformat() if self.prazo_acao_corretiva else None,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 # Modelo para logs de sistema
 class LogSistema(db.Model):
     """Logs de ações do sistema"""
     __tablename__ = 'log_sistema'
+    __table_args__ = (
+        db.Index('ix_log_sistema_timestamp', 'timestamp'),
+        db.Index('ix_log_sistema_tabela_registro', 'tabela_afetada', 'registro_id'),
+        db.Index('ix_log_sistema_usuario_id', 'usuario_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     acao = db.Column(db.String(100), nullable=False)
     tabela_afetada = db.Column(db.String(50))
     registro_id = db.Column(db.Integer)
-    dados_anteriores = db.Column(db.Text)  # JSON
-    dados_novos = db.Column(db.Text)  # JSON
+    dados_anteriores = db.Column(CompressedJSONText)  # JSON
+    dados_novos = db.Column(CompressedJSONText)  # JSON
     ip_address = db.Column(db.String(45))
     user_agent = db.Column(db.Text)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
@@ -424,6 +520,11 @@ class LogSistema(db.Model):
     # Relacionamentos
     usuario = db.relationship('User', backref='logs')
     
+    serialize_extra = {
+        'dados_anteriores': lambda log: json.loads(log.dados_anteriores) if log.dados_anteriores else None,
+        'dados_novos': lambda log: json.loads(log.dados_novos) if log.dados_novos else None,
+    }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -1,11 +1,41 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from datetime import datetime, time, timedelta
 import json
+from src.utils.compression import CompressedJSONText
 
 db = SQLAlchemy()
 
+# Definir horários dos turnos
+TURNOS = {
+    'M1': (time(6, 0), time(14, 0)),   # Manhã 1: 06:00 - 14:00
+    'T2': (time(14, 0), time(22, 0)),  # Tarde 2: 14:00 - 22:00
+    'N1': (time(22, 0), time(6, 0)),   # Noite 1: 22:00 - 06:00
+    'A': (time(0, 0), time(23, 59))    # Administrativo: 00:00 - 23:59
+}
+
+def janela_turno(data, turno):
+    """Retorna (início, fim) do turno como datetimes; turnos que cruzam a meia-noite terminam no dia seguinte"""
+    inicio, fim = TURNOS[turno]
+    data_fim = data + timedelta(days=1) if fim <= inicio else data
+    return datetime.combine(data, inicio), datetime.combine(data_fim, fim)
+
 class DiarioPlanejamento(db.Model):
     __tablename__ = 'diario_planejamento'
+    __table_args__ = (
+        # Um registro por data/turno/equipe (checagem de duplicidade em criar_planejamento)
+        db.Index('uq_diario_planejamento_data_turno_equipe', 'data', 'turno', 'equipe', unique=True),
+        # Listagem ordenada por (data, id) e filtros por turno/equipe
+        db.Index('ix_diario_planejamento_data', 'data'),
+        db.Index('ix_diario_planejamento_turno_data', 'turno', 'data'),
+        db.Index('ix_diario_planejamento_equipe_data', 'equipe', 'data'),
+        # Dashboard
+        db.Index('ix_diario_planejamento_status_final', 'status_final'),
+        db.Index('ix_diario_planejamento_eficiencia', 'eficiencia'),
+        db.Index('ix_diario_planejamento_created_at', 'created_at'),
+        db.Index('ix_diario_planejamento_created_by', 'created_by'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     data = db.Column(db.Date, nullable=False)
@@ -109,6 +139,10 @@ class DiarioPlanejamento(db.Model):
 class Protocolo(db.Model):
     """Modelo para rastrear protocolos individuais"""
     __tablename__ = 'protocolo'
+    __table_args__ = (
+        db.Index('ix_protocolo_diario_prazo', 'diario_id', 'prazo_vencimento'),
+        db.Index('ix_protocolo_status_prazo', 'status', 'prazo_vencimento'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     numero = db.Column(db.String(50), unique=True, nullable=False)
@@ -131,18 +165,10 @@ class Protocolo(db.Model):
         """Verifica se o protocolo vence no turno atual"""
         agora = datetime.now()
         
-        # Definir horários dos turnos
-        turnos = {
-            'M1': (time(6, 0), time(14, 0)),   # Manhã 1: 06:00 - 14:00
-            'T2': (time(14, 0), time(22, 0)),  # Tarde 2: 14:00 - 22:00
-            'N1': (time(22, 0), time(6, 0)),   # Noite 1: 22:00 - 06:00
-            'A': (time(0, 0), time(23, 59))    # Administrativo: 00:00 - 23:59
-        }
-        
-        if turno not in turnos:
+        if turno not in TURNOS:
             return False
             
-        inicio, fim = turnos[turno]
+        inicio, fim = TURNOS[turno]
         
         # Para turno noturno que cruza meia-noite
         if turno == 'N1':
@@ -164,6 +190,66 @@ class Protocolo(db.Model):
         
         return False
     
+    @classmethod
+    def classificar_turno(cls, data, turno, referencia=None):
+        """Classifica de uma vez os protocolos de todos os diários de um turno.
+
+        Uma única consulta agregada por diario_id retorna, para cada diário:
+        vencem_no_turno (não enviados com prazo dentro do turno), vencidos
+        (não enviados com prazo anterior à referência), enviados_atrasados
+        (enviados depois do prazo) e total. A referência padrão é o momento
+        atual, limitado ao fim do turno.
+        """
+        if turno not in TURNOS:
+            return {}
+        inicio, fim = janela_turno(data, turno)
+        if referencia is None:
+            referencia = min(datetime.now(), fim)
+
+        nao_enviado = cls.enviado.isnot(True)
+        contar = lambda condicao: db.func.coalesce(db.func.sum(db.case((condicao, 1), else_=0)), 0)
+        linhas = db.session.query(
+            cls.diario_id,
+            contar(db.and_(nao_enviado, cls.prazo_vencimento >= inicio, cls.prazo_vencimento <= fim)),
+            contar(db.and_(nao_enviado, cls.prazo_vencimento < referencia)),
+            contar(db.and_(cls.enviado.is_(True), cls.data_envio > cls.prazo_vencimento)),
+            db.func.count(cls.id)
+        ).join(DiarioPlanejamento, DiarioPlanejamento.id == cls.diario_id).filter(
+            DiarioPlanejamento.data == data,
+            DiarioPlanejamento.turno == turno
+        ).group_by(cls.diario_id).all()
+
+        return {
+            diario_id: {
+                'vencem_no_turno': vencem,
+                'vencidos': vencidos,
+                'enviados_atrasados': atrasados,
+                'total': total
+            }
+            for diario_id, vencem, vencidos, atrasados, total in linhas
+        }
+
+    @classmethod
+    def atualizar_metricas_turno(cls, data, turno, referencia=None):
+        """Grava protocolos_vencem_no_turno e protocolos_nao_enviados_prazo de todos os diários do turno"""
+        classificacao = cls.classificar_turno(data, turno, referencia)
+        diario_ids = [id_ for (id_,) in db.session.query(DiarioPlanejamento.id).filter_by(data=data, turno=turno)]
+        if not diario_ids:
+            return classificacao
+
+        vazio = {'vencem_no_turno': 0, 'vencidos': 0, 'enviados_atrasados': 0}
+        atualizacoes = []
+        for diario_id in diario_ids:
+            contagem = classificacao.get(diario_id, vazio)
+            atualizacoes.append({
+                'id': diario_id,
+                'protocolos_vencem_no_turno': contagem['vencem_no_turno'],
+                # Não enviados dentro do prazo: vencidos pendentes + enviados com atraso
+                'protocolos_nao_enviados_prazo': contagem['vencidos'] + contagem['enviados_atrasados']
+            })
+        db.session.execute(db.update(DiarioPlanejamento), atualizacoes)
+        return classificacao
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -180,14 +266,23 @@ class Protocolo(db.Model):
 
 class RelatoriosDiarios(db.Model):
     __tablename__ = 'relatorios_diarios'
+    __table_args__ = (
+        db.Index('ix_relatorios_diarios_data_turno_equipe', 'data', 'turno', 'equipe'),
+        db.Index('ix_relatorios_diarios_equipe_data', 'equipe', 'data'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     data = db.Column(db.Date, nullable=False)
     turno = db.Column(db.String(10), nullable=False)
     equipe = db.Column(db.String(50), nullable=False)
-    relatorio_json = db.Column(db.Text, nullable=False)  # JSON string
+    relatorio_json = db.Column(CompressedJSONText, nullable=False)  # JSON string
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    serialize_exclude = ('relatorio_json',)
+    serialize_extra = {
+        'relatorio': lambda r: json.loads(r.relatorio_json) if r.relatorio_json else None,
+    }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -204,40 +299,34 @@ class RelatoriosDiarios(db.Model):
     def get_relatorio(self):
         return json.loads(self.relatorio_json) if self.relatorio_json else None
 
-class ObservacaoSeguranca(db.Model):
-    """Modelo para observações de segurança"""
-    __tablename__ = 'observacao_seguranca'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    responsavel_observacao = db.Column(db.String(100), nullable=False)
-    data = db.Column(db.Date, nullable=False)
-    hora = db.Column(db.Time, nullable=False)
-    turno = db.Column(db.String(10), nullable=False)
-    equipe = db.Column(db.String(50), nullable=False)
-    situacao = db.Column(db.Text, nullable=False)
-    causa = db.Column(db.Text)
-    acao_imediata = db.Column(db.Text)
-    acao_corretiva = db.Column(db.Text)
-    responsavel_acao_corretiva = db.Column(db.String(100))
-    prazo_acao_corretiva = db.Column(db.Date)
-    status = db.Column(db.String(20), default='aberta')  # aberta, em_andamento, concluida
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'responsavel_observacao': self.responsavel_observacao,
-            'data': self.data.isoformat() if self.data else None,
-            'hora': self.hora.isoformat() if self.hora else None,
-            'turno': self.turno,
-            'equipe': self.equipe,
-            'situacao': self.situacao,
-            'causa': self.causa,
-            'acao_imediata': self.acao_imediata,
-            'acao_corretiva': self.acao_corretiva,
-            'responsavel_acao_corretiva': self.responsavel_acao_corretiva,
-            'prazo_acao_corretiva': self.prazo_acao_corretiva.isoformat() if self.prazo_acao_corretiva else None,
-            'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+# Observações de segurança ficam no banco completo (indexadas pela busca textual)
+from src.models.diario_completo import ObservacaoSeguranca
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_diarios_alterados(session, flush_context):
+    """Anota os diários cujos protocolos foram inseridos, alterados ou excluídos nesta flush"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Protocolo):
+            pendentes = session.info.setdefault('diarios_protocolos_alterados', set())
+            pendentes.add(obj.diario_id)
+            # Protocolo movido de diário: o diário anterior também muda
+            pendentes.update(db.inspect(obj).attrs.diario_id.history.deleted)
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _recalcular_metricas_protocolos(session, flush_context):
+    """Mantém as métricas de protocolos dos diários em dia a cada gravação de Protocolo"""
+    diario_ids = session.info.pop('diarios_protocolos_alterados', set()) - {None}
+    if not diario_ids:
+        return
+
+    turnos = session.query(DiarioPlanejamento.data, DiarioPlanejamento.turno).filter(
+        DiarioPlanejamento.id.in_(diario_ids)
+    ).distinct().all()
+    with session.no_autoflush:
+        for data, turno in turnos:
+            Protocolo.atualizar_metricas_turno(data, turno)
 
+    # Descartar valores antigos dos diários já carregados na sessão
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, DiarioPlanejamento) and obj.id in diario_ids:
+            session.expire(obj, ['protocolos_vencem_no_turno', 'protocolos_nao_enviados_prazo'])
@@ -1,5 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from src.utils.hashing import hasher
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -57,13 +57,25 @@ class User(db.Model):
     # Status
     is_active = db.Column(db.Boolean, default=True)
 
+    # Serialização compartilhada (ver src/utils/serialization.py)
+    serialize_exclude = ('password_hash',)
+    serialize_eager = ('profile', 'team')
+    serialize_extra = {
+        'profile_name': lambda user: user.profile.name if user.profile else None,
+        'team_name': lambda user: user.team.name if user.team else None,
+    }
+
     def set_password(self, password):
         """Define a senha do usuário com hash"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
     
     def check_password(self, password):
-        """Verifica se a senha está correta"""
-        return check_password_hash(self.password_hash, password)
+        """Verifica se a senha está correta, refazendo o hash se os parâmetros mudaram"""
+        if not hasher.verify(self.password_hash, password):
+            return False
+        if hasher.needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
     def __repr__(self):
         return f'<User {self.username}>'
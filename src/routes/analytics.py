@@ -0,0 +1,56 @@
+from flask import Blueprint, request, jsonify
+from src.utils.analytics import analytics, DIMENSOES, JANELAS, GrupoDesconhecido
+from src.utils.serialization import json_response
+from flask_jwt_extended import jwt_required
+
+analytics_bp = Blueprint('analytics', __name__)
+
+def _ler_dimensao():
+    dimensao = request.args.get('dimensao', 'equipe')
+    if dimensao not in DIMENSOES:
+        raise ValueError(f'dimensao deve ser uma de: {", ".join(DIMENSOES)}')
+    return dimensao
+
+def _ler_janela(valor):
+    janela = int(valor)
+    if janela not in JANELAS:
+        raise ValueError(f'janela deve ser uma de: {", ".join(map(str, JANELAS))}')
+    return janela
+
+@analytics_bp.route('/eficiencia', methods=['GET'])
+@jwt_required()
+def eficiencia():
+    """Eficiência móvel (média, percentis e tendência) de cada grupo da dimensão"""
+    try:
+        try:
+            dimensao = _ler_dimensao()
+            janela = request.args.get('janela')
+            janelas = (_ler_janela(janela),) if janela else JANELAS
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return json_response(analytics.resumo(dimensao, janelas))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/eficiencia/serie', methods=['GET'])
+@jwt_required()
+def serie():
+    """Série diária de um grupo com média móvel de 7 dias e reta de tendência"""
+    try:
+        try:
+            dimensao = _ler_dimensao()
+            janela = _ler_janela(request.args.get('janela', max(JANELAS)))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        grupo = request.args.get('grupo')
+        if not grupo:
+            return jsonify({'error': 'grupo é obrigatório'}), 400
+
+        return json_response(analytics.serie(dimensao, grupo, janela))
+
+    except GrupoDesconhecido as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,8 +1,13 @@
 from flask import Blueprint, request, jsonify, session
-from werkzeug.security import check_password_hash
 from ..models.user import User, Profile, Team, db
+from ..utils.cache import TTLCache
+from ..utils.hashing import HashingOverloaded
+from ..utils.serialization import serializer_for, json_response
+from sqlalchemy import event
+from collections import namedtuple
 import jwt
 import datetime
+import os
 from functools import wraps
 
 auth_bp = Blueprint('auth', __name__)
@@ -10,6 +15,47 @@ auth_bp = Blueprint('auth', __name__)
 # Chave secreta para JWT (em produção, usar variável de ambiente)
 JWT_SECRET = 'sua_chave_secreta_aqui'
 
+# Dados mínimos do usuário autenticado usados nas checagens de acesso
+UserPrincipal = namedtuple('UserPrincipal', ['id', 'username', 'profile_name', 'team_id', 'team_name', 'is_active'])
+
+# Cache do usuário autenticado por id (evita ir ao banco a cada requisição protegida)
+user_cache = TTLCache(
+    maxsize=int(os.environ.get('AUTH_USER_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('AUTH_USER_CACHE_TTL', 60))
+)
+
+def load_principal(user_id):
+    """Retorna o UserPrincipal do usuário, consultando o banco só em caso de cache miss"""
+    principal = user_cache.get(user_id)
+    if principal is None:
+        user = User.query.options(*serializer_for(User).eager_options()).filter_by(id=user_id).first()
+        if not user:
+            return None
+        principal = UserPrincipal(
+            id=user.id,
+            username=user.username,
+            profile_name=user.profile.name if user.profile else None,
+            team_id=user.team_id,
+            team_name=user.team.name if user.team else None,
+            is_active=user.is_active
+        )
+        user_cache.set(user_id, principal)
+    return principal
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user(mapper, connection, target):
+    """Remove do cache o usuário alterado, desativado ou excluído"""
+    user_cache.invalidate(target.id)
+
+@event.listens_for(Profile, 'after_update')
+@event.listens_for(Profile, 'after_delete')
+@event.listens_for(Team, 'after_update')
+@event.listens_for(Team, 'after_delete')
+def _invalidate_all_users(mapper, connection, target):
+    """Nome de perfil/equipe faz parte do principal: descartar todo o cache"""
+    user_cache.clear()
+
 def token_required(f):
     """Decorator para verificar token JWT"""
     @wraps(f)
@@ -29,9 +75,11 @@ def token_required(f):
         
         try:
             data = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-            current_user = User.query.filter_by(id=data['user_id']).first()
+            current_user = load_principal(data['user_id'])
             if not current_user:
                 return jsonify({'message': 'Usuário não encontrado!'}), 401
+            if not current_user.is_active:
+                return jsonify({'message': 'Usuário inativo!'}), 401
         except jwt.ExpiredSignatureError:
             return jsonify({'message': 'Token expirado!'}), 401
         except jwt.InvalidTokenError:
@@ -46,7 +94,7 @@ def profile_required(allowed_profiles):
     def decorator(f):
         @wraps(f)
         def decorated(current_user, *args, **kwargs):
-            if current_user.profile.name not in allowed_profiles:
+            if current_user.profile_name not in allowed_profiles:
                 return jsonify({'message': 'Acesso negado! Perfil insuficiente.'}), 403
             return f(current_user, *args, **kwargs)
         return decorated
@@ -69,6 +117,10 @@ def login():
         if not user.is_active:
             return jsonify({'message': 'Usuário inativo!'}), 401
         
+        # Hash refeito com os parâmetros atuais durante o check_password
+        if db.session.is_modified(user):
+            db.session.commit()
+        
         # Gerar token JWT
         token = jwt.encode({
             'user_id': user.id,
@@ -83,6 +135,10 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except HashingOverloaded:
+        response = jsonify({'message': 'Servidor ocupado, tente novamente em instantes.'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     except Exception as e:
         return jsonify({'message': f'Erro interno: {str(e)}'}), 500
 
@@ -135,16 +191,18 @@ def register():
 @token_required
 def get_current_user(current_user):
     """Obter informações do usuário atual"""
-    return jsonify({'user': current_user.to_dict()}), 200
+    serializer = serializer_for(User)
+    user = User.query.options(*serializer.eager_options()).get_or_404(current_user.id)
+    return json_response({'user': serializer.dump(user)})
 
 @auth_bp.route('/profiles', methods=['GET'])
 def get_profiles():
     """Listar todos os perfis disponíveis"""
     try:
         profiles = Profile.query.all()
-        return jsonify({
-            'profiles': [profile.to_dict() for profile in profiles]
-        }), 200
+        return json_response({
+            'profiles': serializer_for(Profile).dump_many(profiles)
+        })
     except Exception as e:
         return jsonify({'message': f'Erro interno: {str(e)}'}), 500
 
@@ -154,9 +212,9 @@ def get_teams(current_user):
     """Listar todas as equipes"""
     try:
         teams = Team.query.all()
-        return jsonify({
-            'teams': [team.to_dict() for team in teams]
-        }), 200
+        return json_response({
+            'teams': serializer_for(Team).dump_many(teams)
+        })
     except Exception as e:
         return jsonify({'message': f'Erro interno: {str(e)}'}), 500
 
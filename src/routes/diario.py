@@ -1,12 +1,120 @@
-from flask import Blueprint, request, jsonify
-from datetime import datetime, date
-from src.models.diario import db, DiarioPlanejamento, RelatoriosDiarios
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from datetime import datetime, date, timezone
+from src.models.diario import db, DiarioPlanejamento, RelatoriosDiarios, DashboardAgregado, SyncAlteracao
+from src.utils.pagination import parse_limit, keyset_page
+from src.utils.cache import TTLCache
+from src.utils.serialization import serializer_for, json_response, parse_fields, dumps
+from src.utils.audit import audit_log
+from src.utils.events import eventos
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer, load_only
 import json
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 
 diario_bp = Blueprint('diario', __name__)
 
+# Corpos de relatórios já serializados, por id (relatórios são imutáveis)
+relatorio_cache = TTLCache(maxsize=256, ttl=600)
+
+# Quantidade máxima de registros aceitos por requisição de carga em lote
+MAX_LOTE = 5000
+
+def _usuario_atual():
+    """Id do usuário do token JWT, quando houver"""
+    try:
+        identidade = get_jwt_identity()
+    except RuntimeError:
+        return None
+    try:
+        return int(identidade)
+    except (TypeError, ValueError):
+        return None
+
+# Campos que identificam o planejamento em todo evento do feed ao vivo
+CAMPOS_EVENTO = ('id', 'data', 'turno', 'equipe')
+
+def _auditar(acao, planejamento, antes=None, novo=None):
+    """Enfileira o log da alteração (gravado em lote fora da requisição) e publica no feed ao vivo"""
+    if novo is None:
+        novo = serializer_for(DiarioPlanejamento).dump(planejamento)
+    audit_log.record(
+        acao,
+        tabela_afetada=DiarioPlanejamento.__tablename__,
+        registro_id=planejamento.id,
+        dados_anteriores=antes,
+        dados_novos=novo,
+        usuario_id=_usuario_atual()
+    )
+    # Evento compacto: a chave do registro e só os campos que mudaram
+    alterados = {
+        campo: valor for campo, valor in novo.items()
+        if campo not in CAMPOS_EVENTO and campo not in ('created_at', 'updated_at')
+        and (antes.get(campo) != valor if antes is not None else valor is not None)
+    }
+    eventos.publish('planejamento', {'acao': acao, **{campo: novo[campo] for campo in CAMPOS_EVENTO},
+                                     'alterados': alterados})
+
+def _calcular_status_triagem(planejamento):
+    """Status da triagem pelo percentual de protocolos vencidos"""
+    if planejamento.total_protocolos and planejamento.total_protocolos > 0 and planejamento.protocolos_vencidos is not None:
+        percentual_vencidos = (planejamento.protocolos_vencidos / planejamento.total_protocolos) * 100
+        if percentual_vencidos > 30:
+            planejamento.status_triagem = 'critico'
+        elif percentual_vencidos > 15:
+            planejamento.status_triagem = 'atencao'
+        else:
+            planejamento.status_triagem = 'normal'
+
+def _calcular_eficiencia(planejamento):
+    """Eficiência (atendidos / total) e a classificação correspondente"""
+    if planejamento.total_protocolos and planejamento.total_protocolos > 0 and planejamento.atendido is not None:
+        planejamento.eficiencia = round((planejamento.atendido / planejamento.total_protocolos) * 100)
+        
+        # Determinar classificação
+        if planejamento.eficiencia >= 95:
+            planejamento.classificacao = 'excelente'
+        elif planejamento.eficiencia >= 85:
+            planejamento.classificacao = 'bom'
+        elif planejamento.eficiencia >= 70:
+            planejamento.classificacao = 'regular'
+        else:
+            planejamento.classificacao = 'ruim'
+
+def _campos_planejamento(data):
+    """Valida um registro de planejamento recebido e retorna os valores das colunas"""
+    if not isinstance(data, dict):
+        raise ValueError('Registro deve ser um objeto JSON')
+    
+    # Validar campos obrigatórios
+    required_fields = ['data', 'turno', 'equipe', 'colaborador1']
+    for field in required_fields:
+        if not data.get(field):
+            raise ValueError(f'Campo obrigatório: {field}')
+    
+    # Tipos conferidos aqui para que um registro malformado seja recusado sozinho
+    # (no lote, um TypeError adiante derrubaria a requisição inteira)
+    for field in required_fields + ['colaborador2', 'veiculo', 'regiao']:
+        if data.get(field) is not None and not isinstance(data[field], str):
+            raise ValueError(f'Campo {field} deve ser texto')
+    for field in ['protocolos_nao_enviados_prazo', 'protocolos_vencem_no_turno']:
+        if isinstance(data.get(field), (list, dict)):
+            raise ValueError(f'Campo {field} deve ser um número')
+    
+    return {
+        # Converter string de data para objeto date
+        'data': datetime.strptime(data['data'], '%Y-%m-%d').date(),
+        'turno': data['turno'],
+        'equipe': data['equipe'],
+        'colaborador1': data['colaborador1'],
+        'colaborador2': data.get('colaborador2'),
+        'veiculo': data.get('veiculo'),
+        'regiao': data.get('regiao'),
+        'protocolos_nao_enviados_prazo': data.get('protocolos_nao_enviados_prazo'),
+        'protocolos_vencem_no_turno': data.get('protocolos_vencem_no_turno')
+    }
+
 @diario_bp.route('/planejamento', methods=['POST'])
 @jwt_required()
 
@@ -15,40 +123,28 @@ def criar_planejamento():
     try:
         data = request.get_json()
         
-        # Validar campos obrigatórios
-        required_fields = ['data', 'turno', 'equipe', 'colaborador1']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'Campo obrigatório: {field}'}), 400
-        
-        # Converter string de data para objeto date
-        data_obj = datetime.strptime(data['data'], '%Y-%m-%d').date()
+        try:
+            campos = _campos_planejamento(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Verificar se já existe registro para esta data/turno/equipe
         existing = DiarioPlanejamento.query.filter_by(
-            data=data_obj,
-            turno=data['turno'],
-            equipe=data['equipe']
+            data=campos['data'],
+            turno=campos['turno'],
+            equipe=campos['equipe']
         ).first()
         
         if existing:
             return jsonify({'error': 'Já existe um registro para esta data/turno/equipe'}), 409
         
         # Criar novo registro
-        novo_planejamento = DiarioPlanejamento(
-            data=data_obj,
-            turno=data['turno'],
-            equipe=data['equipe'],
-            colaborador1=data['colaborador1'],
-            colaborador2=data.get('colaborador2'),
-            veiculo=data.get('veiculo'),
-            regiao=data.get('regiao'),
-            protocolos_nao_enviados_prazo=data.get('protocolos_nao_enviados_prazo'),
-            protocolos_vencem_no_turno=data.get('protocolos_vencem_no_turno')
-        )
+        novo_planejamento = DiarioPlanejamento(**campos)
         
         db.session.add(novo_planejamento)
+        DashboardAgregado.registrar_alteracao(None, DashboardAgregado.contribuicao(novo_planejamento))
         db.session.commit()
+        _auditar('criar_planejamento', novo_planejamento)
         
         return jsonify({
             'message': 'Planejamento criado com sucesso',
@@ -60,6 +156,124 @@ def criar_planejamento():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _ler_lote():
+    """Lê o corpo da carga em lote: array JSON, {'planejamentos': [...]} ou NDJSON"""
+    if request.mimetype == 'application/x-ndjson':
+        registros = []
+        for linha in request.get_data(as_text=True).splitlines():
+            if not linha.strip():
+                continue
+            try:
+                registros.append(json.loads(linha))
+            except ValueError:
+                registros.append(None)
+        return registros
+    
+    data = request.get_json()
+    if isinstance(data, dict):
+        data = data.get('planejamentos')
+    if not isinstance(data, list):
+        raise ValueError('Envie uma lista de planejamentos')
+    return data
+
+@diario_bp.route('/planejamentos/lote', methods=['POST'])
+@jwt_required()
+def criar_planejamentos_lote():
+    """Criar vários planejamentos em uma única transação"""
+    try:
+        try:
+            registros = _ler_lote()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if len(registros) > MAX_LOTE:
+            return jsonify({'error': f'Máximo de {MAX_LOTE} registros por lote'}), 413
+        
+        tudo_ou_nada = request.args.get('all_or_nothing', '').lower() in ('1', 'true')
+        
+        # Validação de todos os registros em uma passada
+        resultados = []
+        validos = {}
+        for indice, registro in enumerate(registros):
+            try:
+                campos = _campos_planejamento(registro)
+            except ValueError as e:
+                resultados.append({'index': indice, 'status': 'invalido', 'error': str(e)})
+                continue
+            
+            chave = (campos['data'], campos['turno'], campos['equipe'])
+            if chave in validos:
+                resultados.append({'index': indice, 'status': 'duplicado', 'error': 'Registro repetido no lote'})
+                continue
+            validos[chave] = (indice, campos)
+            resultados.append(None)
+        
+        # Duplicidades com o banco resolvidas em uma única consulta
+        if validos:
+            chave_coluna = tuple_(DiarioPlanejamento.data, DiarioPlanejamento.turno, DiarioPlanejamento.equipe)
+            existentes = db.session.query(
+                DiarioPlanejamento.data, DiarioPlanejamento.turno, DiarioPlanejamento.equipe
+            ).filter(
+                # O filtro por data permite ao SQLite buscar pelo índice em vez de varrê-lo
+                DiarioPlanejamento.data.in_({data for data, _, _ in validos}),
+                chave_coluna.in_(list(validos))
+            ).all()
+            for chave in existentes:
+                indice, _ = validos.pop(tuple(chave))
+                resultados[indice] = {
+                    'index': indice,
+                    'status': 'duplicado',
+                    'error': 'Já existe um registro para esta data/turno/equipe'
+                }
+        
+        falhas = [r for r in resultados if r is not None]
+        if tudo_ou_nada and falhas:
+            return jsonify({'criados': 0, 'falhas': len(falhas), 'resultados': falhas}), 400
+        
+        # Inserção em lote, com os ids devolvidos na ordem dos registros
+        linhas = [campos for _, campos in validos.values()]
+        if linhas:
+            agora = datetime.utcnow()
+            for campos in linhas:
+                campos['created_at'] = campos['updated_at'] = agora
+            ids = db.session.scalars(
+                insert(DiarioPlanejamento).returning(DiarioPlanejamento.id, sort_by_parameter_order=True),
+                linhas
+            ).all()
+            # O INSERT em lote não passa pelos eventos do ORM: diário de sync gravado aqui
+            db.session.execute(insert(SyncAlteracao), [
+                {'registro_id': novo_id, 'campos': None, 'removido': False, 'alterado_em': agora} for novo_id in ids
+            ])
+            for (indice, _), novo_id in zip(validos.values(), ids):
+                resultados[indice] = {'index': indice, 'status': 'criado', 'id': novo_id}
+            DashboardAgregado.registrar_inclusoes(
+                DashboardAgregado.contribuicao(DiarioPlanejamento(**campos)) for campos in linhas
+            )
+            db.session.commit()
+            usuario_id = _usuario_atual()
+            for campos, novo_id in zip(linhas, ids):
+                audit_log.record(
+                    'criar_planejamento_lote',
+                    tabela_afetada=DiarioPlanejamento.__tablename__,
+                    registro_id=novo_id,
+                    dados_novos=campos,
+                    usuario_id=usuario_id
+                )
+            eventos.publish('planejamentos_lote', {'acao': 'criar_planejamento_lote', 'ids': ids})
+        
+        return jsonify({
+            'criados': len(linhas),
+            'falhas': len(falhas),
+            'resultados': resultados
+        }), 201 if linhas else 400
+        
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Conflito com registros gravados simultaneamente, reenvie o lote'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @diario_bp.route('/triagem/<int:planejamento_id>', methods=['PUT'])
 @jwt_required()
 
@@ -67,6 +281,7 @@ def atualizar_acompanhamento(planejamento_id):
     """Atualizar dados de acompanhamento da equipe"""
     try:
         planejamento = DiarioPlanejamento.query.get_or_404(planejamento_id)
+        snapshot = serializer_for(DiarioPlanejamento).dump(planejamento)
         data = request.get_json()
 
         def to_time(time_str):
@@ -81,6 +296,7 @@ def atualizar_acompanhamento(planejamento_id):
         planejamento.horario_chegada_base = to_time(data.get('horario_chegada_base'))
         
         db.session.commit()
+        _auditar('atualizar_acompanhamento', planejamento, snapshot)
         
         return jsonify({
             'message': 'Acompanhamento atualizado com sucesso',
@@ -95,6 +311,8 @@ def atualizar_triagem(planejamento_id):
     """Atualizar dados da triagem"""
     try:
         planejamento = DiarioPlanejamento.query.get_or_404(planejamento_id)
+        antes = DashboardAgregado.contribuicao(planejamento)
+        snapshot = serializer_for(DiarioPlanejamento).dump(planejamento)
         data = request.get_json()
         
         # Atualizar campos da triagem
@@ -105,16 +323,11 @@ def atualizar_triagem(planejamento_id):
         planejamento.total_protocolos = data.get('total_protocolos')
         
         # Calcular status baseado no percentual de vencidos
-        if planejamento.total_protocolos and planejamento.total_protocolos > 0:
-            percentual_vencidos = (planejamento.protocolos_vencidos / planejamento.total_protocolos) * 100
-            if percentual_vencidos > 30:
-                planejamento.status_triagem = 'critico'
-            elif percentual_vencidos > 15:
-                planejamento.status_triagem = 'atencao'
-            else:
-                planejamento.status_triagem = 'normal'
+        _calcular_status_triagem(planejamento)
         
+        DashboardAgregado.registrar_alteracao(antes, DashboardAgregado.contribuicao(planejamento))
         db.session.commit()
+        _auditar('atualizar_triagem', planejamento, snapshot)
         
         return jsonify({
             'message': 'Triagem atualizada com sucesso',
@@ -130,6 +343,8 @@ def atualizar_execucao(planejamento_id):
     """Atualizar dados da execução"""
     try:
         planejamento = DiarioPlanejamento.query.get_or_404(planejamento_id)
+        antes = DashboardAgregado.contribuicao(planejamento)
+        snapshot = serializer_for(DiarioPlanejamento).dump(planejamento)
         data = request.get_json()
         
         # Atualizar campos da execução
@@ -139,20 +354,11 @@ def atualizar_execucao(planejamento_id):
         planejamento.comentario_execucao = data.get('comentario_execucao')
         
         # Calcular eficiência
-        if planejamento.total_protocolos and planejamento.total_protocolos > 0:
-            planejamento.eficiencia = round((planejamento.atendido / planejamento.total_protocolos) * 100)
-            
-            # Determinar classificação
-            if planejamento.eficiencia >= 95:
-                planejamento.classificacao = 'excelente'
-            elif planejamento.eficiencia >= 85:
-                planejamento.classificacao = 'bom'
-            elif planejamento.eficiencia >= 70:
-                planejamento.classificacao = 'regular'
-            else:
-                planejamento.classificacao = 'ruim'
+        _calcular_eficiencia(planejamento)
         
+        DashboardAgregado.registrar_alteracao(antes, DashboardAgregado.contribuicao(planejamento))
         db.session.commit()
+        _auditar('atualizar_execucao', planejamento, snapshot)
         
         return jsonify({
             'message': 'Execução atualizada com sucesso',
@@ -168,6 +374,8 @@ def atualizar_supervisao(planejamento_id):
     """Atualizar dados da supervisão"""
     try:
         planejamento = DiarioPlanejamento.query.get_or_404(planejamento_id)
+        antes = DashboardAgregado.contribuicao(planejamento)
+        snapshot = serializer_for(DiarioPlanejamento).dump(planejamento)
         data = request.get_json()
         
         # Atualizar campos da supervisão
@@ -176,7 +384,9 @@ def atualizar_supervisao(planejamento_id):
         planejamento.pontos_atencao = data.get('pontos_atencao', False)
         planejamento.status_final = 'supervisionado'
         
+        DashboardAgregado.registrar_alteracao(antes, DashboardAgregado.contribuicao(planejamento))
         db.session.commit()
+        _auditar('atualizar_supervisao', planejamento, snapshot)
         
         return jsonify({
             'message': 'Supervisão atualizada com sucesso',
@@ -192,6 +402,8 @@ def gerar_relatorio(planejamento_id):
     """Gerar relatório final"""
     try:
         planejamento = DiarioPlanejamento.query.get_or_404(planejamento_id)
+        antes = DashboardAgregado.contribuicao(planejamento)
+        snapshot = serializer_for(DiarioPlanejamento).dump(planejamento)
         
         # Gerar relatório consolidado
         relatorio = {
@@ -241,8 +453,10 @@ def gerar_relatorio(planejamento_id):
         
         # Marcar planejamento como finalizado
         planejamento.status_final = 'finalizado'
+        DashboardAgregado.registrar_alteracao(antes, DashboardAgregado.contribuicao(planejamento))
         
         db.session.commit()
+        _auditar('gerar_relatorio', planejamento, snapshot)
         
         return jsonify({
             'message': 'Relatório gerado com sucesso',
@@ -253,9 +467,54 @@ def gerar_relatorio(planejamento_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@diario_bp.route('/planejamento/<int:planejamento_id>', methods=['DELETE'])
+@jwt_required()
+def remover_planejamento(planejamento_id):
+    """Remover um planejamento (clientes sincronizados recebem o tombstone em /sync)"""
+    try:
+        planejamento = db.session.get(DiarioPlanejamento, planejamento_id)
+        if planejamento is None:
+            return jsonify({'error': 'Planejamento não encontrado'}), 404
+        snapshot = serializer_for(DiarioPlanejamento).dump(planejamento)
+        
+        DashboardAgregado.registrar_alteracao(DashboardAgregado.contribuicao(planejamento), None)
+        db.session.delete(planejamento)
+        db.session.commit()
+        
+        audit_log.record(
+            'remover_planejamento',
+            tabela_afetada=DiarioPlanejamento.__tablename__,
+            registro_id=planejamento_id,
+            dados_anteriores=snapshot,
+            usuario_id=_usuario_atual()
+        )
+        eventos.publish('planejamento', {'acao': 'remover_planejamento',
+                                         **{campo: snapshot[campo] for campo in CAMPOS_EVENTO}, 'removido': True})
+        
+        return jsonify({'message': 'Planejamento removido com sucesso'})
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# Tamanho do lote lido do banco no modo de exportação em streaming
+STREAM_CHUNK_SIZE = 500
+
+def _wants_ndjson():
+    """Verifica se o cliente pediu a saída em NDJSON (streaming)"""
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+def _stream_ndjson(query, fields=None):
+    """Gera uma linha JSON por registro sem montar a lista inteira em memória"""
+    serializer = serializer_for(query.column_descriptions[0]['entity'])
+    for registro in query.yield_per(STREAM_CHUNK_SIZE):
+        yield dumps(serializer.dump(registro, fields)) + b'\n'
+
 @diario_bp.route('/planejamentos', methods=['GET'])
 def listar_planejamentos():
-    """Listar planejamentos com filtros opcionais"""
+    """Listar planejamentos com filtros opcionais e paginação por cursor"""
     try:
         # Parâmetros de filtro
         data_inicio = request.args.get('data_inicio')
@@ -280,12 +539,40 @@ def listar_planejamentos():
         if turno:
             query = query.filter(DiarioPlanejamento.turno == turno)
         
-        # Ordenar por data mais recente
-        planejamentos = query.order_by(DiarioPlanejamento.data.desc()).all()
-        
-        return jsonify({
-            'planejamentos': [p.to_dict() for p in planejamentos],
-            'total': len(planejamentos)
+        # Campos esparsos (?fields=): só as colunas pedidas saem do banco
+        fields = parse_fields(request.args.get('fields'))
+        serializer = serializer_for(DiarioPlanejamento)
+        if fields:
+            try:
+                colunas = serializer.columns(fields)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            query = query.options(load_only(DiarioPlanejamento.data, *colunas))
+        
+        # Exportação: uma linha por registro, lida do banco em lotes
+        if _wants_ndjson():
+            query = query.order_by(DiarioPlanejamento.data.desc(), DiarioPlanejamento.id.desc())
+            return Response(stream_with_context(_stream_ndjson(query, fields)), mimetype='application/x-ndjson')
+        
+        # Ordenar por data mais recente, paginando pela chave (data, id)
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            planejamentos, next_cursor = keyset_page(
+                query,
+                DiarioPlanejamento.data,
+                DiarioPlanejamento.id,
+                cursor=request.args.get('cursor'),
+                limit=limit
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return json_response({
+            'planejamentos': serializer.dump_many(planejamentos, fields),
+            # Registros desta página; o total da consulta exigiria um COUNT sobre a tabela
+            'quantidade': len(planejamentos),
+            'limit': limit,
+            'next_cursor': next_cursor
         })
         
     except Exception as e:
@@ -296,20 +583,28 @@ def obter_planejamento(planejamento_id):
     """Obter planejamento específico"""
     try:
         planejamento = DiarioPlanejamento.query.get_or_404(planejamento_id)
-        return jsonify(planejamento.to_dict())
+        try:
+            return json_response(serializer_for(DiarioPlanejamento).dump(
+                planejamento, parse_fields(request.args.get('fields'))
+            ))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @diario_bp.route('/relatorios', methods=['GET'])
 def listar_relatorios():
-    """Listar relatórios gerados"""
+    """Listar relatórios gerados (resumo; ?include=relatorio traz os corpos)"""
     try:
         # Parâmetros de filtro
         data_inicio = request.args.get('data_inicio')
         data_fim = request.args.get('data_fim')
         equipe = request.args.get('equipe')
+        incluir_corpo = request.args.get('include') == 'relatorio'
         
         query = RelatoriosDiarios.query
+        if not incluir_corpo:
+            query = query.options(defer(RelatoriosDiarios.relatorio_json))
         
         # Aplicar filtros
         if data_inicio:
@@ -323,59 +618,347 @@ def listar_relatorios():
         if equipe:
             query = query.filter(RelatoriosDiarios.equipe.ilike(f'%{equipe}%'))
         
-        # Ordenar por data mais recente
-        relatorios = query.order_by(RelatoriosDiarios.data.desc()).all()
+        # Ordenar por data mais recente, paginando pela chave (data, id)
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            relatorios, next_cursor = keyset_page(
+                query,
+                RelatoriosDiarios.data,
+                RelatoriosDiarios.id,
+                cursor=request.args.get('cursor'),
+                limit=limit
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if incluir_corpo:
+            itens = ', '.join(r.to_json_text() for r in relatorios)
+        else:
+            itens = ', '.join(json.dumps(r.to_summary_dict()) for r in relatorios)
+        # quantidade = relatórios desta página (o total da consulta exigiria um COUNT)
+        pagina = json.dumps({'quantidade': len(relatorios), 'limit': limit, 'next_cursor': next_cursor})
+        
+        response = Response(f'{{"relatorios": [{itens}], {pagina[1:]}', mimetype='application/json')
+        response.add_etag()
+        return response.make_conditional(request)
         
-        return jsonify({
-            'relatorios': [r.to_dict() for r in relatorios],
-            'total': len(relatorios)
-        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@diario_bp.route('/relatorios/<int:relatorio_id>', methods=['GET'])
+def obter_relatorio(relatorio_id):
+    """Obter um relatório, servido direto do JSON gravado e validado por ETag"""
+    try:
+        cached = relatorio_cache.get(relatorio_id)
+        if cached is None:
+            relatorio = RelatoriosDiarios.query.get(relatorio_id)
+            if not relatorio:
+                return jsonify({'error': 'Relatório não encontrado'}), 404
+            cached = (relatorio.etag, relatorio.to_json_text())
+            relatorio_cache.set(relatorio_id, cached)
+        etag, corpo = cached
+        
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(corpo, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @diario_bp.route('/dashboard', methods=['GET'])
+@jwt_required()
 def dashboard():
     """Obter dados para dashboard"""
     current_user = get_jwt_identity()
 
     try:
-        # Estatísticas gerais
-        total_planejamentos = DiarioPlanejamento.query.count()
-        planejamentos_finalizados = DiarioPlanejamento.query.filter_by(status_final='finalizado').count()
+        # Estatísticas gerais, lidas dos totais pré-calculados por dia/status
+        hoje = date.today()
+        linhas = db.session.query(
+            DashboardAgregado.status,
+            db.func.sum(DashboardAgregado.total_planejamentos),
+            db.func.sum(DashboardAgregado.soma_eficiencia),
+            db.func.sum(DashboardAgregado.qtd_eficiencia),
+            db.func.sum(DashboardAgregado.soma_nao_enviados),
+            db.func.sum(db.case((DashboardAgregado.data == hoje, DashboardAgregado.soma_vencem_no_turno), else_=0))
+        ).group_by(DashboardAgregado.status).all()
+        
+        status_counts = {}
+        soma_eficiencia = qtd_eficiencia = 0
+        total_protocolos_nao_enviados = total_protocolos_vencem_hoje = 0
+        for status, total, soma_efic, qtd_efic, nao_enviados, vencem_hoje in linhas:
+            if total:
+                status_counts[status] = total
+            soma_eficiencia += soma_efic or 0
+            qtd_eficiencia += qtd_efic or 0
+            total_protocolos_nao_enviados += nao_enviados or 0
+            total_protocolos_vencem_hoje += vencem_hoje or 0
         
         # Eficiência média
-        eficiencia_media = db.session.query(db.func.avg(DiarioPlanejamento.eficiencia)).filter(
-            DiarioPlanejamento.eficiencia.isnot(None)
-        ).scalar() or 0
-        
-        # Planejamentos por status
-        status_counts = db.session.query(
-            DiarioPlanejamento.status_final,
-            db.func.count(DiarioPlanejamento.id)
-        ).group_by(DiarioPlanejamento.status_final).all()
+        eficiencia_media = soma_eficiencia / qtd_eficiencia if qtd_eficiencia else 0
         
         # Planejamentos recentes
         planejamentos_recentes = DiarioPlanejamento.query.order_by(
             DiarioPlanejamento.created_at.desc()
         ).limit(5).all()
 
-        total_protocolos_nao_enviados = db.session.query(db.func.sum(DiarioPlanejamento.protocolos_nao_enviados_prazo)).scalar()
-        total_protocolos_vencem_hoje = db.session.query(db.func.sum(DiarioPlanejamento.protocolos_vencem_no_turno)).filter(DiarioPlanejamento.data == date.today()).scalar()
-
-        
-        return jsonify({
+        return json_response({
         'estatisticas': {
-            'total_planejamentos': total_planejamentos,
-            'planejamentos_finalizados': planejamentos_finalizados,
+            'total_planejamentos': sum(status_counts.values()),
+            'planejamentos_finalizados': status_counts.get('finalizado', 0),
             'eficiencia_media': round(eficiencia_media, 2),
-            'status_counts': dict(status_counts),
-            'total_protocolos_nao_enviados': total_protocolos_nao_enviados or 0,
-            'total_protocolos_vencem_hoje': total_protocolos_vencem_hoje or 0,
+            'status_counts': status_counts,
+            'total_protocolos_nao_enviados': total_protocolos_nao_enviados,
+            'total_protocolos_vencem_hoje': total_protocolos_vencem_hoje,
         },
-        'planejamentos_recentes': [p.to_dict() for p in planejamentos_recentes]
+        'planejamentos_recentes': serializer_for(DiarioPlanejamento).dump_many(planejamentos_recentes)
     })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Campos que os clientes de campo podem editar offline (os mesmos das rotas PUT)
+CAMPOS_EDITAVEIS = {
+    'horario_saida_base', 'horario_primeiro_atendimento', 'horario_inicio_intervalo',
+    'horario_fim_intervalo', 'horario_ultimo_atendimento', 'horario_chegada_base',
+    'protocolos_prazo', 'protocolos_vencidos', 'protocolos_nao_enviados_prazo',
+    'protocolos_vencem_no_turno', 'total_protocolos', 'comentario_triagem',
+    'atendido', 'impossibilidade', 'nao_executado', 'comentario_execucao',
+    'comentario_supervisor', 'sentimento_supervisao', 'pontos_atencao',
+}
+CAMPOS_TRIAGEM = {'protocolos_vencidos', 'total_protocolos'}
+CAMPOS_EXECUCAO = {'atendido', 'total_protocolos'}
+CAMPOS_SUPERVISAO = {'comentario_supervisor', 'sentimento_supervisao', 'pontos_atencao'}
+
+# Alterações entregues por página de /sync
+SYNC_LIMIT = 500
+
+def _valor_coluna(campo, valor):
+    """Converte o valor JSON de uma edição para o tipo da coluna"""
+    if valor is None:
+        return None
+    tipo = DiarioPlanejamento.__table__.c[campo].type
+    if isinstance(tipo, db.Time):
+        return datetime.strptime(valor, '%H:%M:%S').time()
+    if isinstance(tipo, db.Boolean):
+        # bool("false") seria True: só booleanos JSON ou os textos explícitos
+        if isinstance(valor, bool):
+            return valor
+        if isinstance(valor, str) and valor.strip().lower() in ('true', 'false'):
+            return valor.strip().lower() == 'true'
+        raise ValueError(f'{campo} deve ser true ou false')
+    if isinstance(tipo, db.Integer):
+        return int(valor)
+    return str(valor)
+
+def _data_utc(valor):
+    """Data ISO 8601 como datetime ingênuo em UTC, como os updated_at gravados ('Z' e fusos são convertidos)"""
+    data = datetime.fromisoformat(valor)
+    if data.tzinfo is not None:
+        data = data.astimezone(timezone.utc).replace(tzinfo=None)
+    return data
+
+def _ler_since(valor):
+    """?since= aceita o cursor devolvido pelo /sync ou um updated_at ISO 8601"""
+    if valor.isdigit():
+        return int(valor), None
+    try:
+        return None, _data_utc(valor)
+    except ValueError:
+        raise ValueError('since deve ser o cursor devolvido pelo /sync ou uma data ISO 8601')
+
+@diario_bp.route('/sync', methods=['GET'])
+@jwt_required()
+def sync():
+    """Alterações de planejamentos desde o último sync: só as linhas e os campos alterados.
+
+    Sem `since`, devolve apenas o cursor atual (obtenha-o antes da carga
+    completa por /planejamentos). Com `reset`, o cursor é anterior ao que o
+    servidor ainda guarda e o cliente precisa recarregar tudo.
+    """
+    try:
+        try:
+            limit = parse_limit(request.args.get('limit'), default=SYNC_LIMIT, maximo=MAX_LOTE)
+            since = request.args.get('since', '').strip()
+            cursor, desde = _ler_since(since) if since else (None, None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if cursor is None and desde is None:
+            atual = db.session.query(db.func.max(SyncAlteracao.id)).scalar() or 0
+            return json_response({'cursor': str(atual), 'alterados': [], 'removidos': [], 'mais': False, 'reset': False})
+        
+        reset = False
+        if cursor is not None:
+            # Entradas já expurgadas pela retenção (não dá para montar o delta) ou
+            # cursor além do último id (banco recriado): o cliente recarrega tudo
+            # Subconsultas separadas: min e max juntos na mesma consulta varrem a tabela
+            primeiro, ultimo = db.session.query(
+                db.select(db.func.min(SyncAlteracao.id)).scalar_subquery(),
+                db.select(db.func.max(SyncAlteracao.id)).scalar_subquery()
+            ).one()
+            reset = cursor > 0 and (ultimo is None or cursor > ultimo or cursor < primeiro - 1)
+        else:
+            # Data vira cursor pelo índice de alterado_em; a paginação segue sempre pelo id
+            primeiro = db.session.query(db.func.min(SyncAlteracao.id)).filter(SyncAlteracao.alterado_em > desde).scalar()
+            cursor = primeiro - 1 if primeiro is not None else db.session.query(db.func.max(SyncAlteracao.id)).scalar() or 0
+        entradas = db.session.query(
+            SyncAlteracao.id, SyncAlteracao.registro_id, SyncAlteracao.campos, SyncAlteracao.removido
+        ).filter(SyncAlteracao.id > cursor).order_by(SyncAlteracao.id).limit(limit + 1).all()
+        mais = len(entradas) > limit
+        entradas = entradas[:limit]
+        
+        # Junta as entradas por registro: união dos campos alterados (None = registro inteiro)
+        alterados = {}
+        removidos = {}
+        for _, registro_id, campos, removido in entradas:
+            if removido:
+                alterados.pop(registro_id, None)
+                removidos[registro_id] = True
+                continue
+            removidos.pop(registro_id, None)
+            if campos is None:
+                alterados[registro_id] = None
+            elif alterados.get(registro_id, ()) is not None:
+                alterados.setdefault(registro_id, set()).update(campos.split(','))
+        
+        serializer = serializer_for(DiarioPlanejamento)
+        linhas = []
+        if alterados:
+            registros = DiarioPlanejamento.query.filter(DiarioPlanejamento.id.in_(list(alterados))).all()
+            for registro in registros:
+                campos = alterados[registro.id]
+                fields = None if campos is None else ('id', 'updated_at', *sorted(campos & serializer.fields.keys()))
+                linhas.append(serializer.dump(registro, fields))
+        
+        return json_response({
+            'cursor': str(entradas[-1][0] if entradas else cursor),
+            'alterados': linhas,
+            'removidos': list(removidos),
+            'mais': mais,
+            'reset': reset,
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@diario_bp.route('/sync', methods=['POST'])
+@jwt_required()
+def sync_edicoes():
+    """Aplica edições feitas offline em uma transação, com detecção de conflito por registro.
+
+    Cada edição traz o id, os campos alterados e em `base` o updated_at do
+    registro quando o cliente o recebeu. Se outro cliente alterou depois
+    disso algum dos mesmos campos, a edição volta como conflito com os
+    valores atuais do servidor; alterações em campos diferentes são
+    aplicadas normalmente. Bases anteriores ao diário ainda retido
+    conflitam em todos os campos editados.
+    """
+    try:
+        data = request.get_json(silent=True)
+        edicoes = data.get('edicoes') if isinstance(data, dict) else None
+        if not isinstance(edicoes, list):
+            return jsonify({'error': 'Envie {"edicoes": [...]}'}), 400
+        if len(edicoes) > MAX_LOTE:
+            return jsonify({'error': f'Máximo de {MAX_LOTE} edições por sincronização'}), 413
+        
+        resultados = [None] * len(edicoes)
+        validas = {}
+        for indice, edicao in enumerate(edicoes):
+            try:
+                if not isinstance(edicao, dict) or not isinstance(edicao.get('id'), int):
+                    raise ValueError('Edição deve ter o id do planejamento')
+                campos = edicao.get('campos')
+                if not isinstance(campos, dict) or not campos:
+                    raise ValueError('Edição sem campos')
+                invalidos = sorted(set(campos) - CAMPOS_EDITAVEIS)
+                if invalidos:
+                    raise ValueError(f"Campos não editáveis: {', '.join(invalidos)}")
+                if edicao['id'] in validas:
+                    raise ValueError('Planejamento repetido na mesma sincronização')
+                if not edicao.get('base'):
+                    raise ValueError('Edição sem base (updated_at recebido do servidor)')
+                valores = {campo: _valor_coluna(campo, valor) for campo, valor in campos.items()}
+                base = _data_utc(edicao['base'])
+            except (TypeError, ValueError) as e:
+                resultados[indice] = {'id': edicao.get('id') if isinstance(edicao, dict) else None,
+                                      'status': 'invalido', 'error': str(e)}
+                continue
+            validas[edicao['id']] = (indice, valores, base)
+        
+        # Registros e alterações posteriores às bases em duas consultas, para o lote todo
+        registros = {}
+        alteracoes = {}
+        retido_desde = None
+        if validas:
+            # Antes disso a retenção já expurgou o diário: não há como saber o que mudou
+            retido_desde = db.session.query(db.func.min(SyncAlteracao.alterado_em)).scalar()
+            registros = {registro.id: registro for registro in
+                         DiarioPlanejamento.query.filter(DiarioPlanejamento.id.in_(list(validas))).all()}
+            for registro_id, campos, alterado_em in db.session.query(
+                SyncAlteracao.registro_id, SyncAlteracao.campos, SyncAlteracao.alterado_em
+            ).filter(
+                SyncAlteracao.registro_id.in_(list(validas)),
+                SyncAlteracao.alterado_em > min(base for _, _, base in validas.values()),
+                SyncAlteracao.campos.isnot(None)
+            ):
+                alteracoes.setdefault(registro_id, []).append((alterado_em, campos.split(',')))
+        
+        serializer = serializer_for(DiarioPlanejamento)
+        aplicadas = []
+        for registro_id, (indice, valores, base) in validas.items():
+            planejamento = registros.get(registro_id)
+            if planejamento is None:
+                resultados[indice] = {'id': registro_id, 'status': 'removido'}
+                continue
+            
+            if planejamento.updated_at != base:
+                if retido_desde is None or base < retido_desde:
+                    # Base mais antiga que o diário retido: todos os campos editados conflitam
+                    conflitos = sorted(valores)
+                else:
+                    alterados = {campo for alterado_em, campos in alteracoes.get(registro_id, ())
+                                 if alterado_em > base for campo in campos}
+                    conflitos = sorted(alterados & valores.keys())
+                if conflitos:
+                    resultados[indice] = {
+                        'id': registro_id,
+                        'status': 'conflito',
+                        'campos': conflitos,
+                        'servidor': serializer.dump(planejamento, ('id', 'updated_at', *conflitos)),
+                    }
+                    continue
+            
+            antes = DashboardAgregado.contribuicao(planejamento)
+            snapshot = serializer.dump(planejamento)
+            for campo, valor in valores.items():
+                setattr(planejamento, campo, valor)
+            if CAMPOS_TRIAGEM & valores.keys():
+                _calcular_status_triagem(planejamento)
+            if CAMPOS_EXECUCAO & valores.keys():
+                _calcular_eficiencia(planejamento)
+            if CAMPOS_SUPERVISAO & valores.keys():
+                planejamento.status_final = 'supervisionado'
+            DashboardAgregado.registrar_alteracao(antes, DashboardAgregado.contribuicao(planejamento))
+            aplicadas.append((indice, planejamento, snapshot))
+        
+        # Valores gravados lidos antes do commit (depois dele o ORM recarregaria cada registro)
+        db.session.flush()
+        novos = [serializer.dump(planejamento) for _, planejamento, _ in aplicadas]
+        db.session.commit()
+        for (indice, planejamento, snapshot), novo in zip(aplicadas, novos):
+            resultados[indice] = {'id': novo['id'], 'status': 'aplicado', 'updated_at': novo['updated_at']}
+            _auditar('sync_offline', planejamento, snapshot, novo)
+        
+        return json_response({
+            'aplicadas': len(aplicadas),
+            'resultados': resultados,
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
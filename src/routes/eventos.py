@@ -0,0 +1,49 @@
+from flask import Blueprint, request, jsonify, Response
+from src.utils.events import eventos, ClientesEsgotados
+from flask_jwt_extended import jwt_required
+
+eventos_bp = Blueprint('eventos', __name__)
+
+# Espera máxima (segundos) de uma requisição de long-poll
+MAX_ESPERA = 30
+
+@eventos_bp.route('/eventos', methods=['GET'])
+# EventSource não envia cabeçalhos: o token também é aceito em ?jwt=
+@jwt_required(locations=['headers', 'query_string'])
+def feed():
+    """Feed ao vivo das alterações dos diários, em SSE ou long-poll.
+
+    O token de retomada vem em Last-Event-ID (reconexão do EventSource) ou
+    em ?desde=; sem token, só chegam os eventos publicados a partir de agora.
+    """
+    try:
+        token = request.headers.get('Last-Event-ID') or request.args.get('desde')
+
+        if request.accept_mimetypes.best == 'text/event-stream' or request.args.get('format') == 'sse':
+            try:
+                frames = eventos.stream(token)
+            except ClientesEsgotados as e:
+                return jsonify({'error': str(e)}), 503
+            response = Response(frames, mimetype='text/event-stream')
+            response.headers['Cache-Control'] = 'no-cache'
+            # Proxies (nginx) não devem segurar os eventos em buffer
+            response.headers['X-Accel-Buffering'] = 'no'
+            return response
+
+        try:
+            espera = min(max(float(request.args.get('espera', 25)), 0), MAX_ESPERA)
+        except ValueError:
+            return jsonify({'error': 'espera deve ser um número de segundos'}), 400
+
+        lista, proximo, reset = eventos.poll(token, espera)
+        # Os dados de cada evento já estão serializados: só são concatenados
+        corpo = b'{"token":"%s","reset":%s,"eventos":[%s]}' % (
+            proximo.encode(),
+            b'true' if reset else b'false',
+            b','.join(b'{"id":"%s","tipo":"%s","dados":%s}' % (eventos.token(seq).encode(), tipo.encode(), dados)
+                      for seq, tipo, dados, _ in lista)
+        )
+        return Response(corpo, mimetype='application/json')
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,44 @@
+from flask import Blueprint, request, jsonify, send_from_directory
+from src.models.diario import db
+from src.database.export_bi import EXPORT_DIR, TABELAS, exportar, ler_watermarks, listar_partes
+from flask_jwt_extended import jwt_required
+
+exportacao_bp = Blueprint('exportacao', __name__)
+
+@exportacao_bp.route('/export', methods=['POST'])
+@jwt_required()
+def executar_exportacao():
+    """Exporta as linhas alteradas desde a última watermark (tabelas do banco da aplicação)"""
+    try:
+        tabelas = (request.get_json(silent=True) or {}).get('tabelas')
+        invalidas = [tabela for tabela in tabelas or [] if tabela not in TABELAS]
+        if invalidas:
+            return jsonify({'error': f'Tabelas desconhecidas: {", ".join(invalidas)}'}), 400
+
+        exportadas = exportar([db.engine], tabelas)
+        return jsonify({'exportadas': exportadas, 'watermarks': ler_watermarks()})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@exportacao_bp.route('/export', methods=['GET'])
+@jwt_required()
+def manifesto_exportacao():
+    """Watermarks e partes disponíveis, na ordem em que devem ser aplicadas"""
+    try:
+        tabela = request.args.get('tabela')
+        if tabela and tabela not in TABELAS:
+            return jsonify({'error': f'Tabela desconhecida: {tabela}'}), 400
+
+        return jsonify({'watermarks': ler_watermarks(), 'partes': listar_partes(tabela=tabela)})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@exportacao_bp.route('/export/<path:caminho>', methods=['GET'])
+@jwt_required()
+def baixar_parte(caminho):
+    """Download de uma parte listada no manifesto (servida do disco, sem carregar em memória)"""
+    if caminho.split('/', 1)[0] not in TABELAS:
+        return jsonify({'error': 'Parte não encontrada'}), 404
+    return send_from_directory(EXPORT_DIR, caminho, as_attachment=True)
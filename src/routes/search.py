@@ -0,0 +1,60 @@
+from flask import Blueprint, request, jsonify
+from src.models.diario import db
+from src.database.search import FONTES, buscar_em_bancos, busca_disponivel
+from src.utils.pagination import parse_limit
+from src.utils.serialization import json_response
+from sqlalchemy.exc import OperationalError
+from flask_jwt_extended import jwt_required
+
+search_bp = Blueprint('search', __name__)
+
+# Fontes com tabela no banco da aplicação; as demais estão no banco completo (bind 'completo')
+ORIGENS = tuple(origem for origem in FONTES if origem in db.metadata.tables)
+ORIGENS_COMPLETO = tuple(origem for origem in FONTES if origem not in ORIGENS)
+
+
+def _bancos():
+    """(engine, origens) de cada banco com índice de busca"""
+    bancos = [(db.engine, ORIGENS)]
+    if 'completo' in db.engines:
+        bancos.append((db.engines['completo'], ORIGENS_COMPLETO))
+    return bancos
+
+@search_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search():
+    """Busca textual ordenada por relevância nas observações e reports"""
+    try:
+        termos = request.args.get('q', '').strip()
+        if not termos:
+            return jsonify({'error': 'Informe o texto da busca em q'}), 400
+
+        origem = request.args.get('origem')
+        if origem and origem not in FONTES:
+            return jsonify({'error': f'origem deve ser uma de: {", ".join(FONTES)}'}), 400
+
+        try:
+            limit = parse_limit(request.args.get('limit'), default=20, maximo=100)
+            offset = max(int(request.args.get('offset', 0)), 0)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        bancos = _bancos()
+        if not any(busca_disponivel(engine) for engine, _ in bancos):
+            return jsonify({'error': 'Busca textual indisponível neste banco de dados'}), 501
+
+        resultados = buscar_em_bancos(
+            bancos, termos,
+            origem=origem, equipe=request.args.get('equipe'),
+            limit=limit, offset=offset
+        )
+        return json_response({
+            'q': termos,
+            'resultados': resultados,
+            'next_offset': offset + limit if len(resultados) == limit else None
+        })
+
+    except OperationalError as e:
+        return jsonify({'error': f'Consulta de busca inválida: {e.orig}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
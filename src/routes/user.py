@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, db
+from src.utils.serialization import serializer_for, json_response
 from flask_jwt_extended import create_access_token
 
 user_bp = Blueprint('user', __name__)
@@ -43,8 +44,9 @@ def login():
 
 
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    serializer = serializer_for(User)
+    users = User.query.options(*serializer.eager_options()).all()
+    return json_response(serializer.dump_many(users))
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -57,8 +59,9 @@ def create_user():
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
-    user = User.query.get_or_404(user_id)
-    return jsonify(user.to_dict())
+    serializer = serializer_for(User)
+    user = User.query.options(*serializer.eager_options()).get_or_404(user_id)
+    return json_response(serializer.dump(user))
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
@@ -0,0 +1,223 @@
+import threading
+from collections import Counter, namedtuple
+from datetime import date, timedelta
+from statistics import StatisticsError, linear_regression
+from src.models.diario import db, DiarioPlanejamento, SyncAlteracao
+
+# Agrupamentos e janelas móveis (dias, incluindo hoje) calculados
+DIMENSOES = ('equipe', 'regiao', 'turno', 'veiculo')
+JANELAS = (7, 30, 90)
+PERCENTIS = (10, 50, 90)
+
+# Acima disso, alterações pendentes recarregam a janela inteira em vez de só os dias afetados
+MAX_ALTERACOES_INCREMENTAIS = 1000
+
+# Dias carregados até uma versão de sync_alteracao, os grupos de cada dimensão
+# nesses dias e os resultados já calculados sobre eles. Cada atualização monta
+# um Estado novo: quem ainda calcula sobre o anterior não é afetado
+Estado = namedtuple('Estado', ['hoje', 'versao', 'dias', 'grupos', 'resultados'])
+
+
+class GrupoDesconhecido(LookupError):
+    pass
+
+
+def _estatisticas(histograma):
+    """Total, média, mínimo, máximo e percentis a partir de {eficiencia: quantidade}"""
+    total = sum(histograma.values())
+    valores = sorted(histograma)
+    resultado = {
+        'turnos': total,
+        'media': round(sum(valor * qtd for valor, qtd in histograma.items()) / total, 2),
+        'min': valores[0],
+        'max': valores[-1],
+    }
+    # Percentil pelo posto mais próximo, percorrendo as contagens acumuladas uma vez
+    alvos = [(p, max(1, -(-p * total // 100))) for p in PERCENTIS]
+    acumulado = 0
+    for valor in valores:
+        acumulado += histograma[valor]
+        while alvos and acumulado >= alvos[0][1]:
+            resultado[f'p{alvos.pop(0)[0]}'] = valor
+    return resultado
+
+
+def _tendencia(pontos):
+    """Reta de mínimos quadrados (pontos de eficiência por dia) sobre as médias diárias"""
+    if len(pontos) < 2:
+        return None
+    try:
+        inclinacao, intercepto = linear_regression([x for x, _ in pontos], [y for _, y in pontos])
+    except StatisticsError:
+        return None
+    return {'inclinacao': round(inclinacao, 3), 'intercepto': round(intercepto, 2)}
+
+
+class AnalyticsEngine:
+    """Eficiência por equipe, região, turno e veículo em janelas móveis de 7/30/90 dias.
+
+    O banco entrega um extrato já agregado (histograma da eficiência por dia
+    e combinação de dimensões, em um único GROUP BY); cada dia vira um
+    histograma por grupo e as janelas somam os histogramas diários, o que dá
+    percentis exatos sem reler linhas. Os dias ficam em memória e só são
+    relidos os afetados por alterações registradas em sync_alteracao desde
+    a última consulta; os resultados ficam em cache até a próxima alteração
+    ou a virada do dia. A atualização é serializada pelo lock; os cálculos
+    rodam fora dele, sobre o Estado da atualização.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estado = None
+        self.recargas = 0
+        self.dias_relidos = 0
+
+    def _carregar(self, datas):
+        """Relê os histogramas diários das datas informadas"""
+        colunas = [getattr(DiarioPlanejamento, dimensao) for dimensao in DIMENSOES]
+        linhas = db.session.query(
+            DiarioPlanejamento.data, *colunas, DiarioPlanejamento.eficiencia, db.func.count()
+        ).filter(
+            DiarioPlanejamento.data >= min(datas),
+            DiarioPlanejamento.data <= max(datas),
+            DiarioPlanejamento.eficiencia.isnot(None)
+        ).group_by(DiarioPlanejamento.data, *colunas, DiarioPlanejamento.eficiencia).all()
+
+        dias = {data: {dimensao: {} for dimensao in DIMENSOES} for data in datas}
+        for data, *grupos, eficiencia, quantidade in linhas:
+            dia = dias.get(data)
+            if dia is None:
+                continue
+            for dimensao, grupo in zip(DIMENSOES, grupos):
+                if grupo is not None:
+                    dia[dimensao].setdefault(grupo, Counter())[eficiencia] += quantidade
+        self.dias_relidos += len(dias)
+        return dias
+
+    def _atualizar(self):
+        """Estado atual, relendo os dias alterados desde o anterior (chamado com o lock)"""
+        anterior = self._estado
+        hoje = date.today()
+        versao = db.session.query(db.func.max(SyncAlteracao.id)).scalar() or 0
+        if anterior and hoje == anterior.hoje and versao == anterior.versao:
+            return anterior
+        inicio = hoje - timedelta(days=max(JANELAS) - 1)
+        janela = [inicio + timedelta(days=d) for d in range(max(JANELAS))]
+
+        recarregar = anterior is None or versao < anterior.versao
+        afetados = set()
+        if not recarregar and versao != anterior.versao:
+            entradas = db.session.query(SyncAlteracao.registro_id, SyncAlteracao.removido).filter(
+                SyncAlteracao.id > anterior.versao
+            ).limit(MAX_ALTERACOES_INCREMENTAIS + 1).all()
+            # Remoções não guardam a data do registro: relê a janela inteira
+            recarregar = len(entradas) > MAX_ALTERACOES_INCREMENTAIS or any(removido for _, removido in entradas)
+            if not recarregar:
+                afetados = {data for data, in db.session.query(DiarioPlanejamento.data).filter(
+                    DiarioPlanejamento.id.in_({registro_id for registro_id, _ in entradas}),
+                    DiarioPlanejamento.data >= inicio
+                ).distinct()}
+
+        if recarregar:
+            dias = {}
+            self.recargas += 1
+        else:
+            # Os dias anteriores não são alterados, só substituídos: o Estado antigo continua válido
+            dias = {data: dia for data, dia in anterior.dias.items() if data >= inicio}
+        afetados.update(data for data in janela if data not in dias)
+        if afetados:
+            dias.update(self._carregar(sorted(afetados)))
+        grupos = {dimensao: frozenset(grupo for dia in dias.values() for grupo in dia[dimensao])
+                  for dimensao in DIMENSOES}
+        self._estado = Estado(hoje, versao, dias, grupos, {})
+        return self._estado
+
+    def _consultar(self, chave, calcular, estado=None):
+        if estado is None:
+            with self._lock:
+                estado = self._atualizar()
+        resultado = estado.resultados.get(chave)
+        if resultado is None:
+            # Calculado fora do lock; duas requisições simultâneas podem calcular a mesma chave
+            resultado = estado.resultados[chave] = calcular(estado)
+        return resultado
+
+    def _serie_diaria(self, estado, dimensao, grupo, janela):
+        inicio = estado.hoje - timedelta(days=janela - 1)
+        for d in range(janela):
+            data = inicio + timedelta(days=d)
+            histograma = estado.dias[data][dimensao].get(grupo)
+            yield d, data, histograma
+
+    def resumo(self, dimensao, janelas=JANELAS):
+        """Estatísticas e tendência de cada grupo da dimensão em cada janela"""
+        def calcular(estado):
+            grupos = {}
+            for janela in janelas:
+                inicio = estado.hoje - timedelta(days=janela - 1)
+                acumulados = {}
+                medias = {}
+                for d in range(janela):
+                    for grupo, histograma in estado.dias[inicio + timedelta(days=d)][dimensao].items():
+                        acumulados.setdefault(grupo, Counter()).update(histograma)
+                        total = sum(histograma.values())
+                        medias.setdefault(grupo, []).append((d, sum(v * q for v, q in histograma.items()) / total))
+                for grupo, histograma in acumulados.items():
+                    estatisticas = _estatisticas(histograma)
+                    estatisticas['tendencia'] = _tendencia(medias[grupo])
+                    grupos.setdefault(grupo, {})[str(janela)] = estatisticas
+            return {
+                'dimensao': dimensao,
+                'data_referencia': estado.hoje,
+                'grupos': [{'grupo': grupo, 'janelas': grupos[grupo]} for grupo in sorted(grupos)],
+            }
+        return self._consultar(('resumo', dimensao, tuple(janelas)), calcular)
+
+    def serie(self, dimensao, grupo, janela=max(JANELAS)):
+        """Média diária de um grupo, média móvel de 7 dias e reta de tendência.
+
+        Grupos sem turnos nos dias em memória levantam GrupoDesconhecido, para
+        que valores arbitrários do cliente não entrem no cache de resultados.
+        """
+        def calcular(estado):
+            dias = []
+            pontos = []
+            movel = []
+            for d, data, histograma in self._serie_diaria(estado, dimensao, grupo, janela):
+                total = sum(histograma.values()) if histograma else 0
+                soma = sum(v * q for v, q in histograma.items()) if histograma else 0
+                movel.append((total, soma))
+                turnos_7 = sum(t for t, _ in movel[-7:])
+                media = round(soma / total, 2) if total else None
+                if media is not None:
+                    pontos.append((d, media))
+                dias.append({
+                    'data': data,
+                    'turnos': total,
+                    'media': media,
+                    'media_movel_7': round(sum(s for _, s in movel[-7:]) / turnos_7, 2) if turnos_7 else None,
+                })
+            return {
+                'dimensao': dimensao,
+                'grupo': grupo,
+                'janela': janela,
+                'dias': dias,
+                'tendencia': _tendencia(pontos),
+            }
+        with self._lock:
+            estado = self._atualizar()
+        if grupo not in estado.grupos[dimensao]:
+            raise GrupoDesconhecido(f'grupo sem turnos nos últimos {max(JANELAS)} dias: {grupo}')
+        return self._consultar(('serie', dimensao, grupo, janela), calcular, estado)
+
+    def stats(self):
+        estado = self._estado
+        return {
+            'recargas': self.recargas,
+            'dias_relidos': self.dias_relidos,
+            'resultados_em_cache': len(estado.resultados) if estado else 0,
+        }
+
+
+# Instância única do processo (os dias em memória são compartilhados pelas requisições)
+analytics = AnalyticsEngine()
@@ -0,0 +1,169 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from flask import has_request_context, request
+from sqlalchemy import Column, Index, MetaData, Table
+from src.models.diario_completo import LogSistema
+from src.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# log_sistema no banco da aplicação: mesmas colunas e índices de LogSistema, sem a
+# chave estrangeira para user (essa tabela fica no banco completo, não neste)
+LOG_SISTEMA = Table(
+    LogSistema.__tablename__, MetaData(),
+    *[Column(coluna.name, coluna.type, primary_key=coluna.primary_key, nullable=coluna.nullable)
+      for coluna in LogSistema.__table__.columns]
+)
+for _indice in LogSistema.__table__.indexes:
+    Index(_indice.name, *[LOG_SISTEMA.c[coluna.name] for coluna in _indice.columns])
+
+
+class AuditQueue:
+    """Fila de auditoria com gravação em lote de log_sistema em uma thread própria.
+
+    As rotas só enfileiram um dict (sem serializar nem gravar); a thread de
+    escrita junta até `batch_size` entradas ou espera `flush_interval`
+    segundos e grava tudo com um único INSERT executemany. Com a fila cheia,
+    record() espera até `put_timeout` segundos (backpressure) e, se ainda
+    assim não houver espaço, grava a entrada na hora para não perdê-la.
+    """
+
+    def __init__(self, max_size=10000, batch_size=200, flush_interval=1.0, put_timeout=0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_size)
+        self._engine = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.sync_writes = 0
+        self.failures = 0
+
+    def init_app(self, app, db):
+        """Cria a tabela de log no banco da aplicação e inicia a thread de escrita"""
+        with app.app_context():
+            self._engine = db.engine
+            LOG_SISTEMA.create(bind=self._engine, checkfirst=True)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def record(self, acao, tabela_afetada=None, registro_id=None, dados_anteriores=None,
+               dados_novos=None, usuario_id=None):
+        """Enfileira uma entrada de auditoria (IP e user agent vêm da requisição atual)"""
+        entrada = {
+            'usuario_id': usuario_id,
+            'acao': acao,
+            'tabela_afetada': tabela_afetada,
+            'registro_id': registro_id,
+            'dados_anteriores': dados_anteriores,
+            'dados_novos': dados_novos,
+            'ip_address': request.remote_addr if has_request_context() else None,
+            'user_agent': request.user_agent.string if has_request_context() else None,
+            'timestamp': datetime.utcnow()
+        }
+        if self._engine is None:
+            # Fila não configurada (scripts e apps sem init_app): auditoria desativada
+            return
+        if self._thread is None:
+            self._write([entrada])
+            return
+        try:
+            self._queue.put(entrada, timeout=self.put_timeout)
+            with self._lock:
+                self.enqueued += 1
+        except queue.Full:
+            with self._lock:
+                self.sync_writes += 1
+            self._write([entrada])
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            lote = []
+            limite = time.monotonic() + self.flush_interval
+            while len(lote) < self.batch_size:
+                try:
+                    if self._stop.is_set():
+                        # Encerrando: drenar o que houver sem esperar o intervalo
+                        lote.append(self._queue.get_nowait())
+                        continue
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    lote.append(self._queue.get(timeout=restante))
+                except queue.Empty:
+                    break
+            if lote:
+                self._write(lote)
+                for _ in lote:
+                    self._queue.task_done()
+
+    def _write(self, entradas, tentativas=3):
+        """Grava um lote com executemany, tentando novamente em caso de erro"""
+        linhas = [
+            dict(entrada,
+                 dados_anteriores=self._json(entrada['dados_anteriores']),
+                 dados_novos=self._json(entrada['dados_novos']))
+            for entrada in entradas
+        ]
+        for tentativa in range(1, tentativas + 1):
+            try:
+                with self._engine.begin() as conn:
+                    conn.execute(LOG_SISTEMA.insert(), linhas)
+                with self._lock:
+                    self.written += len(linhas)
+                    self.batches += 1
+                return
+            except Exception:
+                if tentativa == tentativas:
+                    with self._lock:
+                        self.failures += len(linhas)
+                    logger.exception('Falha ao gravar %d entradas de auditoria: %s', len(linhas), linhas)
+                    return
+                time.sleep(0.1 * 2 ** tentativa)
+
+    @staticmethod
+    def _json(valor):
+        return dumps(valor).decode() if valor is not None else None
+
+    def flush(self):
+        """Bloqueia até todas as entradas enfileiradas serem gravadas"""
+        self._queue.join()
+
+    def shutdown(self):
+        """Para a thread de escrita depois de gravar tudo o que está na fila"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'batches': self.batches,
+                'sync_writes': self.sync_writes,
+                'failures': self.failures
+            }
+
+
+# Fila única do processo, configurada por variáveis de ambiente
+audit_log = AuditQueue(
+    max_size=int(os.environ.get('AUDIT_QUEUE_SIZE', 10000)),
+    batch_size=int(os.environ.get('AUDIT_BATCH_SIZE', 200)),
+    flush_interval=float(os.environ.get('AUDIT_FLUSH_INTERVAL', 1.0)),
+    put_timeout=float(os.environ.get('AUDIT_PUT_TIMEOUT', 0.5))
+)
@@ -0,0 +1,54 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Cache LRU em memória do processo, com expiração por tempo.
+
+    Cada worker tem a sua cópia: a invalidação explícita vale só para o
+    processo atual e o TTL limita quanto tempo os demais ficam desatualizados.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        """Retorna o valor em cache ou None se ausente/expirado"""
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is not None:
+                valor, expira_em = item
+                if expira_em > time.monotonic():
+                    self._dados.move_to_end(chave)
+                    self.hits += 1
+                    return valor
+                del self._dados[chave]
+            self.misses += 1
+            return None
+
+    def set(self, chave, valor):
+        """Armazena um valor, descartando o menos usado quando cheio"""
+        with self._lock:
+            self._dados[chave] = (valor, time.monotonic() + self.ttl)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+
+    def invalidate(self, chave):
+        """Remove uma chave do cache"""
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def clear(self):
+        """Esvazia o cache"""
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self):
+        return len(self._dados)
@@ -0,0 +1,106 @@
+import re
+import zlib
+from collections import Counter
+from sqlalchemy import LargeBinary, Text
+from sqlalchemy.types import TypeDecorator
+
+# Cabeçalho dos valores comprimidos: MAGIC + id do dicionário (1 byte) + deflate cru.
+# Textos JSON começam por '{', '[', '"' ou dígitos, então nunca colidem com o MAGIC.
+MAGIC = b'\x00ZJ'
+
+# Abaixo deste tamanho o texto é gravado como está (o ganho não paga o cabeçalho)
+TAMANHO_MINIMO = 96
+
+_CHAVES = [
+    # Relatório diário
+    'cabecalho', 'colaboradores', 'protocolos', 'no_prazo', 'vencidos', 'total',
+    'execucao', 'comentarios', 'triagem', 'supervisor', 'metricas', 'timestamp',
+    # Planejamento (snapshots do log de auditoria)
+    'id', 'data', 'turno', 'equipe', 'colaborador1', 'colaborador2', 'veiculo', 'regiao',
+    'protocolos_prazo', 'protocolos_vencidos', 'total_protocolos', 'comentario_triagem',
+    'status_triagem', 'protocolos_nao_enviados_prazo', 'protocolos_vencem_no_turno',
+    'atendido', 'impossibilidade', 'nao_executado', 'comentario_execucao', 'eficiencia',
+    'classificacao', 'comentario_supervisor', 'sentimento_supervisao', 'pontos_atencao',
+    'status_final', 'horario_saida_base', 'horario_primeiro_atendimento',
+    'horario_inicio_intervalo', 'horario_fim_intervalo', 'horario_ultimo_atendimento',
+    'horario_chegada_base', 'created_at', 'updated_at',
+]
+_VALORES = [
+    'null', 'true', 'false', 'neutro', 'normal', 'atencao', 'critico', 'excelente', 'bom',
+    'regular', 'ruim', 'supervisionado', 'finalizado', 'Man-IP-', ' | ENGIE', 'Equipe ',
+]
+
+# Dicionários pré-definidos por id. O conteúdo de um id nunca pode mudar depois
+# de usado (as linhas gravadas dependem dele); um dicionário novo ganha outro id.
+# O zlib dá preferência às sequências no fim do dicionário, por isso as chaves
+# mais frequentes ficam por último.
+DICIONARIOS = {
+    1: (''.join(f'"{v}",' for v in _VALORES) + ''.join(f'"{c}":' for c in _CHAVES)).encode(),
+}
+DICIONARIO_ATUAL = 1
+
+
+def treinar_dicionario(amostras, tamanho=16384):
+    """Monta um dicionário zlib com os trechos mais frequentes de amostras JSON.
+
+    O resultado serve para avaliar um novo id em DICIONARIOS (ver
+    src/benchmarks/bench_compression.py); os ids já gravados não mudam.
+    """
+    contagem = Counter()
+    for amostra in amostras:
+        contagem.update(re.findall(r'"[^"\\]{2,60}"\s*:?|\d{4}-\d{2}-\d{2}T?', amostra))
+    trechos = []
+    total = 0
+    for trecho, _ in contagem.most_common():
+        if total + len(trecho) > tamanho:
+            break
+        trechos.append(trecho)
+        total += len(trecho)
+    return ''.join(reversed(trechos)).encode()
+
+
+def comprimir(texto, dicionario_id=DICIONARIO_ATUAL, nivel=6):
+    """Texto JSON -> bytes comprimidos (ou o próprio texto, se for pequeno)"""
+    if texto is None or len(texto) < TAMANHO_MINIMO:
+        return texto
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, -15, zdict=DICIONARIOS[dicionario_id])
+    return MAGIC + bytes([dicionario_id]) + compressor.compress(texto.encode()) + compressor.flush()
+
+
+def descomprimir(valor):
+    """Aceita tanto valores comprimidos quanto o texto JSON das linhas antigas"""
+    if valor is None or isinstance(valor, str):
+        return valor
+    valor = bytes(valor)
+    if not valor.startswith(MAGIC):
+        return valor.decode()
+    dicionario_id = valor[len(MAGIC)]
+    descompressor = zlib.decompressobj(-15, zdict=DICIONARIOS[dicionario_id])
+    return (descompressor.decompress(valor[len(MAGIC) + 1:]) + descompressor.flush()).decode()
+
+
+class CompressedJSONText(TypeDecorator):
+    """Coluna de texto JSON gravada comprimida com zlib e dicionário pré-definido.
+
+    No Python o valor continua sendo a string JSON, então os modelos não mudam.
+    No SQLite a coluna segue declarada como TEXT (sem migração): os valores
+    novos são gravados como BLOB e as linhas antigas continuam legíveis. Nos
+    demais bancos a coluna é binária.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'sqlite':
+            return dialect.type_descriptor(Text())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        valor = comprimir(value)
+        if isinstance(valor, str) and dialect.name != 'sqlite':
+            return valor.encode()
+        return valor
+
+    def process_result_value(self, value, dialect):
+        return descomprimir(value)
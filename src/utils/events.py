@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+from src.utils.serialization import dumps
+
+
+class ClientesEsgotados(Exception):
+    """Limite de conexões simultâneas do feed atingido"""
+
+
+class EventBroker:
+    """Pub/sub em memória do processo para o feed ao vivo.
+
+    Cada evento é serializado uma única vez na publicação e guardado em um
+    buffer circular; todos os clientes leem o mesmo frame pronto. O id do
+    evento é o token de retomada (<época>-<sequência>): um cliente que
+    reconecta recebe o que perdeu enquanto ainda estiver no buffer, e um
+    evento `reset` quando não der para retomar (buffer excedido, processo
+    reiniciado ou token de outro worker) para recarregar os dados completos.
+    A entrega vale só para os clientes conectados ao processo que publicou.
+    """
+
+    def __init__(self, buffer_size=1000, heartbeat=15, max_clients=100):
+        self.heartbeat = heartbeat
+        self.max_clients = max_clients
+        # A época muda a cada início do processo e invalida tokens antigos
+        self.epoch = f'{os.getpid():x}{int(time.time()):x}'
+        self._eventos = deque(maxlen=buffer_size)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self.clientes = 0
+        self.publicados = 0
+        self.rejeitados = 0
+        self.resets = 0
+
+    def token(self, seq=None):
+        """Token de retomada da sequência informada (sem ela, da posição atual)"""
+        if seq is None:
+            with self._cond:
+                seq = self._seq
+        return f'{self.epoch}-{seq}'
+
+    def publish(self, tipo, payload):
+        """Publica um evento para todos os clientes conectados"""
+        dados = dumps(payload)
+        with self._cond:
+            self._seq += 1
+            frame = b'id: %s\nevent: %s\ndata: %s\n\n' % (self.token(self._seq).encode(), tipo.encode(), dados)
+            self._eventos.append((self._seq, tipo, dados, frame))
+            self.publicados += 1
+            self._cond.notify_all()
+
+    def posicao(self, token):
+        """Sequência a partir da qual o token retoma, ou None se não puder retomar"""
+        with self._cond:
+            if not token:
+                return self._seq
+            epoch, _, seq = token.rpartition('-')
+            if epoch != self.epoch or not seq.isdigit():
+                return None
+            seq = int(seq)
+            primeiro = self._eventos[0][0] if self._eventos else self._seq + 1
+            if seq < primeiro - 1 or seq > self._seq:
+                return None
+            return seq
+
+    def aguardar(self, seq, timeout):
+        """Eventos posteriores a `seq`, esperando até `timeout` segundos se ainda não houver.
+
+        Retorna None quando parte deles já saiu do buffer (o cliente precisa de reset).
+        """
+        with self._cond:
+            if self._seq <= seq:
+                self._cond.wait(timeout)
+            if self._seq <= seq:
+                return []
+            primeiro = self._eventos[0][0]
+            if seq + 1 < primeiro:
+                return None
+            # Sequências são contíguas no buffer: o início é calculado, não procurado
+            return list(islice(self._eventos, seq + 1 - primeiro, None))
+
+    def stream(self, token=None):
+        """Gerador de frames SSE a partir do token.
+
+        A lotação é conferida aqui, para a rota responder 503 antes de abrir
+        o stream; a vaga só é ocupada quando o gerador começa a ser lido.
+        """
+        with self._cond:
+            if self.clientes >= self.max_clients:
+                self.rejeitados += 1
+                raise ClientesEsgotados('Limite de conexões do feed ao vivo atingido')
+        return self._frames(self.posicao(token))
+
+    def _reset(self):
+        with self._cond:
+            self.resets += 1
+            return self._seq
+
+    def _frames(self, seq):
+        with self._cond:
+            self.clientes += 1
+        try:
+            yield b'retry: 3000\n\n'
+            while True:
+                if seq is None:
+                    seq = self._reset()
+                    yield b'id: %s\nevent: reset\ndata: {}\n\n' % self.token(seq).encode()
+                eventos = self.aguardar(seq, self.heartbeat)
+                if eventos is None:
+                    seq = None
+                elif not eventos:
+                    # Comentário SSE: mantém a conexão viva e detecta clientes desconectados
+                    yield b': ping\n\n'
+                else:
+                    seq = eventos[-1][0]
+                    yield b''.join(evento[3] for evento in eventos)
+        finally:
+            with self._cond:
+                self.clientes -= 1
+
+    def poll(self, token, timeout):
+        """Long-poll: (eventos, próximo token, reset) esperando até `timeout` segundos"""
+        seq = self.posicao(token)
+        eventos = None if seq is None else self.aguardar(seq, timeout)
+        if eventos is None:
+            return [], self.token(self._reset()), True
+        if eventos:
+            seq = eventos[-1][0]
+        return eventos, self.token(seq), False
+
+    def stats(self):
+        with self._cond:
+            return {
+                'clientes': self.clientes,
+                'publicados': self.publicados,
+                'rejeitados': self.rejeitados,
+                'resets': self.resets,
+                'buffer': len(self._eventos),
+            }
+
+
+# Broker único do processo, configurado por variáveis de ambiente
+eventos = EventBroker(
+    buffer_size=int(os.environ.get('EVENTS_BUFFER_SIZE', 1000)),
+    heartbeat=float(os.environ.get('EVENTS_HEARTBEAT', 15)),
+    max_clients=int(os.environ.get('EVENTS_MAX_CLIENTS', 100))
+)
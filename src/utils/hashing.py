@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingOverloaded(Exception):
+    """Fila de hashing cheia ou tempo de espera esgotado"""
+
+
+class PasswordHasher:
+    """Executa o hashing de senhas em um pool dedicado e limitado.
+
+    O PBKDF2/scrypt do hashlib libera o GIL, então até `max_workers` hashes
+    rodam em paralelo; acima de `max_workers + max_queue` pedidos pendentes,
+    novas chamadas falham com HashingOverloaded.
+
+    A thread da requisição continua bloqueada esperando o resultado (o Flask
+    síncrono não tem como devolvê-la ao servidor no meio da requisição): o
+    pool limita quantos hashes disputam a CPU e recusa o excesso logo, em
+    vez de deixar cada thread calcular o seu. Esperas acima de `timeout`
+    viram HashingOverloaded e o hash ainda não iniciado é cancelado.
+    """
+
+    def __init__(self, max_workers=2, max_queue=64, method='scrypt:32768:8:1', timeout=10):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        # Método completo, com os parâmetros padrão do werkzeug ('pbkdf2:sha256' vira
+        # 'pbkdf2:sha256:1000000'), tirado do prefixo de um hash descartável: é o
+        # prefixo que fica gravado e com que needs_rehash compara
+        self.method = generate_password_hash('', method).split('$', 1)[0]
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hash')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+
+    def _run(self, fn, *args):
+        """Envia uma função ao pool e espera o resultado"""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise HashingOverloaded('Fila de hashing de senhas cheia')
+            self._pending += 1
+        enfileirado_em = time.monotonic()
+
+        def tarefa():
+            with self._lock:
+                self._running += 1
+                self.total_wait += time.monotonic() - enfileirado_em
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+                    self.completed += 1
+
+        future = self._executor.submit(tarefa)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self.rejected += 1
+                # Ainda na fila: ninguém vai esperar pelo resultado
+                if future.cancel():
+                    self._pending -= 1
+            raise HashingOverloaded('Tempo de espera do hashing de senhas esgotado')
+
+    def hash(self, password):
+        """Gera o hash da senha com o método configurado"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Confere a senha contra o hash armazenado"""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Indica se o hash foi gerado com parâmetros diferentes dos atuais"""
+        return password_hash.split('$', 1)[0] != self.method
+
+    def stats(self):
+        """Métricas da fila de hashing"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._running,
+                'queue_depth': self._pending - self._running,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.total_wait / self.completed * 1000, 2) if self.completed else 0
+            }
+
+
+# Pool único do processo, configurado por variáveis de ambiente
+hasher = PasswordHasher(
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2)),
+    max_queue=int(os.environ.get('PASSWORD_HASH_QUEUE', 64)),
+    method=os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1'),
+    timeout=float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+)
@@ -0,0 +1,317 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, g, request
+from src.utils.sql_instrumentation import current_stats
+
+# Limites (segundos) dos histogramas de latência
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Com METRICS_DIR definido (servidor com vários processos), cada worker grava
+# um retrato das suas métricas nessa pasta e /metrics soma os de todos
+METRICS_DIR = os.environ.get('METRICS_DIR')
+FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
+
+class _Shard:
+    """Valores gravados por uma única thread (por isso dispensam lock)"""
+
+    __slots__ = ('thread', 'counters', 'gauges', 'histograms')
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+
+class Metrics:
+    """Registro de métricas no formato de texto do Prometheus.
+
+    Contadores, gauges de soma e histogramas são gravados em um shard por
+    thread, sem lock no caminho da requisição; a leitura junta os shards.
+    Valores que já existem em outros objetos (caches, fila de hashing, pool
+    do banco) são lidos por coletores só no momento da coleta.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard(None)
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._collectors = []
+
+    def describe(self, nome, tipo, ajuda, modo='sum'):
+        """Declara tipo e descrição; `modo` diz como somar gauges entre processos (sum/max)"""
+        self._meta[nome] = (tipo, ajuda, modo)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, nome, labels=(), valor=1):
+        contadores = self._shard().counters
+        chave = (nome, labels)
+        contadores[chave] = contadores.get(chave, 0) + valor
+
+    def add(self, nome, labels=(), delta=1):
+        """Soma delta a um gauge (o valor do gauge é a soma entre as threads)"""
+        gauges = self._shard().gauges
+        chave = (nome, labels)
+        gauges[chave] = gauges.get(chave, 0) + delta
+
+    def observe(self, nome, labels, valor):
+        histogramas = self._shard().histograms
+        chave = (nome, labels)
+        contagens = histogramas.get(chave)
+        if contagens is None:
+            # Uma posição por bucket, +Inf, soma e total
+            contagens = histogramas[chave] = [0] * (len(BUCKETS) + 3)
+        contagens[bisect_left(BUCKETS, valor)] += 1
+        contagens[-2] += valor
+        contagens[-1] += 1
+
+    def add_collector(self, coletor):
+        """coletor() -> lista de (nome, labels, valor) lida a cada coleta"""
+        self._collectors.append(coletor)
+
+    def register_cache(self, nome, cache):
+        self.add_collector(lambda: [
+            ('cache_hits_total', (('cache', nome),), cache.hits),
+            ('cache_misses_total', (('cache', nome),), cache.misses),
+            ('cache_entries', (('cache', nome),), len(cache)),
+        ])
+
+    def register_pool(self, nome, engine):
+        def coletor():
+            pool = engine.pool
+            if not hasattr(pool, 'checkedout'):
+                return []
+            labels = (('pool', nome),)
+            return [
+                ('db_pool_checked_out', labels, pool.checkedout()),
+                ('db_pool_size', labels, pool.size()),
+                ('db_pool_overflow', labels, max(pool.overflow(), 0)),
+            ]
+        self.add_collector(coletor)
+
+    def register_stats(self, prefixo, stats, campos):
+        """Exporta campos de um stats() (ex.: hasher.stats) como prefixo_campo.
+
+        Campos descritos antes como contador prefixo_campo_total recebem o sufixo.
+        """
+        nomes = {}
+        for campo in campos:
+            nome = f'{prefixo}_{campo}'
+            contador = self._meta.get(f'{nome}_total', ('',))[0] == 'counter'
+            nomes[campo] = f'{nome}_total' if contador else nome
+        self.add_collector(lambda: [(nomes[campo], (), valor)
+                                    for campo, valor in stats().items() if campo in nomes])
+
+    def _recolher(self):
+        """Junta os shards; os de threads encerradas são incorporados ao acumulado"""
+        with self._lock:
+            vivos = []
+            for shard in self._shards:
+                if shard.thread.is_alive():
+                    vivos.append(shard)
+                else:
+                    _somar(self._retired, shard)
+            self._shards = vivos
+            total = _Shard(None)
+            _somar(total, self._retired)
+        for shard in vivos:
+            _somar(total, shard)
+        return total
+
+    def snapshot(self):
+        """Retrato serializável das métricas deste processo"""
+        total = self._recolher()
+        valores = []
+        for coletor in self._collectors:
+            try:
+                valores.extend(coletor())
+            except Exception:
+                continue
+        return {
+            'pid': os.getpid(),
+            'counters': [[nome, list(labels), valor] for (nome, labels), valor in total.counters.items()],
+            'histograms': [[nome, list(labels), contagens] for (nome, labels), contagens in total.histograms.items()],
+            'collected': [[nome, list(labels), valor] for (nome, labels), valor in total.gauges.items()]
+                         + [[nome, list(labels), valor] for nome, labels, valor in valores],
+        }
+
+    def write_snapshot(self):
+        """Grava o retrato do processo em METRICS_DIR (troca atômica do arquivo)"""
+        caminho = os.path.join(METRICS_DIR, f'metrics-{os.getpid()}.json')
+        with open(caminho + '.tmp', 'w') as arquivo:
+            json.dump(self.snapshot(), arquivo)
+        os.replace(caminho + '.tmp', caminho)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.write_snapshot()
+            except OSError:
+                pass
+
+    def start_flusher(self):
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+        atexit.register(self.write_snapshot)
+
+    def _snapshots(self):
+        if not METRICS_DIR:
+            return [self.snapshot()]
+        self.write_snapshot()
+        retratos = []
+        for caminho in glob.glob(os.path.join(METRICS_DIR, 'metrics-*.json')):
+            try:
+                with open(caminho) as arquivo:
+                    retratos.append(json.load(arquivo))
+            except (OSError, ValueError):
+                continue
+        return retratos
+
+    def render(self):
+        """Texto de exposição do Prometheus com a soma de todos os processos"""
+        contadores, gauges, histogramas = {}, {}, {}
+        for retrato in self._snapshots():
+            vivo = _processo_vivo(retrato['pid'])
+            for nome, labels, valor in retrato['counters']:
+                chave = (nome, tuple(map(tuple, labels)))
+                contadores[chave] = contadores.get(chave, 0) + valor
+            for nome, labels, contagens in retrato['histograms']:
+                chave = (nome, tuple(map(tuple, labels)))
+                atual = histogramas.setdefault(chave, [0] * len(contagens))
+                for i, valor in enumerate(contagens):
+                    atual[i] += valor
+            for nome, labels, valor in retrato['collected']:
+                tipo, _, modo = self._meta.get(nome, ('gauge', '', 'sum'))
+                # Gauges de processos encerrados não valem mais; contadores sim
+                if tipo == 'gauge' and not vivo:
+                    continue
+                chave = (nome, tuple(map(tuple, labels)))
+                if tipo == 'counter':
+                    contadores[chave] = contadores.get(chave, 0) + valor
+                elif modo == 'max':
+                    gauges[chave] = max(gauges.get(chave, valor), valor)
+                else:
+                    gauges[chave] = gauges.get(chave, 0) + valor
+
+        por_nome = {}
+        for (nome, labels), valor in sorted({**contadores, **gauges, **histogramas}.items()):
+            por_nome.setdefault(nome, []).append((labels, valor))
+
+        linhas = []
+        for nome, series in por_nome.items():
+            tipo, ajuda, _ = self._meta.get(nome, ('untyped', '', 'sum'))
+            linhas.append(f'# HELP {nome} {ajuda}')
+            linhas.append(f'# TYPE {nome} {tipo}')
+            for labels, valor in series:
+                if tipo != 'histogram':
+                    linhas.append(f'{nome}{_labels(labels)} {_numero(valor)}')
+                    continue
+                contagens = valor
+                acumulado = 0
+                for limite, contagem in zip(BUCKETS + ('+Inf',), contagens):
+                    acumulado += contagem
+                    linhas.append(f'{nome}_bucket{_labels(labels + (("le", str(limite)),))} {acumulado}')
+                linhas.append(f'{nome}_sum{_labels(labels)} {_numero(contagens[-2])}')
+                linhas.append(f'{nome}_count{_labels(labels)} {contagens[-1]}')
+        return '\n'.join(linhas) + '\n'
+
+
+def _somar(destino, shard):
+    # list() copia cada dict de uma vez, sem disputar com a thread que grava nele
+    for chave, valor in list(shard.counters.items()):
+        destino.counters[chave] = destino.counters.get(chave, 0) + valor
+    for chave, valor in list(shard.gauges.items()):
+        destino.gauges[chave] = destino.gauges.get(chave, 0) + valor
+    for chave, contagens in list(shard.histograms.items()):
+        atual = destino.histograms.setdefault(chave, [0] * len(contagens))
+        for i, valor in enumerate(list(contagens)):
+            atual[i] += valor
+
+
+def _processo_vivo(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    valores = ','.join('{}="{}"'.format(nome, str(valor).replace('\\', '\\\\').replace('"', '\\"')) for nome, valor in labels)
+    return '{' + valores + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+metrics = Metrics()
+metrics.describe('http_requests_total', 'counter', 'Requisições atendidas por endpoint, método e status')
+metrics.describe('http_request_duration_seconds', 'histogram', 'Latência das requisições por endpoint')
+metrics.describe('http_request_db_seconds', 'histogram', 'Tempo de banco por requisição e endpoint')
+metrics.describe('http_requests_in_flight', 'gauge', 'Requisições em andamento')
+metrics.describe('cache_hits_total', 'counter', 'Acertos do cache em memória')
+metrics.describe('cache_misses_total', 'counter', 'Faltas do cache em memória')
+metrics.describe('cache_entries', 'gauge', 'Entradas no cache em memória')
+metrics.describe('db_pool_checked_out', 'gauge', 'Conexões do pool em uso')
+metrics.describe('db_pool_size', 'gauge', 'Tamanho configurado do pool')
+metrics.describe('db_pool_overflow', 'gauge', 'Conexões acima do tamanho do pool')
+
+
+def init_metrics(app):
+    """Mede as requisições da aplicação e expõe tudo em GET /metrics"""
+    @app.before_request
+    def _inicio_metricas():
+        g._metricas_inicio = time.perf_counter()
+        metrics.add('http_requests_in_flight')
+
+    @app.after_request
+    def _registrar_status(response):
+        g._metricas_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _fim_metricas(exc):
+        inicio = g.pop('_metricas_inicio', None)
+        if inicio is None:
+            return
+        # Streaming: o teardown só roda depois do envio do corpo
+        metrics.add('http_requests_in_flight', (), -1)
+        endpoint = request.endpoint or 'nao_encontrado'
+        labels = (('endpoint', endpoint), ('method', request.method))
+        status = 500 if exc is not None else g.pop('_metricas_status', 500)
+        metrics.inc('http_requests_total', labels + (('status', str(status)),))
+        metrics.observe('http_request_duration_seconds', labels, time.perf_counter() - inicio)
+        stats = current_stats()
+        if stats is not None:
+            metrics.observe('http_request_db_seconds', labels, stats.total)
+
+    def metrics_endpoint():
+        texto = metrics.render()
+        return Response(texto, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
+    if METRICS_DIR:
+        metrics.start_flusher()
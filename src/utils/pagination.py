@@ -0,0 +1,58 @@
+import base64
+from datetime import datetime
+
+# Limites da paginação por cursor (keyset)
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def parse_limit(valor, default=DEFAULT_LIMIT, maximo=MAX_LIMIT):
+    """Converte o parâmetro ?limit= respeitando o limite máximo"""
+    if valor is None or valor == '':
+        return default
+    limit = int(valor)
+    if limit < 1:
+        raise ValueError('limit deve ser maior que zero')
+    return min(limit, maximo)
+
+
+def encode_cursor(data, registro_id):
+    """Gera um cursor opaco a partir da chave (data, id) do último registro"""
+    bruto = f"{data.isoformat()}|{registro_id}"
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Lê um cursor gerado por encode_cursor e devolve (data, id)"""
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        bruto = base64.urlsafe_b64decode(cursor + preenchimento).decode()
+        data_str, id_str = bruto.split('|')
+        return datetime.strptime(data_str, '%Y-%m-%d').date(), int(id_str)
+    except Exception:
+        raise ValueError('cursor inválido')
+
+
+def keyset_page(query, data_col, id_col, cursor=None, limit=DEFAULT_LIMIT):
+    """Aplica a paginação keyset em ordem (data desc, id desc).
+
+    Busca limit + 1 linhas para saber se existe próxima página sem
+    precisar de um COUNT sobre a tabela inteira.
+    """
+    if cursor:
+        data_cursor, id_cursor = decode_cursor(cursor)
+        # data <= cursor isolado permite ao banco buscar a faixa pelo índice de data
+        query = query.filter(
+            data_col <= data_cursor,
+            (data_col < data_cursor) | (id_col < id_cursor)
+        )
+
+    registros = query.order_by(data_col.desc(), id_col.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(registros) > limit:
+        registros = registros[:limit]
+        ultimo = registros[-1]
+        next_cursor = encode_cursor(ultimo.data, ultimo.id)
+
+    return registros, next_cursor
@@ -0,0 +1,65 @@
+import logging
+import os
+from contextlib import contextmanager
+from flask import request
+from src.utils.sql_instrumentation import collect_stats, current_stats, init_sql_instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class QueryLimitExceeded(AssertionError):
+    """Requisição (ou bloco) executou mais comandos SQL que o permitido"""
+
+
+@contextmanager
+def count_queries():
+    """Lista os comandos SQL executados pela thread atual dentro do bloco"""
+    with collect_stats() as stats:
+        yield stats.statements
+
+
+@contextmanager
+def assert_max_queries(limite):
+    """Falha com QueryLimitExceeded se o bloco executar mais de `limite` comandos"""
+    with count_queries() as comandos:
+        yield comandos
+    if len(comandos) > limite:
+        raise QueryLimitExceeded(_mensagem(len(comandos), limite, comandos))
+
+
+def query_limit(limite):
+    """Decorator de rota: limite próprio de comandos SQL para o endpoint"""
+    def decorator(f):
+        f.sql_query_limit = limite
+        return f
+    return decorator
+
+
+def _mensagem(total, limite, comandos):
+    listagem = '\n'.join(f'  {comando}' for comando in comandos)
+    return f'{total} comandos SQL executados (limite {limite}):\n{listagem}'
+
+
+def init_query_guard(app):
+    """Aplica SQL_QUERY_LIMIT aos comandos SQL de cada requisição.
+
+    Sem limite configurado nada é verificado. Em app.testing (ou com
+    SQL_QUERY_LIMIT_RAISE) exceder o limite levanta QueryLimitExceeded, o que
+    faz o teste falhar; fora disso só registra um aviso no log.
+    """
+    init_sql_instrumentation(app)
+    app.config.setdefault('SQL_QUERY_LIMIT', int(os.environ.get('SQL_QUERY_LIMIT', 0)) or None)
+    app.config.setdefault('SQL_QUERY_LIMIT_RAISE', os.environ.get('SQL_QUERY_LIMIT_RAISE') == '1')
+
+    @app.after_request
+    def _verificar_limite(response):
+        stats = current_stats()
+        view = app.view_functions.get(request.endpoint)
+        limite = getattr(view, 'sql_query_limit', None) or app.config['SQL_QUERY_LIMIT']
+        if stats is None or not limite or stats.count <= limite:
+            return response
+        mensagem = f'{request.method} {request.path}: ' + _mensagem(stats.count, limite, stats.statements)
+        if app.testing or app.config['SQL_QUERY_LIMIT_RAISE']:
+            raise QueryLimitExceeded(mensagem)
+        logger.warning(mensagem)
+        return response
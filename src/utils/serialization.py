@@ -0,0 +1,129 @@
+import json
+import threading
+from datetime import date, datetime, time
+from operator import attrgetter
+from flask import Response
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import joinedload, selectinload
+from src.utils.cache import TTLCache
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da biblioteca padrão
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    raise TypeError(f'Objeto do tipo {type(obj).__name__} não é serializável em JSON')
+
+
+def dumps(payload):
+    """Serializa para bytes JSON; datas e horários viram ISO 8601 no próprio encoder"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode()
+
+
+def json_response(payload, status=200):
+    """Resposta JSON usando o encoder mais rápido disponível"""
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+def parse_fields(valor):
+    """Converte ?fields=a,b,c em tupla (None quando não informado)"""
+    if not valor:
+        return None
+    return tuple(dict.fromkeys(campo.strip() for campo in valor.split(',') if campo.strip()))
+
+
+# Conjuntos distintos de ?fields= compilados por modelo (os menos usados saem primeiro)
+MAX_COMBINACOES_CAMPOS = 256
+
+
+class ModelSerializer:
+    """Serializador de um modelo com os acessores de campo montados uma única vez.
+
+    Os campos são as colunas mapeadas, na ordem de declaração, menos
+    `serialize_exclude`; `serialize_extra` (nome -> função) acrescenta
+    campos calculados ou substitui o valor de uma coluna. Valores de data e
+    hora saem como objetos e são convertidos pelo encoder em dumps().
+    `serialize_eager` lista os relacionamentos lidos pelos extras, para as
+    listagens carregarem tudo junto (ver eager_options).
+    """
+
+    def __init__(self, model):
+        self.model = model
+        mapper = sa_inspect(model)
+        exclude = set(getattr(model, 'serialize_exclude', ()))
+        extra = dict(getattr(model, 'serialize_extra', {}))
+
+        self.fields = {}
+        self.column_fields = {}
+        for atributo in mapper.column_attrs:
+            nome = atributo.key
+            if nome in exclude:
+                continue
+            if nome in extra:
+                self.fields[nome] = extra.pop(nome)
+            else:
+                self.fields[nome] = attrgetter(nome)
+                self.column_fields[nome] = getattr(model, nome)
+        self.fields.update(extra)
+        self._todos = tuple(self.fields.items())
+        # ?fields= vem do cliente: a chave é normalizada e o número de combinações limitado
+        self._compiled = TTLCache(maxsize=MAX_COMBINACOES_CAMPOS, ttl=24 * 3600)
+        
+        # Relacionamento de um só objeto vai no mesmo SELECT (JOIN); coleções em
+        # um SELECT ... IN adicional, para não multiplicar as linhas
+        self._eager = tuple(
+            selectinload(getattr(model, nome)) if mapper.relationships[nome].uselist
+            else joinedload(getattr(model, nome))
+            for nome in getattr(model, 'serialize_eager', ())
+        )
+
+    def _accessors(self, fields):
+        if fields is None:
+            return self._todos
+        chave = tuple(sorted(set(fields)))
+        acessores = self._compiled.get(chave)
+        if acessores is None:
+            invalidos = [campo for campo in chave if campo not in self.fields]
+            if invalidos:
+                raise ValueError(f"Campos inválidos: {', '.join(invalidos)}")
+            # Ordem de declaração do modelo, qualquer que seja a ordem pedida
+            acessores = tuple((campo, getter) for campo, getter in self._todos if campo in chave)
+            self._compiled.set(chave, acessores)
+        return acessores
+
+    def columns(self, fields):
+        """Atributos de coluna necessários para um conjunto de campos (para load_only)"""
+        self._accessors(fields)
+        return [self.column_fields[campo] for campo in fields if campo in self.column_fields]
+
+    def eager_options(self):
+        """Opções de carregamento para query.options() antes de serializar"""
+        return self._eager
+
+    def dump(self, obj, fields=None):
+        return {nome: getter(obj) for nome, getter in self._accessors(fields)}
+
+    def dump_many(self, objs, fields=None):
+        acessores = self._accessors(fields)
+        return [{nome: getter(obj) for nome, getter in acessores} for obj in objs]
+
+
+_serializers = {}
+_lock = threading.Lock()
+
+
+def serializer_for(model):
+    """Serializador compartilhado do modelo (criado no primeiro uso)"""
+    serializer = _serializers.get(model)
+    if serializer is None:
+        with _lock:
+            serializer = _serializers.get(model)
+            if serializer is None:
+                serializer = _serializers[model] = ModelSerializer(model)
+    return serializer
@@ -0,0 +1,118 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Comandos acima deste tempo (ms) vão para o log de consultas lentas
+SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 200))
+
+
+class SQLStats:
+    """Comandos SQL de uma requisição: quantidade, tempo total e o mais lento"""
+
+    __slots__ = ('statements', 'total', 'slowest', 'slowest_statement')
+
+    def __init__(self):
+        self.statements = []
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def record(self, statement, duracao):
+        self.statements.append(statement)
+        self.total += duracao
+        if duracao > self.slowest:
+            self.slowest = duracao
+            self.slowest_statement = statement
+
+
+_local = threading.local()
+
+
+@contextmanager
+def collect_stats():
+    """SQLStats dos comandos executados pela thread atual dentro do bloco"""
+    stats = SQLStats()
+    coletores = getattr(_local, 'coletores', None)
+    if coletores is None:
+        coletores = _local.coletores = []
+    coletores.append(stats)
+    try:
+        yield stats
+    finally:
+        coletores.remove(stats)
+
+
+def current_stats():
+    """SQLStats da requisição atual (None fora de requisição instrumentada)"""
+    if has_app_context():
+        return g.get('_sql_stats')
+    return None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _inicio(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_sql_inicio', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _fim(conn, cursor, statement, parameters, context, executemany):
+    duracao = time.perf_counter() - conn.info['_sql_inicio'].pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.record(statement, duracao)
+    for coletor in getattr(_local, 'coletores', ()):
+        coletor.record(statement, duracao)
+    if duracao * 1000 >= SLOW_QUERY_MS:
+        endpoint = request.endpoint if has_request_context() else '-'
+        logger.warning('SQL lento (%.1f ms) em %s: %s', duracao * 1000, endpoint, statement)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _erro(contexto):
+    # Comando que falhou não passa por after_cursor_execute
+    if contexto.connection is not None and contexto.connection.info.get('_sql_inicio'):
+        contexto.connection.info['_sql_inicio'].pop()
+
+
+def init_sql_instrumentation(app):
+    """Mede os comandos SQL de cada requisição e devolve o resumo em Server-Timing.
+
+    O cabeçalho traz o tempo de banco (db), o comando mais lento (db-max) e o
+    tempo total da view (app), e pode ser desligado com SQL_SERVER_TIMING=0.
+    Respostas em streaming só contam os comandos executados antes do envio.
+    """
+    if 'sql_instrumentation' in app.extensions:
+        return
+    app.extensions['sql_instrumentation'] = True
+    app.config.setdefault('SQL_SERVER_TIMING', os.environ.get('SQL_SERVER_TIMING', '1') != '0')
+
+    @app.before_request
+    def _iniciar_medicao():
+        g._sql_stats = SQLStats()
+        g._inicio_requisicao = time.perf_counter()
+
+    @app.after_request
+    def _server_timing(response):
+        stats = current_stats()
+        if stats is None or not app.config['SQL_SERVER_TIMING']:
+            return response
+        total = (time.perf_counter() - g._inicio_requisicao) * 1000
+        logger.debug('%s: %d consultas, %.1f ms no banco, mais lenta %.1f ms: %s', request.endpoint,
+                     stats.count, stats.total * 1000, stats.slowest * 1000, stats.slowest_statement)
+        response.headers.add('Server-Timing', ', '.join([
+            f'db;dur={stats.total * 1000:.1f};desc="{stats.count} consultas"',
+            f'db-max;dur={stats.slowest * 1000:.1f}',
+            f'app;dur={total:.1f}',
+        ]))
+        return response
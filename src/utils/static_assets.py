@@ -0,0 +1,191 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from flask import Response, request, send_file
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só servimos .br gerados fora da aplicação
+    brotli = None
+
+# Arquivos com hash no nome nunca mudam de conteúdo; os demais sempre revalidam pelo ETag
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+CACHE_REVALIDAR = 'no-cache'
+
+# Acima deste tamanho o arquivo é servido do disco, sem variantes comprimidas
+TAMANHO_MAXIMO_MEMORIA = int(os.environ.get('STATIC_MAX_MEMORY_BYTES', 1024 * 1024))
+COMPRIMIR_MINIMO = 512
+TIPOS_COMPRIMIVEIS = ('text/', 'application/javascript', 'application/json', 'image/svg+xml',
+                      'image/x-icon', 'image/vnd.microsoft.icon')
+
+# href/src relativos nas páginas HTML (URLs externas e âncoras ficam de fora)
+_REFERENCIA = re.compile(r'''(\b(?:href|src)=["'])([^"'#?:]+)(["'])''')
+
+
+class Asset:
+    """Arquivo estático com ETag e variantes comprimidas já calculadas"""
+
+    __slots__ = ('nome', 'mimetype', 'etag', 'corpo', 'caminho', 'variantes', 'imutavel')
+
+    def __init__(self, nome, mimetype, etag, corpo=None, caminho=None, variantes=None, imutavel=False):
+        self.nome = nome
+        self.mimetype = mimetype
+        self.etag = etag
+        self.corpo = corpo
+        self.caminho = caminho
+        self.variantes = variantes or {}
+        self.imutavel = imutavel
+
+    def com_hash(self):
+        """Mesmo conteúdo, servido com cache imutável"""
+        return Asset(self.nome, self.mimetype, self.etag, self.corpo, self.caminho, self.variantes, True)
+
+
+def _comprimivel(mimetype):
+    return mimetype.startswith(TIPOS_COMPRIMIVEIS)
+
+
+def _pre_comprimido(caminho_variante, caminho):
+    """Conteúdo de um .gz/.br gerado no build, se for mais novo que o original"""
+    try:
+        if os.path.getmtime(caminho_variante) < os.path.getmtime(caminho):
+            return None
+        with open(caminho_variante, 'rb') as arquivo:
+            return arquivo.read()
+    except OSError:
+        return None
+
+
+def _variantes(corpo, caminho, reescrito):
+    variantes = {}
+    compressores = (
+        ('br', '.br', brotli.compress if brotli else None),
+        ('gzip', '.gz', lambda dados: gzip.compress(dados, 9, mtime=0)),
+    )
+    for codificacao, extensao, comprimir in compressores:
+        # Página reescrita não corresponde mais ao arquivo comprimido em disco
+        comprimido = None if reescrito else _pre_comprimido(caminho + extensao, caminho)
+        if comprimido is None and comprimir is not None:
+            comprimido = comprimir(corpo)
+        if comprimido is not None and len(comprimido) < len(corpo):
+            variantes[codificacao] = comprimido
+    return variantes
+
+
+def _carregar(nome, caminho, corpo=None):
+    mimetype = mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+    reescrito = corpo is not None
+    if not reescrito and os.path.getsize(caminho) > TAMANHO_MAXIMO_MEMORIA:
+        resumo = hashlib.sha256()
+        with open(caminho, 'rb') as arquivo:
+            for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+                resumo.update(bloco)
+        return Asset(nome, mimetype, resumo.hexdigest()[:20], caminho=caminho)
+    if corpo is None:
+        with open(caminho, 'rb') as arquivo:
+            corpo = arquivo.read()
+    variantes = {}
+    if _comprimivel(mimetype) and len(corpo) >= COMPRIMIR_MINIMO:
+        variantes = _variantes(corpo, caminho, reescrito)
+    return Asset(nome, mimetype, hashlib.sha256(corpo).hexdigest()[:20], corpo, variantes=variantes)
+
+
+class StaticManifest:
+    """Índice em memória da pasta static/, montado uma vez na inicialização.
+
+    Cada arquivo (exceto páginas HTML) também é publicado com o hash do
+    conteúdo no nome (style.<hash>.css), com cache imutável de um ano; as
+    páginas HTML têm as referências reescritas para esses nomes. Nomes sem
+    hash continuam válidos e revalidam pelo ETag (304 sem corpo).
+    """
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.assets = {}
+        self.fingerprints = {}
+        self._assinatura = None
+        self.construir()
+
+    def _arquivos(self):
+        for raiz, pastas, arquivos in os.walk(self.pasta):
+            pastas[:] = [nome for nome in pastas if not nome.startswith('.')]
+            for arquivo in arquivos:
+                # .gz/.br são variantes do arquivo original, não assets próprios
+                if arquivo.startswith('.') or arquivo.endswith(('.gz', '.br')):
+                    continue
+                caminho = os.path.join(raiz, arquivo)
+                yield os.path.relpath(caminho, self.pasta).replace(os.sep, '/'), caminho
+
+    def _assinatura_atual(self):
+        return sorted((caminho, os.path.getmtime(caminho)) for _, caminho in self._arquivos())
+
+    def construir(self):
+        assets, fingerprints, paginas = {}, {}, []
+        assinatura = self._assinatura_atual()
+        for nome, caminho in self._arquivos():
+            if nome.endswith(('.html', '.htm')):
+                paginas.append((nome, caminho))
+                continue
+            asset = _carregar(nome, caminho)
+            base, extensao = posixpath.splitext(nome)
+            fingerprints[nome] = f'{base}.{asset.etag[:10]}{extensao}'
+            assets[nome] = asset
+            assets[fingerprints[nome]] = asset.com_hash()
+
+        for nome, caminho in paginas:
+            with open(caminho, 'rb') as arquivo:
+                html = arquivo.read().decode('utf-8')
+            html = _REFERENCIA.sub(lambda m: self._reescrever(m, nome, fingerprints), html)
+            assets[nome] = _carregar(nome, caminho, html.encode('utf-8'))
+
+        # Troca de uma vez: requisições em andamento continuam com o manifesto anterior
+        self.assets, self.fingerprints, self._assinatura = assets, fingerprints, assinatura
+
+    @staticmethod
+    def _reescrever(match, pagina, fingerprints):
+        referencia = match.group(2)
+        if referencia.startswith('/'):
+            alvo = posixpath.normpath(referencia.lstrip('/'))
+        else:
+            alvo = posixpath.normpath(posixpath.join(posixpath.dirname(pagina), referencia))
+        if alvo not in fingerprints:
+            return match.group(0)
+        nova = posixpath.join(posixpath.dirname(referencia), posixpath.basename(fingerprints[alvo]))
+        return match.group(1) + nova + match.group(3)
+
+    def atualizar(self):
+        """Remonta o manifesto se algum arquivo mudou (usado em modo debug)"""
+        if self._assinatura_atual() != self._assinatura:
+            self.construir()
+
+    def get(self, nome):
+        return self.assets.get(nome or 'index.html')
+
+    def url(self, nome):
+        """Nome com hash de um arquivo, para montar links com cache longo"""
+        return self.fingerprints.get(nome, nome)
+
+    def resposta(self, asset):
+        """Resposta do asset com Cache-Control, ETag e a melhor codificação aceita"""
+        codificacao = next((codificacao for codificacao in ('br', 'gzip')
+                            if codificacao in asset.variantes and request.accept_encodings[codificacao]), None)
+        etag = f'{asset.etag}-{codificacao}' if codificacao else asset.etag
+
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        elif asset.corpo is None:
+            response = send_file(asset.caminho, mimetype=asset.mimetype, etag=False, conditional=True)
+        else:
+            corpo = asset.variantes[codificacao] if codificacao else asset.corpo
+            response = Response(corpo, mimetype=asset.mimetype)
+            if codificacao:
+                response.headers['Content-Encoding'] = codificacao
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = CACHE_IMUTAVEL if asset.imutavel else CACHE_REVALIDAR
+        if asset.variantes:
+            response.vary.add('Accept-Encoding')
+        return response
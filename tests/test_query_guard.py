@@ -0,0 +1,81 @@
+import jwt
+import pytest
+from flask import Flask, jsonify
+from src.models.user import User, Profile, Team, db
+from src.routes.auth import auth_bp, user_cache, JWT_SECRET
+from src.utils.query_guard import QueryLimitExceeded, assert_max_queries, init_query_guard, query_limit
+from src.utils.serialization import serializer_for
+
+# Comandos por requisição: o principal do token (1, em cache depois) e a consulta da rota
+LIMITE = 3
+USUARIOS = 10
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "usuarios.db"}',
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SQL_QUERY_LIMIT=LIMITE,
+    )
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    db.init_app(app)
+    init_query_guard(app)
+
+    @app.route('/usuarios-sem-eager')
+    @query_limit(LIMITE)
+    def usuarios_sem_eager():
+        # Perfil e equipe carregados um a um (N+1)
+        return jsonify([serializer_for(User).dump(user) for user in User.query.all()])
+
+    with app.app_context():
+        db.create_all()
+        perfil = Profile(name='Equipe', description='Teste')
+        db.session.add(perfil)
+        db.session.flush()
+        for i in range(USUARIOS):
+            equipe = Team(name=f'equipe{i}')
+            db.session.add(equipe)
+            db.session.flush()
+            user = User(username=f'user{i}', email=f'user{i}@engie.com', password_hash='-',
+                        profile_id=perfil.id, team_id=equipe.id)
+            db.session.add(user)
+        db.session.commit()
+    user_cache.clear()
+    yield app
+    user_cache.clear()
+
+
+@pytest.fixture
+def headers(app):
+    token = jwt.encode({'user_id': 1}, JWT_SECRET, algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_rotas_dentro_do_limite(app, headers):
+    cliente = app.test_client()
+    for caminho in ('/api/auth/me', '/api/auth/teams'):
+        resposta = cliente.get(caminho, headers=headers)
+        assert resposta.status_code == 200
+    assert resposta.get_json()['teams'][0]['name'] == 'equipe0'
+
+
+def test_rota_acima_do_limite_falha(app):
+    with pytest.raises(QueryLimitExceeded):
+        app.test_client().get('/usuarios-sem-eager')
+
+
+def test_eager_loading_mantem_uma_consulta(app):
+    serializer = serializer_for(User)
+    with app.app_context():
+        with assert_max_queries(1):
+            usuarios = serializer.dump_many(User.query.options(*serializer.eager_options()).all())
+        assert len(usuarios) == USUARIOS
+        db.session.expunge_all()
+
+        with pytest.raises(QueryLimitExceeded) as erro:
+            with assert_max_queries(1):
+                serializer.dump_many(User.query.all())
+        assert 'limite 1' in str(erro.value)